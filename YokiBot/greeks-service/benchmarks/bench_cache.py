@@ -0,0 +1,65 @@
+# bench_cache.py - hit latency of the local LRU tier vs the Redis tier
+# Run from greeks-service/: python benchmarks/bench_cache.py
+# The Redis tier is skipped when REDIS_URL is not reachable.
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+
+from cache import LocalLRUCache, TieredCache
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+N = int(os.getenv("BENCH_N", "20000"))
+
+PAYLOAD = {
+    "symbol": "NIFTY", "strike": 22000.0, "expiry": "2025-01-30", "option_type": "CE",
+    "underlying": 22012.35, "iv": 0.1432, "theoretical_price": 101.25, "delta": 0.52,
+    "gamma": 0.0011, "vega": 12.4, "theta": -2950.0, "rho": 6.1, "d1": 0.05, "d2": 0.01,
+    "timestamp": time.time(),
+}
+
+
+def report(name: str, elapsed: float, n: int):
+    print(f"{name:<14} {n:>7} hits  {elapsed / n * 1e6:8.2f} us/hit  {n / elapsed:12.0f} hits/s")
+
+
+def bench_local():
+    local = LocalLRUCache(maxsize=4096, ttl=60)
+    keys = [f"greeks:v2:bench:{i}" for i in range(1024)]
+    for k in keys:
+        local.set(k, PAYLOAD)
+    t0 = time.perf_counter()
+    for i in range(N):
+        local.get(keys[i & 1023])
+    report("local LRU", time.perf_counter() - t0, N)
+
+
+def bench_redis():
+    client = redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        client.ping()
+    except redis.RedisError as e:
+        print(f"redis tier     skipped ({e})")
+        return
+    keys = [f"greeks:v2:bench:{i}" for i in range(1024)]
+    for k in keys:
+        client.set(k, json.dumps(PAYLOAD), ex=60)
+
+    # local tier with size 0 forces every lookup through to Redis
+    tiered = TieredCache(LocalLRUCache(maxsize=0, ttl=60), client, ttl=60)
+    n = min(N, 5000)
+    t0 = time.perf_counter()
+    for i in range(n):
+        tiered.get(keys[i & 1023])
+    report("redis", time.perf_counter() - t0, n)
+    client.delete(*keys)
+
+
+if __name__ == "__main__":
+    bench_local()
+    bench_redis()
@@ -0,0 +1,58 @@
+# bench_compute_chain.py - compute_chain throughput, array engine vs per-option scalar path
+# Run from greeks-service/: python benchmarks/bench_compute_chain.py
+# Uses a synthetic 161-strike chain; no Redis needed.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from chain_index import ChainIndex
+
+SPOT = 22010.0
+EXPIRY = os.getenv("BENCH_EXPIRY", "2030-01-30")
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+
+def make_chain() -> dict:
+    t = main.parse_expiry_to_years(EXPIRY)
+    calls, puts = [], []
+    for k in range(18000, 26050, 50):
+        sigma = 0.13 + 0.4 * ((k - SPOT) / SPOT) ** 2
+        calls.append({"strikePrice": k, "last_price": main.bs_price_and_greeks(SPOT, k, t, sigma, 0.06, 0.0, "CE")["price"]})
+        puts.append({"strikePrice": k, "last_price": main.bs_price_and_greeks(SPOT, k, t, sigma, 0.06, 0.0, "PE")["price"]})
+    return {"underlying_ltp": SPOT, "calls": calls, "puts": puts}
+
+
+def scalar_path(chain: dict, index: ChainIndex, start: int, end: int) -> int:
+    """Old shape of the endpoint: pydantic request + scalar solve per option."""
+    n = 0
+    for i in range(start, end):
+        k = index.strikes[i]
+        for opt_type, px in (("CE", index.ce[i]), ("PE", index.pe[i])):
+            req = main.GreeksRequest(symbol="NIFTY", underlying=SPOT, strike=k, expiry=EXPIRY,
+                                     option_type=opt_type, option_price=float(px))
+            main.compute_greeks_from_request(req)
+            n += 1
+    return n
+
+
+def run(label: str, fn) -> None:
+    t0 = time.perf_counter()
+    n = 0
+    for _ in range(REPEAT):
+        n += fn()
+    dt = time.perf_counter() - t0
+    print(f"  {label:<8} {dt / REPEAT * 1e3:9.3f} ms/call  {n / dt:10.0f} options/s")
+
+
+if __name__ == "__main__":
+    chain = make_chain()
+    for window in (0, 10, None):
+        index = ChainIndex.from_chain(chain)
+        start, end = index.window(SPOT, len(index) if window is None else window)
+        print(f"window={'full' if window is None else window} ({(end - start) * 2} options)")
+        run("array", lambda: len(main.compute_chain_greeks("NIFTY", EXPIRY, SPOT, ChainIndex.from_chain(chain), start, end)))
+        run("scalar", lambda: scalar_path(chain, index, start, end))
@@ -0,0 +1,106 @@
+# cache.py - two-tier greeks cache
+# Tier 1: in-process LRU with size bound + TTL (no network hop)
+# Tier 2: Redis (shared across workers / replicas)
+
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+import redis
+
+
+def quantize(value: Optional[float], tick: float) -> str:
+    """
+    Snap a float onto a tick grid and return it as a stable key fragment.
+    None is encoded as "-" so "iv missing" never collides with "iv == 0".
+    """
+    if value is None:
+        return "-"
+    return str(int(round(float(value) / tick)))
+
+
+class LocalLRUCache:
+    """
+    Bounded, TTL-aware LRU kept in process memory.
+    Thread-safe because FastAPI runs sync endpoints in a threadpool.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Local LRU in front of Redis.
+    Redis errors are swallowed: a cache outage must never fail a compute.
+    """
+
+    def __init__(self, local: LocalLRUCache, redis_client, ttl: int):
+        self.local = local
+        self.redis = redis_client
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            raw = self.redis.get(key)
+        except redis.RedisError:
+            return None
+        if not raw:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        self.local.set(key, value)
+        try:
+            self.redis.set(key, json.dumps(value), ex=self.ttl)
+        except redis.RedisError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "local_size": len(self.local),
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+        }
@@ -0,0 +1,57 @@
+# chain_index.py - strike-indexed view of a stored option chain
+# Parses chain:{symbol}:{expiry} JSON once into sorted strikes with aligned
+# CE / PE premium arrays, so ATM lookup is a bisect and a strike window is a slice.
+
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def _strike_of(row: dict) -> int:
+    return int(row.get("strikePrice") or row.get("strike") or 0)
+
+
+def _premium_of(row: dict) -> Optional[float]:
+    px = row.get("last_price") or row.get("lastPrice") or row.get("ltp")
+    return float(px) if px is not None else None
+
+
+class ChainIndex:
+    __slots__ = ("strikes", "ce", "pe")
+
+    def __init__(self, strikes: List[int], ce: np.ndarray, pe: np.ndarray):
+        self.strikes = strikes  # ascending
+        self.ce = ce            # CE premium per strike, NaN when missing
+        self.pe = pe            # PE premium per strike, NaN when missing
+
+    @classmethod
+    def from_chain(cls, chain: dict) -> "ChainIndex":
+        by_strike = {}  # strike -> [ce, pe]; first quote per strike/side wins
+        for side, rows in ((0, chain.get("calls", [])), (1, chain.get("puts", []))):
+            for row in rows:
+                slot = by_strike.setdefault(_strike_of(row), [None, None])
+                if slot[side] is None:
+                    slot[side] = _premium_of(row)
+        strikes = sorted(by_strike)
+        ce = np.array([by_strike[s][0] for s in strikes], dtype=np.float64)  # None -> nan
+        pe = np.array([by_strike[s][1] for s in strikes], dtype=np.float64)
+        return cls(strikes, ce, pe)
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def nearest_index(self, price: float) -> int:
+        """Index of the strike closest to price (ties go to the lower strike)."""
+        i = bisect_left(self.strikes, price)
+        if i == 0:
+            return 0
+        if i == len(self.strikes):
+            return i - 1
+        return i if self.strikes[i] - price < price - self.strikes[i - 1] else i - 1
+
+    def window(self, atm: float, window: int) -> Tuple[int, int]:
+        """[start, end) around the strike nearest atm; window <= 0 -> ATM only."""
+        idx = self.nearest_index(atm)
+        w = max(window, 0)
+        return max(0, idx - w), min(len(self.strikes), idx + w + 1)
@@ -1,5 +1,5 @@
 # main.py - Greeks microservice (final)
-# Requirements: fastapi, uvicorn, pydantic, redis, python-dotenv, httpx
+# Requirements: fastapi, uvicorn, pydantic, redis, python-dotenv, httpx, orjson, msgpack
 # Run: uvicorn main:app --host 0.0.0.0 --port 8400 --reload
 
 import os
@@ -8,12 +8,22 @@ import math
 import json
 from datetime import datetime, timezone
 print(datetime.now())
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel, Field, condecimal
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+import numpy as np
 import redis
 from dotenv import load_dotenv
+from yoki_shared.expiry_calendar import calendar as expiry_calendar
+from yoki_shared.fast_response import ORJSONResponse, negotiate
+from yoki_shared.greeks_array import IV_FAILURES, bs_greeks_array, implied_vol_status
+
+from cache import LocalLRUCache, TieredCache, quantize
+from chain_index import ChainIndex
+from portfolio import aggregate, build_leg_arrays, scenario_grid
+from streaming import DEFAULT_EPSILONS, StreamHub
 
 load_dotenv()
 
@@ -21,11 +31,27 @@ load_dotenv()
 # Config
 # -------------------------
 REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
-CACHE_TTL = int(os.getenv("GREeks_CACHE_TTL", "30"))  # seconds
+# GREeks_CACHE_TTL is the old (misspelled) name, still honoured as a fallback
+CACHE_TTL = int(os.getenv("GREEKS_CACHE_TTL", os.getenv("GREeks_CACHE_TTL", "30")))  # seconds
+LOCAL_CACHE_SIZE = int(os.getenv("GREEKS_LOCAL_CACHE_SIZE", "4096"))
+LOCAL_CACHE_TTL = float(os.getenv("GREEKS_LOCAL_CACHE_TTL", "5"))  # seconds
+
+# Cache-key quantization (inputs within one tick share a cache entry)
+PRICE_TICK = float(os.getenv("GREEKS_PRICE_TICK", "0.05"))  # option premium tick
+UNDERLYING_TICK = float(os.getenv("GREEKS_UNDERLYING_TICK", "0.05"))
+IV_TICK = float(os.getenv("GREEKS_IV_TICK", "0.0001"))  # 0.01 vol point
+RATE_TICK = float(os.getenv("GREEKS_RATE_TICK", "0.0001"))  # 1 bp
+
+# Streaming: how often subscribed chains are checked for changes in Redis
+STREAM_POLL_MS = float(os.getenv("GREEKS_STREAM_POLL_MS", "250"))
+
+# Year-fraction basis for t: "calendar" (365 x 24h) or "trading" (NSE sessions)
+TIME_MODE = os.getenv("GREEKS_TIME_MODE", "calendar")
 
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+greeks_cache = TieredCache(LocalLRUCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL), redis_client, CACHE_TTL)
 
-app = FastAPI(title="greeks-service", version="1.0")
+app = FastAPI(title="greeks-service", version="1.0", default_response_class=ORJSONResponse)
 
 # -------------------------
 # Models
@@ -44,6 +70,24 @@ class GreeksRequest(BaseModel):
 class BatchRequest(BaseModel):
     requests: List[GreeksRequest]
 
+class PortfolioLeg(BaseModel):
+    underlying: str
+    expiry: str
+    strike: float
+    option_type: str = Field(..., pattern="^(CE|PE)$")
+    qty: float  # signed units (+ long / - short), lot size already applied
+    iv: Optional[float] = None
+    option_price: Optional[float] = None
+
+class PortfolioRequest(BaseModel):
+    legs: List[PortfolioLeg]  # the caller's book; no service publishes positions in this shape
+    spots: Dict[str, float]  # underlying -> spot
+    r: Optional[float] = 0.06
+    q: Optional[float] = 0.0
+    # at least one shock each: the grid's worst / best need a non-empty grid
+    spot_shocks: List[float] = Field(default_factory=lambda: [-0.05, -0.03, -0.02, -0.01, -0.005, 0.0, 0.005, 0.01, 0.02, 0.03, 0.05], min_length=1)
+    vol_shocks: List[float] = Field(default_factory=lambda: [-0.05, -0.02, 0.0, 0.02, 0.05], min_length=1)  # absolute vol points
+
 # -------------------------
 # Math helpers (normal pdf/cdf)
 # -------------------------
@@ -64,29 +108,13 @@ def norm_pdf(x: float) -> float:
 # -------------------------
 # Expiry / time helper
 # -------------------------
-def parse_expiry_to_years(expiry_str: str) -> float:
+def parse_expiry_to_years(expiry_str: str, now: Optional[float] = None) -> float:
     """
-    Accepts YYYY-MM-DD or ISO-like strings. Returns time to expiry in years (float).
-    If expiry is in the past or zero, returns 0.
+    Accepts YYYY-MM-DD (settles 15:30 IST) or ISO-like strings. Returns time to
+    expiry in years (float) on the GREEKS_TIME_MODE basis; 0 once expired.
+    Parsing is memoised in expiry_calendar, so repeated expiries cost one lookup.
     """
-    try:
-        # try ISO first
-        dt = datetime.fromisoformat(expiry_str)
-    except Exception:
-        try:
-            dt = datetime.strptime(expiry_str, "%Y-%m-%d")
-        except Exception:
-            raise ValueError("expiry must be YYYY-MM-DD or ISO datetime")
-
-    # ensure timezone aware as UTC
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-
-    now = datetime.now(timezone.utc)
-    seconds = (dt - now).total_seconds()
-    if seconds <= 0:
-        return 0.0
-    return seconds / (365.0 * 24.0 * 3600.0)
+    return expiry_calendar.years(expiry_str, now, TIME_MODE)
 
 
 # -------------------------
@@ -216,17 +244,33 @@ def implied_vol_bisect(market_price: float, S: float, K: float, t: float, r: flo
 # Caching helpers
 # -------------------------
 def greeks_cache_key(req: GreeksRequest) -> str:
-    # Round numeric fields to stable strings for cache key
+    """
+    Key on quantized versions of every input that changes the result.
+    iv and option_price are both keyed: iv wins when present, but a request
+    carrying only a premium must miss when that premium moves by a tick.
+    """
     expiry_norm = req.expiry.strip()
-    return f"greeks:{req.symbol}:{expiry_norm}:{req.option_type}:{int(req.strike)}:{int(round(req.underlying))}"
+    return ":".join((
+        "greeks:v2",
+        req.symbol,
+        expiry_norm,
+        req.option_type,
+        quantize(req.strike, UNDERLYING_TICK),
+        quantize(req.underlying, UNDERLYING_TICK),
+        quantize(req.iv, IV_TICK),
+        quantize(req.option_price, PRICE_TICK),
+        quantize(req.r, RATE_TICK),
+        quantize(req.q, RATE_TICK),
+    ))
 
 
 # -------------------------
 # Core compute function
 # -------------------------
-def compute_greeks_from_request(req: GreeksRequest) -> dict:
-    # parse expiry -> time to expiry in years
-    t = parse_expiry_to_years(req.expiry)
+def compute_greeks_from_request(req: GreeksRequest, t: Optional[float] = None) -> dict:
+    # time to expiry in years (batch callers pass it precomputed against one `now`)
+    if t is None:
+        t = parse_expiry_to_years(req.expiry)
     if t <= 0:
         # already expired: return immediate payoff / zeros
         if req.option_type == "CE":
@@ -294,48 +338,122 @@ def compute_greeks_from_request(req: GreeksRequest) -> dict:
 def health():
     try:
         redis_client.ping()
-        return {"status": "ok", "redis": True}
+        return {"status": "ok", "redis": True, "cache": greeks_cache.stats()}
     except Exception:
-        return {"status": "ok", "redis": False}
+        return {"status": "ok", "redis": False, "cache": greeks_cache.stats()}
 
 
 @app.post("/compute")
 def compute(req: GreeksRequest):
     key = greeks_cache_key(req)
-    cached = redis_client.get(key)
+    cached = greeks_cache.get(key)
     if cached:
-        return json.loads(cached)
+        return cached
 
     try:
         out = compute_greeks_from_request(req)
     except Exception as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    redis_client.set(key, json.dumps(out))
-    redis_client.expire(key, CACHE_TTL)
+    greeks_cache.set(key, out)
     return out
 
 
 @app.post("/batch")
-def batch(req: BatchRequest):
+def batch(req: BatchRequest, accept: Optional[str] = Header(None)):
     results = []
-    for r in req.requests:
+    # one clock read and one vectorized subtraction for the whole batch
+    now = time.time()
+    try:
+        ts = expiry_calendar.years_many([r.expiry for r in req.requests], now, TIME_MODE)
+    except ValueError:
+        ts = [None] * len(req.requests)  # fall back to per-request parse / error reporting
+    for r, t in zip(req.requests, ts):
         key = greeks_cache_key(r)
-        cached = redis_client.get(key)
+        cached = greeks_cache.get(key)
         if cached:
-            results.append(json.loads(cached))
+            results.append(cached)
             continue
         try:
-            out = compute_greeks_from_request(r)
+            out = compute_greeks_from_request(r, None if t is None else float(t))
         except Exception as e:
             # include error per-request
             results.append({"error": str(e), "symbol": r.symbol, "strike": r.strike, "expiry": r.expiry})
             continue
-        redis_client.set(key, json.dumps(out))
-        redis_client.expire(key, CACHE_TTL)
+        greeks_cache.set(key, out)
         results.append(out)
 
-    return {"count": len(results), "results": results}
+    return negotiate(accept, {"count": len(results), "results": results})
+
+
+# -------------------------
+# Chain compute (array engine, no per-option pydantic)
+# -------------------------
+def compute_chain_greeks(symbol: str, expiry: str, underlying: float, index: ChainIndex,
+                         start: int, end: int, r: float = 0.06, q: float = 0.0) -> list:
+    """
+    Greeks for every quoted CE/PE in index.strikes[start:end], solved as one
+    array pass. Rows match compute_greeks_from_request output; failed IV solves
+    become per-row errors like /batch.
+    """
+    strikes = np.asarray(index.strikes[start:end], dtype=np.float64)
+    # strike-major CE, PE ordering (same row order as the old per-strike loop)
+    premiums = np.column_stack((index.ce[start:end], index.pe[start:end])).ravel()
+    K = np.repeat(strikes, 2)
+    is_call = np.tile((True, False), strikes.size)
+    quoted = ~np.isnan(premiums)
+    premiums, K, is_call = premiums[quoted], K[quoted], is_call[quoted]
+
+    t = parse_expiry_to_years(expiry)
+    ts = time.time()
+    if t <= 0:
+        sigma = np.zeros_like(K)
+        status = np.zeros(K.shape, dtype=np.int8)
+    else:
+        sigma, status = implied_vol_status(premiums, underlying, K, t, r, q, is_call)
+    g = bs_greeks_array(underlying, K, t, np.nan_to_num(sigma), r, q, is_call)
+
+    # back to python scalars in one go, then zip rows (cheaper than per-element numpy access)
+    cols = {name: arr.tolist() for name, arr in g.items()}
+    ivs = sigma.tolist()
+    statuses = status.tolist()
+    results = []
+    for i, (k, call) in enumerate(zip(K.tolist(), is_call.tolist())):
+        strike = int(k)
+        if statuses[i]:  # no IV for this premium, and why
+            results.append({"error": f"implied vol solve failed: {IV_FAILURES[statuses[i]]}",
+                            "symbol": symbol, "strike": strike, "expiry": expiry})
+            continue
+        d1, d2 = cols["d1"][i], cols["d2"][i]
+        results.append({
+            "symbol": symbol,
+            "strike": strike,
+            "expiry": expiry,
+            "option_type": "CE" if call else "PE",
+            "underlying": underlying,
+            "iv": ivs[i],
+            "theoretical_price": cols["price"][i],
+            "delta": cols["delta"][i],
+            "gamma": cols["gamma"][i],
+            "vega": cols["vega"][i],
+            "theta": cols["theta"][i],
+            "rho": cols["rho"][i],
+            "d1": None if d1 != d1 else d1,
+            "d2": None if d2 != d2 else d2,
+            "timestamp": ts,
+        })
+    return results
+
+
+def parse_chain(raw: str):
+    """Stored chain JSON -> (underlying, ChainIndex, atm). 400 if no underlying LTP."""
+    chain = json.loads(raw)
+    underlying = chain.get("underlying_ltp") or chain.get("underlying") or chain.get("underlyingPrice") or chain.get("underlyingValue")
+    if underlying is None:
+        raise HTTPException(status_code=400, detail="underlying LTP not found in chain")
+    underlying = float(underlying)
+    atm = chain.get("atm")
+    return underlying, ChainIndex.from_chain(chain), float(atm) if atm is not None else underlying
 
 
 # -------------------------
@@ -343,10 +461,10 @@ def batch(req: BatchRequest):
 # This helps integration with option-chain service: it expects the chain already in Redis.
 # -------------------------
 @app.get("/compute_chain/{symbol}/{expiry}")
-def compute_chain(symbol: str, expiry: str, window: int = 0):
+def compute_chain(symbol: str, expiry: str, window: int = 0, accept: Optional[str] = Header(None)):
     """
-    Read option chain stored under key chain:{symbol}:{expiry} and compute greeks batch for relevant strikes.
-    window: +/- number of strikes around ATM to calculate (0 = only ATM if present)
+    Read option chain stored under key chain:{symbol}:{expiry} and compute greeks for relevant strikes.
+    window: +/- number of strikes around ATM to calculate (0 = only ATM)
     Expects chain JSON produced by option-chain-service in Redis under chain:{symbol}:{expiry}.
     """
     key_chain = f"chain:{symbol}:{expiry}"
@@ -354,61 +472,109 @@ def compute_chain(symbol: str, expiry: str, window: int = 0):
     if not raw:
         raise HTTPException(status_code=404, detail="chain not found in redis")
 
-    chain = json.loads(raw)
-    underlying = chain.get("underlying_ltp") or chain.get("underlying") or chain.get("underlyingPrice") or chain.get("underlyingValue")
-    if underlying is None:
-        raise HTTPException(status_code=400, detail="underlying LTP not found in chain")
+    underlying, index, atm = parse_chain(raw)
+    if not len(index):
+        return {"count": 0, "results": []}
+    start, end = index.window(atm, window)
 
-    calls = chain.get("calls", [])
-    puts = chain.get("puts", [])
-    strikes = sorted(list({int(x.get("strikePrice") or x.get("strike") or 0) for x in calls + puts}))
-    # find ATM index
-    atm = chain.get("atm")
-    if atm is None:
-        # fallback to nearest
-        atm = min(strikes, key=lambda s: abs(s - underlying))
+    try:
+        results = compute_chain_greeks(symbol, expiry, underlying, index, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return negotiate(accept, {"count": len(results), "results": results})
 
-    # choose strikes around atm depending on window
-    if window <= 0:
-        chosen = [atm]
-    else:
-        idx = strikes.index(int(atm)) if int(atm) in strikes else None
-        if idx is None:
-            # pick nearest slice
-            strikes_sorted = strikes
-            # find nearest index
-            idx = min(range(len(strikes_sorted)), key=lambda i: abs(strikes_sorted[i] - atm))
-        start = max(0, idx - window)
-        end = min(len(strikes), idx + window + 1)
-        chosen = strikes[start:end]
-
-    # build batch requests
-    batch_reqs = []
-    for s in chosen:
-        # find option market price if present
-        ce_price = None
-        pe_price = None
-        for c in calls:
-            if int(c.get("strikePrice", 0)) == int(s):
-                ce_price = c.get("last_price") or c.get("lastPrice") or c.get("ltp")
-                break
-        for p in puts:
-            if int(p.get("strikePrice", 0)) == int(s):
-                pe_price = p.get("last_price") or p.get("lastPrice") or p.get("ltp")
-                break
-
-        if ce_price is not None:
-            batch_reqs.append(GreeksRequest(
-                symbol=symbol, underlying=underlying, strike=s, expiry=expiry, option_type="CE", option_price=float(ce_price)
-            ))
-        if pe_price is not None:
-            batch_reqs.append(GreeksRequest(
-                symbol=symbol, underlying=underlying, strike=s, expiry=expiry, option_type="PE", option_price=float(pe_price)
-            ))
-
-    # call batch compute
-    batch_request = BatchRequest(requests=batch_reqs)
-    return batch(batch_request)
+
+# -------------------------
+# Portfolio aggregation: net book greeks + spot x vol scenario P&L
+# -------------------------
+@app.post("/portfolio")
+def portfolio(req: PortfolioRequest):
+    """
+    Price every leg in one vectorized batch and return net book greeks,
+    per-underlying totals and a P&L grid of shape [spot_shocks][vol_shocks].
+    Greeks are position-weighted (qty x per-unit greek); theta is annualized.
+    """
+    legs = [leg.model_dump() for leg in req.legs]
+    if not legs:
+        return {"count": 0, "net": {}, "by_underlying": {}, "legs": [], "scenarios": None}
+
+    try:
+        t = expiry_calendar.years_many([leg["expiry"] for leg in legs], time.time(), TIME_MODE)
+        book = build_leg_arrays(legs, req.spots, t, req.r, req.q)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    out = aggregate(book, req.r, req.q)
+    grid = scenario_grid(book, req.spot_shocks, req.vol_shocks, req.r, req.q)
+    out["count"] = len(legs)
+    out["scenarios"] = {
+        "spot_shocks": req.spot_shocks,
+        "vol_shocks": req.vol_shocks,
+        "pnl": grid.tolist(),
+        "worst": float(grid.min()),
+        "best": float(grid.max()),
+    }
+    return out
+
+
+# -------------------------
+# Streaming (SSE): one computation per chain change, fanned out to subscribers
+# -------------------------
+def _stream_compute_for(symbol: str, expiry: str):
+    def compute(raw: str):
+        underlying, index, atm = parse_chain(raw)
+        if not len(index):
+            return [], lambda window: (0, -1)
+        rows = compute_chain_greeks(symbol, expiry, underlying, index, 0, len(index))
+
+        def bounds(window: int):
+            start, end = index.window(atm, window)
+            return index.strikes[start], index.strikes[end - 1]
+        return rows, bounds
+    return compute
+
+
+stream_hub = StreamHub(redis_client.get, _stream_compute_for, poll_seconds=STREAM_POLL_MS / 1000.0)
+
+
+@app.get("/stream/greeks/{symbol}/{expiry}")
+async def stream_greeks(
+    symbol: str,
+    expiry: str,
+    window: int = 10,
+    price_eps: float = DEFAULT_EPSILONS["theoretical_price"],
+    iv_eps: float = DEFAULT_EPSILONS["iv"],
+    delta_eps: float = DEFAULT_EPSILONS["delta"],
+    gamma_eps: float = DEFAULT_EPSILONS["gamma"],
+    vega_eps: float = DEFAULT_EPSILONS["vega"],
+    theta_eps: float = DEFAULT_EPSILONS["theta"],
+):
+    """
+    Server-sent events for chain:{symbol}:{expiry}, +/- window strikes around ATM.
+    First event carries every row in the window; later events only rows that
+    moved beyond the *_eps thresholds, plus [strike, option_type] pairs that
+    left the window under "removed".
+    """
+    eps = {
+        "theoretical_price": price_eps, "iv": iv_eps, "delta": delta_eps,
+        "gamma": gamma_eps, "vega": vega_eps, "theta": theta_eps,
+    }
+    stream, sub = stream_hub.subscribe(symbol, expiry, window, eps)
+
+    async def generator():
+        try:
+            while True:
+                update = await sub.next_update()
+                yield f"data: {json.dumps(update)}\n\n"
+        finally:
+            stream_hub.unsubscribe(stream, sub)
+
+    return StreamingResponse(generator(), media_type="text/event-stream")
+
+
+@app.get("/stream/stats")
+def stream_stats():
+    return stream_hub.stats()
 
 
 # -------------------------
@@ -0,0 +1,96 @@
+# portfolio.py - book-level greeks and spot x vol scenario P&L
+# All legs are priced in one vectorized batch; the scenario grid is a single
+# broadcast over (spot shock, vol shock, leg) using the array engine.
+# qty is signed units (+ long, - short), already multiplied by lot size.
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from yoki_shared.greeks_array import bs_greeks_array, bs_price_array, implied_vol_array
+
+GREEKS = ("delta", "gamma", "vega", "theta", "rho")
+
+
+class LegArrays:
+    """Columnar view of the book (one element per leg)."""
+
+    def __init__(self, underlyings: List[str], spot, strike, t, sigma, qty, is_call, price0):
+        self.underlyings = underlyings
+        self.spot = spot
+        self.strike = strike
+        self.t = t
+        self.sigma = sigma
+        self.qty = qty
+        self.is_call = is_call
+        self.price0 = price0
+
+
+def build_leg_arrays(legs: Sequence[dict], spots: Dict[str, float], t: np.ndarray, r: float, q: float) -> LegArrays:
+    """
+    legs: dicts with underlying, strike, option_type, qty and iv or option_price.
+    Raises ValueError naming the offending legs (missing spot / IV unsolvable).
+    """
+    underlyings = [leg["underlying"] for leg in legs]
+    missing = sorted({u for u in underlyings if u not in spots})
+    if missing:
+        raise ValueError(f"spot missing for: {', '.join(missing)}")
+
+    spot = np.array([spots[u] for u in underlyings], dtype=np.float64)
+    strike = np.array([leg["strike"] for leg in legs], dtype=np.float64)
+    qty = np.array([leg["qty"] for leg in legs], dtype=np.float64)
+    is_call = np.array([leg["option_type"] == "CE" for leg in legs])
+    iv_in = np.array([np.nan if leg.get("iv") is None else leg["iv"] for leg in legs], dtype=np.float64)
+    px_in = np.array([np.nan if leg.get("option_price") is None else leg["option_price"] for leg in legs], dtype=np.float64)
+
+    need = np.isnan(iv_in)
+    no_input = need & np.isnan(px_in)
+    if no_input.any():
+        raise ValueError(f"legs {np.flatnonzero(no_input).tolist()}: either iv or option_price must be provided")
+    sigma = iv_in.copy()
+    if need.any():
+        sigma[need] = implied_vol_array(px_in[need], spot[need], strike[need], t[need], r, q, is_call[need])
+        # expired legs have no IV but a well-defined payoff: price them at zero vol
+        sigma[need & (t <= 0)] = 0.0
+        failed = np.isnan(sigma)
+        if failed.any():
+            raise ValueError(f"legs {np.flatnonzero(failed).tolist()}: implied vol solve failed")
+
+    price0 = bs_price_array(spot, strike, t, sigma, r, q, is_call)
+    return LegArrays(underlyings, spot, strike, t, sigma, qty, is_call, price0)
+
+
+def aggregate(book: LegArrays, r: float, q: float) -> dict:
+    """Per-leg greeks, net book totals and per-underlying totals."""
+    g = bs_greeks_array(book.spot, book.strike, book.t, book.sigma, r, q, book.is_call)
+    names, code = np.unique(np.asarray(book.underlyings), return_inverse=True)
+    names = names.tolist()
+
+    per_leg = {name: g[name] * book.qty for name in GREEKS}
+    value = book.price0 * book.qty
+    net = {name: float(per_leg[name].sum()) for name in GREEKS}
+    net["value"] = float(value.sum())
+
+    sums = {name: np.bincount(code, weights=per_leg[name], minlength=len(names)) for name in GREEKS}
+    sums["value"] = np.bincount(code, weights=value, minlength=len(names))
+    by_underlying = {u: {name: float(col[i]) for name, col in sums.items()} for i, u in enumerate(names)}
+
+    legs = [
+        {"iv": float(book.sigma[i]), "price": float(book.price0[i]), **{name: float(per_leg[name][i]) for name in GREEKS}}
+        for i in range(len(book.underlyings))
+    ]
+    return {"net": net, "by_underlying": by_underlying, "legs": legs}
+
+
+def scenario_grid(book: LegArrays, spot_shocks: Sequence[float], vol_shocks: Sequence[float], r: float, q: float) -> np.ndarray:
+    """
+    Book P&L for every (relative spot shock, absolute vol shock) pair:
+    shape (len(spot_shocks), len(vol_shocks)), one broadcast pricing call.
+    Spot shocks apply to each leg's own underlying; shocked vol is floored at 1e-4.
+    """
+    ds = np.asarray(spot_shocks, dtype=np.float64)[:, None, None]
+    dv = np.asarray(vol_shocks, dtype=np.float64)[None, :, None]
+    S = book.spot[None, None, :] * (1.0 + ds)
+    sigma = np.maximum(book.sigma[None, None, :] + dv, 1e-4)
+    prices = bs_price_array(S, book.strike, book.t, sigma, r, q, book.is_call)
+    return ((prices - book.price0) * book.qty).sum(axis=-1)
@@ -0,0 +1,161 @@
+# streaming.py - push greeks to subscribers instead of having them poll
+# One ChainStream per (symbol, expiry) watches chain:{symbol}:{expiry} in Redis.
+# When the stored chain changes it is computed ONCE, then every subscriber gets
+# only the rows inside its strike window whose values moved beyond its epsilons.
+# Slow subscribers never block the producer: pending changes are coalesced
+# per (strike, option_type) until the subscriber drains them.
+
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("greeks-stream")
+
+RowKey = Tuple[int, str]  # (strike, option_type)
+
+DEFAULT_EPSILONS = {
+    "theoretical_price": 0.05,
+    "iv": 0.0005,
+    "delta": 0.001,
+    "gamma": 1e-6,
+    "vega": 0.5,
+    "theta": 1.0,
+}
+
+
+def _row_key(row: dict) -> RowKey:
+    return int(row["strike"]), row.get("option_type", "")
+
+
+def row_changed(old: Optional[dict], new: dict, eps: Dict[str, float]) -> bool:
+    if old is None or ("error" in old) != ("error" in new):
+        return True
+    if "error" in new:
+        return old["error"] != new["error"]
+    for field, tol in eps.items():
+        a, b = old.get(field), new.get(field)
+        if a is None or b is None:
+            if a is not b:
+                return True
+        elif abs(a - b) > tol:
+            return True
+    return False
+
+
+class Subscriber:
+    def __init__(self, window: int, eps: Dict[str, float]):
+        self.window = window
+        self.eps = eps
+        self.sent: Dict[RowKey, dict] = {}     # last value handed to this client
+        self.pending: Dict[RowKey, dict] = {}  # changed rows not yet drained
+        self.removed: set = set()              # keys that left the window
+        self.meta: dict = {}
+        self.event = asyncio.Event()
+
+    def offer(self, rows: List[dict], meta: dict) -> None:
+        in_window = {}
+        for row in rows:
+            key = _row_key(row)
+            in_window[key] = row
+            if row_changed(self.sent.get(key), row, self.eps):
+                self.sent[key] = row
+                self.pending[key] = row
+                self.removed.discard(key)
+        for key in [k for k in self.sent if k not in in_window]:
+            del self.sent[key]
+            self.pending.pop(key, None)
+            self.removed.add(key)
+        self.meta = meta
+        if self.pending or self.removed:
+            self.event.set()
+
+    async def next_update(self) -> dict:
+        await self.event.wait()
+        self.event.clear()
+        rows, self.pending = list(self.pending.values()), {}
+        removed, self.removed = sorted(self.removed), set()
+        return {**self.meta, "rows": rows, "removed": [list(k) for k in removed]}
+
+
+class ChainStream:
+    """
+    compute(raw_chain_json) -> (rows, window_bounds) where window_bounds(window)
+    returns the inclusive (low_strike, high_strike) of a +/- window around ATM.
+    """
+
+    def __init__(self, symbol: str, expiry: str, fetch: Callable[[str], Optional[str]],
+                 compute: Callable, poll_seconds: float):
+        self.symbol = symbol
+        self.expiry = expiry
+        self.key = f"chain:{symbol}:{expiry}"
+        self._fetch = fetch
+        self._compute = compute
+        self.poll_seconds = poll_seconds
+        self.subscribers: set = set()
+        self.task: Optional[asyncio.Task] = None
+        self.seq = 0
+        self.computations = 0
+        self._last_raw: Optional[str] = None
+        self._latest: Optional[tuple] = None
+
+    def _publish(self, sub: Subscriber) -> None:
+        rows, bounds = self._latest
+        lo, hi = bounds(sub.window)
+        sub.offer(
+            [r for r in rows if lo <= r["strike"] <= hi],
+            {"symbol": self.symbol, "expiry": self.expiry, "seq": self.seq},
+        )
+
+    def add(self, sub: Subscriber) -> None:
+        self.subscribers.add(sub)
+        if self._latest is not None:
+            self._publish(sub)
+
+    async def run(self) -> None:
+        while self.subscribers:
+            try:
+                raw = await asyncio.to_thread(self._fetch, self.key)
+                if raw and raw != self._last_raw:
+                    self._last_raw = raw
+                    # full-chain greeks: off the event loop like the fetch
+                    self._latest = await asyncio.to_thread(self._compute, raw)
+                    self.seq += 1
+                    self.computations += 1
+                    for sub in list(self.subscribers):
+                        self._publish(sub)
+            except Exception as e:  # keep streaming through a bad chain / Redis blip
+                logger.warning("stream %s update failed: %s", self.key, e)
+            await asyncio.sleep(self.poll_seconds)
+
+
+class StreamHub:
+    def __init__(self, fetch: Callable[[str], Optional[str]], compute_for: Callable[[str, str], Callable],
+                 poll_seconds: float = 0.25):
+        self._fetch = fetch
+        self._compute_for = compute_for
+        self.poll_seconds = poll_seconds
+        self.streams: Dict[Tuple[str, str], ChainStream] = {}
+
+    def subscribe(self, symbol: str, expiry: str, window: int, eps: Dict[str, float]) -> Tuple[ChainStream, Subscriber]:
+        key = (symbol, expiry)
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = ChainStream(symbol, expiry, self._fetch, self._compute_for(symbol, expiry), self.poll_seconds)
+        sub = Subscriber(window, eps)
+        stream.add(sub)
+        if stream.task is None or stream.task.done():
+            stream.task = asyncio.create_task(stream.run())
+        return stream, sub
+
+    def unsubscribe(self, stream: ChainStream, sub: Subscriber) -> None:
+        stream.subscribers.discard(sub)
+        if not stream.subscribers:
+            if stream.task is not None:
+                stream.task.cancel()
+            self.streams.pop((stream.symbol, stream.expiry), None)
+
+    def stats(self) -> dict:
+        return {
+            f"{s.symbol}:{s.expiry}": {"subscribers": len(s.subscribers), "computations": s.computations, "seq": s.seq}
+            for s in self.streams.values()
+        }
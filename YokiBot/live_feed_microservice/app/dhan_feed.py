@@ -46,8 +46,16 @@ class DhanFeed:
                                 # Type 2 = Ticker Packet (16 bytes)
                                 if msg_type == 2:
                                     header = struct.unpack('<BHBIfI', data[0:16])
-                                    ltp = header[4]
-                                    await self.redis.set("live:last_packet_ts", time.time())
+                                    security_id, ltp = header[3], header[4]
+                                    now = time.time()
+                                    # one round trip: heartbeat, latest LTP per security id (index
+                                    # spot for optionchain-service) and the tick on live:ticks
+                                    # (signal-engine indicators)
+                                    pipe = self.redis.pipeline(transaction=False)
+                                    pipe.set("live:last_packet_ts", now)
+                                    pipe.hset("live:ltp", str(security_id), ltp)
+                                    pipe.publish("live:ticks", json.dumps({"security_id": str(security_id), "ltp": ltp, "ts": now}))
+                                    await pipe.execute()
                                     logger.info(f"⚡ Tick: {ltp:.2f}")
 
                         except websockets.exceptions.ConnectionClosed:
@@ -5,8 +5,10 @@ Pure-Python Greeks microservice (no SciPy).
 - Normal PDF/CDF using math.erf
 - Implied volatility via bisection root finding
 - Computes delta, gamma, theta, vega, rho
-- Optional Kafka consumer to receive marketfeed messages (if KAFKA_BOOTSTRAP set)
-- FastAPI endpoints: /iv, /greeks, /surface
+- Optional Kafka consumer to receive marketfeed messages (if KAFKA_BOOTSTRAP set),
+  batched via getmany() with manual offset commits
+- Live IV surface per (underlying, expiry) built from the Kafka quotes (vol_surface.py)
+- FastAPI endpoints: /iv, /greeks, /surface, /stats/*, /metrics
 Compatible with Python 3.10+ (including 3.12)
 """
 
@@ -19,24 +21,50 @@ from typing import Dict, Any, Tuple, Optional
 from collections import defaultdict
 
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from yoki_shared.expiry_calendar import calendar as expiry_calendar
+
+from app.instrument_map import load_instruments, resolve
+from vol_surface import SurfaceEngine
+from surface_scheduler import SurfaceScheduler
 
 # Optional Kafka consumer. If you don't use Kafka, set KAFKA_BOOTSTRAP empty.
 KAFKA_BOOTSTRAP = os.getenv("KAFKA_BOOTSTRAP", "")
 KAFKA_TOPIC = os.getenv("KAFKA_TOPIC", "marketfeed")
 KAFKA_GROUP = os.getenv("KAFKA_GROUP", "greeks_group")
+KAFKA_MAX_RECORDS = int(os.getenv("KAFKA_MAX_RECORDS", "2000"))      # per getmany() batch
+KAFKA_BATCH_TIMEOUT_MS = int(os.getenv("KAFKA_BATCH_TIMEOUT_MS", "50"))
+
+# Scrip master used to map option security_id -> (underlying, expiry, strike, type)
+SCRIP_MASTER_PATH = os.getenv("SCRIP_MASTER_PATH", "api-scrip-master-detailed.csv")
+# Index security_ids whose ticks carry the underlying spot ("sec_id:SYMBOL,...")
+UNDERLYING_SECURITY_IDS = {
+    int(sid): sym
+    for sid, sym in (p.split(":", 1) for p in os.getenv("UNDERLYING_SECURITY_IDS", "13:NIFTY,25:BANKNIFTY").split(",") if ":" in p)
+}
+# Year-fraction basis for T: "calendar" (365 x 24h) or "trading" (NSE sessions)
+TIME_MODE = os.getenv("GREEKS_TIME_MODE", "calendar")
+SURFACE_RATE = float(os.getenv("SURFACE_RATE", "0.06"))
+SURFACE_SPOT_TOLERANCE = float(os.getenv("SURFACE_SPOT_TOLERANCE", "0.001"))  # relative spot move forcing full re-solve
+SURFACE_DEBOUNCE_MS = float(os.getenv("SURFACE_DEBOUNCE_MS", "500"))        # quiet window before a slice refits
+SURFACE_MAX_LATENCY_MS = float(os.getenv("SURFACE_MAX_LATENCY_MS", "2000"))  # refit deadline under a continuous stream
 
 try:
     from aiokafka import AIOKafkaConsumer
 except Exception:
     AIOKafkaConsumer = None  # kafka optional
 
+try:
+    import orjson
+    _json_loads = orjson.loads  # accepts bytes directly, no .decode()
+except Exception:
+    _json_loads = json.loads
+
 app = FastAPI(title="Greeks Service (pure-Python)")
 
-# in-memory caches / placeholders
-_latest_quotes: Dict[int, Dict[str, Any]] = {}         # security_id -> latest payload
-_surface_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}   # (underlying, expiry) -> surface info
-_debounce_tasks: Dict[str, asyncio.Task] = {}
-_DEBOUNCE_MS = 500  # debounce window
+# in-memory caches
+_latest_quotes: Dict[int, "Quote"] = {}         # security_id -> latest compact quote
 
 # -------------------------
 # Normal distribution utils
@@ -74,7 +102,10 @@ def bs_price(S: float, K: float, T: float, r: float, sigma: float, opt_type: str
 
 
 def compute_greeks(S: float, K: float, T: float, r: float, sigma: float, opt_type: str = "CE") -> Dict[str, Optional[float]]:
-    """Return delta,gamma,theta,vega,rho. Theta is per-day (approx) and vega per 1 vol point."""
+    """
+    Return delta,gamma,theta,vega,rho. Theta is per day in the TIME_MODE basis
+    (calendar day or trading session, matching T) and vega per 1 vol point.
+    """
     if sigma is None or sigma <= 0 or T <= 0:
         return {"delta": None, "gamma": None, "theta": None, "vega": None, "rho": None}
     sqrtT = math.sqrt(T)
@@ -91,8 +122,8 @@ def compute_greeks(S: float, K: float, T: float, r: float, sigma: float, opt_typ
         rho = -K * T * math.exp(-r * T) * norm_cdf(-d2)
     gamma = pdf_d1 / (S * sigma * sqrtT)
     vega = S * pdf_d1 * sqrtT
-    # standardize theta to per-day
-    theta_per_day = theta / 365.0
+    # per day on the same year basis as T
+    theta_per_day = theta / expiry_calendar.days_per_year(TIME_MODE)
     return {
         "delta": float(delta),
         "gamma": float(gamma),
@@ -154,25 +185,89 @@ def implied_vol_bisect(mid_price: float, S: float, K: float, T: float, r: float
 
 
 # -------------------------
-# Debounce + (placeholder) recompute
+# Live surface
 # -------------------------
-def schedule_recompute(key: str):
-    # cancel existing and schedule a new one
-    loop = asyncio.get_event_loop()
-    if key in _debounce_tasks:
-        t = _debounce_tasks[key]
-        if not t.done():
-            t.cancel()
-    _debounce_tasks[key] = loop.create_task(_debounced_recompute(key))
+_surface_engine = SurfaceEngine(
+    implied_vol_bisect,
+    r=SURFACE_RATE,
+    spot_tolerance=SURFACE_SPOT_TOLERANCE,
+    years_to_expiry=lambda expiry: expiry_calendar.years(expiry, mode=TIME_MODE),
+)
+
 
+class Quote:
+    """Compact per-instrument record: only what the IV/greeks math reads."""
+    __slots__ = ("ltp", "bid", "ask", "ts")
 
-async def _debounced_recompute(key: str):
+    def __init__(self, ltp: Optional[float], bid: Optional[float], ask: Optional[float], ts: float):
+        self.ltp = ltp
+        self.bid = bid
+        self.ask = ask
+        self.ts = ts
+
+    @property
+    def price(self) -> Optional[float]:
+        """Mid when both sides are quoted, else last traded price."""
+        if self.bid and self.ask and self.ask >= self.bid > 0:
+            return 0.5 * (self.bid + self.ask)
+        return self.ltp
+
+
+def _decode_quote(raw: bytes) -> Optional[Tuple[int, Quote]]:
+    """
+    Kafka message value -> (security_id, Quote); None when unusable (bad
+    JSON, not an object, no numeric security id or non-numeric prices).
+    """
     try:
-        await asyncio.sleep(_DEBOUNCE_MS / 1000.0)
-    except asyncio.CancelledError:
+        payload = _json_loads(raw)
+        header = payload.get("header", {})
+        sec_id = int(header.get("sec_id") or header.get("security_id"))
+        body = payload.get("data", payload)
+        bid = body.get("bid") or body.get("best_bid_price")
+        ask = body.get("ask") or body.get("best_ask_price")
+        ltp = body.get("ltp") or body.get("last_price") or body.get("last_traded_price")
+        return sec_id, Quote(
+            float(ltp) if ltp else None,
+            float(bid) if bid else None,
+            float(ask) if ask else None,
+            time.time(),
+        )
+    except Exception:
+        return None
+
+
+def _ingest_quote(sec_id: int, quote: Quote) -> None:
+    price = quote.price
+    if not price:
+        return
+    underlying = UNDERLYING_SECURITY_IDS.get(sec_id)
+    if underlying is not None:
+        _surface_engine.update_spot(underlying, price)
         return
-    # placeholder: build a trivial surface entry with timestamp
-    _surface_cache[(key, "latest")] = {"updated_ts": int(time.time() * 1000), "notes": "recomputed (placeholder)"}
+    inst = resolve(str(sec_id))
+    if inst:
+        _surface_engine.update_quote(inst["symbol"], inst["expiry"], float(inst["strike"]), inst["option_type"], price)
+
+
+def _slices_for_sec(sec_id: Any):
+    """Surface slices affected by a tick of sec_id (index ticks move every slice of that underlying)."""
+    underlying = UNDERLYING_SECURITY_IDS.get(sec_id)
+    if underlying is not None:
+        return _surface_engine.slices_for(underlying)
+    inst = resolve(str(sec_id))
+    return [(inst["symbol"], inst["expiry"])] if inst else []
+
+
+# -------------------------
+# Coalesced recompute: one timer per (underlying, expiry), batched per slice
+# -------------------------
+_scheduler = SurfaceScheduler(
+    slices_for=_slices_for_sec,
+    recompute=lambda key, _dirty: _surface_engine.recompute(*key),
+    debounce_ms=SURFACE_DEBOUNCE_MS,
+    max_latency_ms=SURFACE_MAX_LATENCY_MS,
+    cacheable=lambda sec_id: sec_id not in UNDERLYING_SECURITY_IDS,
+)
 
 
 # -------------------------
@@ -181,34 +276,97 @@ async def _debounced_recompute(key: str):
 consumer = None
 
 
+class ConsumerStats:
+    """Throughput / lag counters for the batched Kafka loop."""
+
+    def __init__(self):
+        self.messages = 0
+        self.decode_errors = 0
+        self.batches = 0
+        self.commits = 0
+        self.last_batch_size = 0
+        self.msgs_per_sec = 0.0
+        self.lag: Dict[str, int] = {}  # "topic:partition" -> highwater - next offset
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def record_batch(self, size: int) -> None:
+        self.batches += 1
+        self.messages += size
+        self.last_batch_size = size
+        self._window_count += size
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.msgs_per_sec = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "decode_errors": self.decode_errors,
+            "batches": self.batches,
+            "commits": self.commits,
+            "last_batch_size": self.last_batch_size,
+            "msgs_per_sec": self.msgs_per_sec,
+            "lag_total": sum(self.lag.values()),
+            "lag": dict(self.lag),
+        }
+
+
+_consumer_stats = ConsumerStats()
+
+
 async def start_kafka_consumer():
     global consumer
     if not KAFKA_BOOTSTRAP or AIOKafkaConsumer is None:
         return
-    consumer = AIOKafkaConsumer(KAFKA_TOPIC, bootstrap_servers=KAFKA_BOOTSTRAP, group_id=KAFKA_GROUP)
+    # offsets are committed manually, after a whole batch has been applied
+    consumer = AIOKafkaConsumer(
+        KAFKA_TOPIC,
+        bootstrap_servers=KAFKA_BOOTSTRAP,
+        group_id=KAFKA_GROUP,
+        enable_auto_commit=False,
+    )
     await consumer.start()
     asyncio.create_task(kafka_loop())
 
 
+def _apply_batch(messages) -> int:
+    """Decode + ingest one partition's messages. Returns how many were usable."""
+    ok = 0
+    for msg in messages:
+        decoded = _decode_quote(msg.value)
+        if decoded is None:
+            _consumer_stats.decode_errors += 1
+            continue
+        sec_id, quote = decoded
+        _latest_quotes[sec_id] = quote
+        _ingest_quote(sec_id, quote)
+        # coalesced per (underlying, expiry) slice
+        _scheduler.mark(sec_id)
+        ok += 1
+    return ok
+
+
 async def kafka_loop():
     global consumer
     try:
-        async for msg in consumer:
-            # decode
-            try:
-                payload = json.loads(msg.value.decode())
-            except Exception:
+        while True:
+            batches = await consumer.getmany(timeout_ms=KAFKA_BATCH_TIMEOUT_MS, max_records=KAFKA_MAX_RECORDS)
+            if not batches:
                 continue
-            header = payload.get("header", {})
-            sec_id = header.get("sec_id") or header.get("security_id")
-            if sec_id:
-                try:
-                    sec_id = int(sec_id)
-                except Exception:
-                    pass
-            _latest_quotes[sec_id] = payload
-            # trigger recompute keyed by sec_id (or map to underlying later)
-            schedule_recompute(f"SEC:{sec_id}")
+            size = 0
+            for tp, messages in batches.items():
+                _apply_batch(messages)
+                size += len(messages)
+                highwater = consumer.highwater(tp)
+                if highwater is not None:
+                    _consumer_stats.lag[f"{tp.topic}:{tp.partition}"] = max(0, highwater - (messages[-1].offset + 1))
+            await consumer.commit()
+            _consumer_stats.commits += 1
+            _consumer_stats.record_batch(size)
     finally:
         if consumer:
             await consumer.stop()
@@ -218,12 +376,60 @@ async def kafka_loop():
 # FastAPI endpoints
 # -------------------------
 @app.get("/surface")
-async def get_surface(underlying: str, expiry: Optional[str] = None):
-    key = (underlying, expiry or "latest")
-    val = _surface_cache.get(key)
-    if not val:
+async def get_surface(
+    underlying: str,
+    expiry: Optional[str] = None,
+    strike: Optional[float] = Query(None, description="Interpolate IV at this strike"),
+    moneyness: Optional[float] = Query(None, description="Interpolate IV at log-moneyness ln(K/S)"),
+):
+    """
+    Fitted smile for (underlying, expiry); nearest expiry when expiry is omitted.
+    Pass strike or moneyness to get an interpolated IV alongside the arrays.
+    """
+    sl = _surface_engine.get(underlying, expiry)
+    if sl is None:
         raise HTTPException(status_code=404, detail="surface not available")
-    return val
+    out = dict(sl.surface)
+    if strike is not None or moneyness is not None:
+        if strike is not None and strike <= 0:
+            raise HTTPException(status_code=400, detail="strike must be positive")
+        out["interpolated"] = {
+            "strike": strike,
+            "moneyness": moneyness,
+            "iv": _surface_engine.interpolate(sl, strike=strike, moneyness=moneyness),
+        }
+    return out
+
+
+@app.get("/stats/consumer")
+async def consumer_stats():
+    """Kafka consumer throughput, batch size and per-partition lag."""
+    return _consumer_stats.snapshot()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the consumer and scheduler counters."""
+    c = _consumer_stats.snapshot()
+    lines = [
+        f"greeks_kafka_messages_total {c['messages']}",
+        f"greeks_kafka_decode_errors_total {c['decode_errors']}",
+        f"greeks_kafka_batches_total {c['batches']}",
+        f"greeks_kafka_messages_per_second {c['msgs_per_sec']}",
+        f"greeks_kafka_consumer_lag_total {c['lag_total']}",
+    ]
+    for tp, lag in c["lag"].items():
+        topic, partition = tp.rsplit(":", 1)
+        lines.append(f'greeks_kafka_consumer_lag{{topic="{topic}",partition="{partition}"}} {lag}')
+    for name, value in _scheduler.stats().items():
+        lines.append(f"greeks_surface_scheduler_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/stats/scheduler")
+async def scheduler_stats():
+    """Timer churn, batching and scheduling lag of the surface recompute scheduler."""
+    return _scheduler.stats()
 
 
 @app.get("/iv")
@@ -237,13 +443,11 @@ async def endpoint_iv(
 ):
     """
     Compute implied vol using bisection. Requires spot and mid.
-    expiry must be parseable to YYYY-MM-DD.
+    expiry: YYYY-MM-DD (settles 15:30 IST) or ISO datetime.
     """
     try:
-        from datetime import datetime
-        exp_dt = datetime.strptime(expiry, "%Y-%m-%d")
-        T = max(0.0, (exp_dt - datetime.utcnow()).total_seconds() / (365.0 * 24 * 3600))
-    except Exception as e:
+        T = expiry_calendar.years(expiry, mode=TIME_MODE)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=f"expiry parse error: {e}")
 
     iv = implied_vol_bisect(mid_price=mid, S=spot, K=strike, T=T, r=r, opt_type=opt_type)
@@ -262,10 +466,8 @@ async def endpoint_greeks(
     r: float = Query(0.06),
 ):
     try:
-        from datetime import datetime
-        exp_dt = datetime.strptime(expiry, "%Y-%m-%d")
-        T = max(0.0, (exp_dt - datetime.utcnow()).total_seconds() / (365.0 * 24 * 3600))
-    except Exception as e:
+        T = expiry_calendar.years(expiry, mode=TIME_MODE)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=f"expiry parse error: {e}")
     g = compute_greeks(spot, strike, T, r, iv, opt_type)
     return {"greeks": g, "T": T}
@@ -276,6 +478,8 @@ async def endpoint_greeks(
 # -------------------------
 @app.on_event("startup")
 async def startup():
+    if os.path.exists(SCRIP_MASTER_PATH):
+        load_instruments(SCRIP_MASTER_PATH)
     # start kafka consumer if available
     if AIOKafkaConsumer and KAFKA_BOOTSTRAP:
         asyncio.create_task(start_kafka_consumer())
@@ -284,5 +488,6 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown():
     global consumer
+    _scheduler.cancel_all()
     if consumer:
         await consumer.stop()
@@ -26,9 +26,11 @@ from typing import Dict, Any, List
 import httpx
 import pandas as pd
 import redis
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from pydantic import RootModel
 
+from yoki_shared.fast_response import ORJSONResponse, negotiate
+
 # -----------------------
 # DHAN CONFIG
 # -----------------------
@@ -51,7 +53,7 @@ REDIS = redis.Redis(
 # -----------------------
 # FASTAPI
 # -----------------------
-app = FastAPI(title="DhanHQ Core API (Hybrid Safe)")
+app = FastAPI(title="DhanHQ Core API (Hybrid Safe)", default_response_class=ORJSONResponse)
 
 headers = {
     "accept": "application/json",
@@ -64,6 +66,8 @@ headers = {
 # CACHE
 # -----------------------
 _scrip_cache = {"timestamp": 0.0, "df": None, "ttl": 3600.0}
+# (symbol, expiry filter, limit, scrip timestamp) -> (contract records, security ids by segment)
+_contracts_cache: Dict[tuple, tuple] = {}
 
 
 class InstrumentsPayload(RootModel):
@@ -174,9 +178,18 @@ async def quote(payload: InstrumentsPayload):
 # =========================
 # OPTION CHAIN (REST TRUTH)
 # =========================
-@app.get("/option_chain")
-async def option_chain(symbol: str, expiry: str | None = None, limit: int = 200):
+def _option_contracts(symbol: str, expiry: str | None, limit: int):
+    """
+    Filtered, sorted contract records for the chain plus security ids per
+    segment. The scrip master only changes on reload, so the pandas work runs
+    once per (symbol, expiry, limit) per load.
+    """
     df = load_scrip_master()
+    key = (symbol.upper(), expiry, limit, _scrip_cache["timestamp"])
+    cached = _contracts_cache.get(key)
+    if cached is not None:
+        return cached
+
     df.columns = [c.upper() for c in df.columns]
 
     if "UNDERLYING_SYMBOL" not in df.columns:
@@ -184,14 +197,14 @@ async def option_chain(symbol: str, expiry: str | None = None, limit: int = 200)
 
     df_u = df[df["UNDERLYING_SYMBOL"].astype(str).str.upper() == symbol.upper()]
     if df_u.empty:
-        return {"error": f"No contracts for {symbol}"}
+        return {"error": f"No contracts for {symbol}"}, None
 
     if expiry:
         df_u = df_u[df_u["SM_EXPIRY_DATE"].astype(str).str.contains(expiry, na=False)]
 
     df_u = df_u[df_u.get("OPTION_TYPE", "").isin(["CE", "PE"])]
     if df_u.empty:
-        return {"error": "No option contracts"}
+        return {"error": "No option contracts"}, None
 
     df_u["STRIKE_PRICE"] = pd.to_numeric(df_u["STRIKE_PRICE"], errors="coerce")
     df_u = df_u.sort_values(["SM_EXPIRY_DATE", "STRIKE_PRICE", "OPTION_TYPE"]).head(limit)
@@ -202,6 +215,19 @@ async def option_chain(symbol: str, expiry: str | None = None, limit: int = 200)
         if ids:
             grouped: Dict[str, List[int]] = {}
 
+    if any(k[3] != key[3] for k in _contracts_cache):
+        _contracts_cache.clear()  # scrip master reloaded
+    _contracts_cache[key] = df_u.to_dict(orient="records"), grouped
+    return _contracts_cache[key]
+
+
+@app.get("/option_chain")
+async def option_chain(symbol: str, expiry: str | None = None, limit: int = 200,
+                       accept: str | None = Header(None)):
+    contracts, grouped = _option_contracts(symbol, expiry, limit)
+    if grouped is None:
+        return contracts  # error payload
+
     quotes: Dict[str, Any] = {}
     async with httpx.AsyncClient(timeout=40) as c:
         for seg, ids in grouped.items():
@@ -216,10 +242,10 @@ async def option_chain(symbol: str, expiry: str | None = None, limit: int = 200)
                     seg_data.update(r.json().get("data", {}).get(seg, {}))
             quotes[seg] = seg_data
 
-    return {
+    return negotiate(accept, {
         "symbol": symbol,
         "expiry_filter": expiry,
-        "count": len(df_u),
-        "contracts": df_u.to_dict(orient="records"),
+        "count": len(contracts),
+        "contracts": contracts,
         "quotes": quotes,
-    }
+    })
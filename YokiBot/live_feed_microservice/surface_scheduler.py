@@ -0,0 +1,130 @@
+# surface_scheduler.py
+"""
+Coalescing recompute scheduler for the live IV surface.
+- security_id -> (underlying, expiry) slice keys, resolved once and memoised
+- One pending entry + one loop timer per slice (no Task per tick)
+- A slice fires when it has been quiet for the debounce window, or when its
+  oldest pending tick hits the max-latency deadline, whichever comes first
+- Every fire recomputes the slice once for all ticks batched since the last one
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+SliceKey = Tuple[str, str]  # (underlying, expiry)
+
+
+class _Pending:
+    __slots__ = ("first", "last", "dirty", "handle")
+
+    def __init__(self, now: float):
+        self.first = now
+        self.last = now
+        self.dirty: Set[Hashable] = set()
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class SurfaceScheduler:
+    """
+    slices_for(sec_id) -> slice keys affected by a tick of sec_id
+    recompute(slice_key, dirty_sec_ids) -> runs the batched recompute (sync)
+    cacheable(sec_id) -> whether slices_for(sec_id) may be memoised (option
+    contracts map to a fixed slice; index ticks fan out to a growing set)
+    """
+
+    def __init__(
+        self,
+        slices_for: Callable[[Hashable], Iterable[SliceKey]],
+        recompute: Callable[[SliceKey, Set[Hashable]], None],
+        debounce_ms: float = 500,
+        max_latency_ms: float = 2000,
+        cacheable: Callable[[Hashable], bool] = lambda sec_id: True,
+    ):
+        self._slices_for = slices_for
+        self._recompute = recompute
+        self._cacheable = cacheable
+        self.debounce = debounce_ms / 1000.0
+        self.max_latency = max_latency_ms / 1000.0
+        self._sec_map: Dict[Hashable, List[SliceKey]] = {}
+        self._pending: Dict[SliceKey, _Pending] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # metrics
+        self.ticks = 0
+        self.timers_armed = 0
+        self.recomputes = 0
+        self.batched_ticks = 0
+        self.lag_max = 0.0      # seconds a timer fired past its due time
+        self.lag_total = 0.0
+        self.latency_max = 0.0  # seconds from first pending tick to recompute
+        self.recompute_seconds = 0.0
+
+    def _keys(self, sec_id: Hashable) -> List[SliceKey]:
+        keys = self._sec_map.get(sec_id)
+        if keys is None:
+            keys = list(self._slices_for(sec_id))
+            if keys and self._cacheable(sec_id):
+                self._sec_map[sec_id] = keys
+        return keys
+
+    def mark(self, sec_id: Hashable) -> None:
+        """Record a tick. O(slices touched); never creates or cancels a Task."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self.ticks += 1
+        now = self._loop.time()
+        for key in self._keys(sec_id):
+            p = self._pending.get(key)
+            if p is None:
+                p = self._pending[key] = _Pending(now)
+                p.handle = self._loop.call_at(now + self.debounce, self._fire, key)
+                self.timers_armed += 1
+            p.last = now
+            p.dirty.add(sec_id)
+
+    def _due(self, p: _Pending) -> float:
+        return min(p.last + self.debounce, p.first + self.max_latency)
+
+    def _fire(self, key: SliceKey) -> None:
+        p = self._pending.get(key)
+        if p is None:
+            return
+        now = self._loop.time()
+        due = self._due(p)
+        if now < due:
+            # ticks arrived after the timer was armed: re-arm lazily, once
+            p.handle = self._loop.call_at(due, self._fire, key)
+            self.timers_armed += 1
+            return
+        del self._pending[key]
+        lag = now - due
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_total += lag
+        self.latency_max = max(self.latency_max, now - p.first)
+        self.recomputes += 1
+        self.batched_ticks += len(p.dirty)
+        t0 = time.perf_counter()
+        try:
+            self._recompute(key, p.dirty)
+        finally:
+            self.recompute_seconds += time.perf_counter() - t0
+
+    def cancel_all(self) -> None:
+        for p in self._pending.values():
+            if p.handle is not None:
+                p.handle.cancel()
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, float]:
+        n = self.recomputes or 1
+        return {
+            "ticks": self.ticks,
+            "pending_slices": len(self._pending),
+            "timers_armed": self.timers_armed,
+            "recomputes": self.recomputes,
+            "avg_ticks_per_recompute": self.batched_ticks / n,
+            "avg_lag_ms": self.lag_total / n * 1000.0,
+            "max_lag_ms": self.lag_max * 1000.0,
+            "max_latency_ms": self.latency_max * 1000.0,
+            "avg_recompute_ms": self.recompute_seconds / n * 1000.0,
+        }
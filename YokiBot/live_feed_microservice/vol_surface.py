@@ -0,0 +1,191 @@
+# vol_surface.py
+"""
+Live implied-volatility surface (pure-Python, no SciPy).
+- One slice per (underlying, expiry), fed by quotes from the Kafka consumer
+- Only strikes whose quote changed since the last fit get their IV re-solved
+- Smile per expiry: natural cubic spline of IV in log-moneyness k = ln(K / S)
+- Flat extrapolation beyond the outermost quoted strikes
+"""
+
+import math
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from yoki_shared.expiry_calendar import calendar as expiry_calendar
+
+SliceKey = Tuple[str, str]  # (underlying, expiry)
+
+
+# -------------------------
+# Natural cubic spline
+# -------------------------
+class SmileSpline:
+    """Natural cubic spline through (x, y) with flat extrapolation."""
+
+    def __init__(self, xs: List[float], ys: List[float]):
+        n = len(xs)
+        self.xs = xs
+        self.ys = ys
+        self.m = [0.0] * n  # second derivatives, natural ends -> m[0] = m[n-1] = 0
+        if n < 3:
+            return
+        # Tridiagonal system for interior second derivatives (Thomas algorithm)
+        h = [xs[i + 1] - xs[i] for i in range(n - 1)]
+        c_prime = [0.0] * n
+        d_prime = [0.0] * n
+        for i in range(1, n - 1):
+            a = h[i - 1]
+            b = 2.0 * (h[i - 1] + h[i])
+            c = h[i]
+            d = 6.0 * ((ys[i + 1] - ys[i]) / h[i] - (ys[i] - ys[i - 1]) / h[i - 1])
+            denom = b - a * c_prime[i - 1]
+            c_prime[i] = c / denom
+            d_prime[i] = (d - a * d_prime[i - 1]) / denom
+        for i in range(n - 2, 0, -1):
+            self.m[i] = d_prime[i] - c_prime[i] * self.m[i + 1]
+
+    def __call__(self, x: float) -> float:
+        xs, ys, m = self.xs, self.ys, self.m
+        if len(xs) == 1 or x <= xs[0]:
+            return ys[0]
+        if x >= xs[-1]:
+            return ys[-1]
+        i = bisect_right(xs, x) - 1
+        h = xs[i + 1] - xs[i]
+        a = (xs[i + 1] - x) / h
+        b = (x - xs[i]) / h
+        return a * ys[i] + b * ys[i + 1] + ((a ** 3 - a) * m[i] + (b ** 3 - b) * m[i + 1]) * h * h / 6.0
+
+
+# -------------------------
+# Surface state
+# -------------------------
+class SurfaceSlice:
+    __slots__ = ("underlying", "expiry", "quotes", "ivs", "dirty", "fit_spot", "smile", "surface")
+
+    def __init__(self, underlying: str, expiry: str):
+        self.underlying = underlying
+        self.expiry = expiry
+        self.quotes: Dict[float, Dict[str, float]] = {}  # strike -> {"CE": price, "PE": price}
+        self.ivs: Dict[float, float] = {}                # strike -> solved IV
+        self.dirty: Set[float] = set()                   # strikes quoted since last fit
+        self.fit_spot: Optional[float] = None
+        self.smile: Optional[SmileSpline] = None
+        self.surface: Optional[Dict] = None
+
+
+class SurfaceEngine:
+    """
+    iv_solver has the signature of greeks_service.implied_vol_bisect:
+        iv_solver(mid_price, S, K, T, r, opt_type) -> Optional[float]
+    spot_tolerance: relative spot move that invalidates every solved IV of an
+    underlying. Below it, moneyness is re-based on the new spot but IVs are reused.
+    years_to_expiry(expiry) -> T in years (expiry_calendar by default).
+    """
+
+    def __init__(
+        self,
+        iv_solver: Callable[..., Optional[float]],
+        r: float = 0.06,
+        spot_tolerance: float = 0.001,
+        years_to_expiry: Optional[Callable[[str], float]] = None,
+    ):
+        self.iv_solver = iv_solver
+        self.years_to_expiry = years_to_expiry or expiry_calendar.years
+        self.r = r
+        self.spot_tolerance = spot_tolerance
+        self.spots: Dict[str, float] = {}
+        self.slices: Dict[SliceKey, SurfaceSlice] = {}
+
+    # ---- ingest ----
+    def update_spot(self, underlying: str, spot: float) -> None:
+        if spot > 0:
+            self.spots[underlying] = spot
+
+    def update_quote(self, underlying: str, expiry: str, strike: float, opt_type: str, price: float) -> SliceKey:
+        key = (underlying, expiry)
+        sl = self.slices.get(key)
+        if sl is None:
+            sl = self.slices[key] = SurfaceSlice(underlying, expiry)
+        sides = sl.quotes.setdefault(strike, {})
+        if sides.get(opt_type) != price:
+            sides[opt_type] = price
+            sl.dirty.add(strike)
+        return key
+
+    def slices_for(self, underlying: str) -> List[SliceKey]:
+        return [k for k in self.slices if k[0] == underlying]
+
+    # ---- recompute ----
+    def _solve(self, sl: SurfaceSlice, strike: float, spot: float, T: float) -> Optional[float]:
+        sides = sl.quotes.get(strike, {})
+        # OTM side carries the information; ITM premiums are mostly intrinsic
+        order = ("PE", "CE") if strike < spot else ("CE", "PE")
+        for opt_type in order:
+            price = sides.get(opt_type)
+            if price is None or price <= 0:
+                continue
+            iv = self.iv_solver(price, spot, strike, T, self.r, opt_type)
+            if iv is not None and iv > 0:
+                return iv
+        return None
+
+    def recompute(self, underlying: str, expiry: str) -> Optional[Dict]:
+        """Re-solve dirty strikes of one slice and refit its smile."""
+        sl = self.slices.get((underlying, expiry))
+        spot = self.spots.get(underlying)
+        if sl is None or spot is None:
+            return None
+        T = self.years_to_expiry(expiry)
+        if T <= 0:
+            return None
+
+        if sl.fit_spot is None or abs(spot / sl.fit_spot - 1.0) > self.spot_tolerance:
+            todo = set(sl.quotes)
+            sl.fit_spot = spot
+        else:
+            todo = sl.dirty
+        for strike in todo:
+            iv = self._solve(sl, strike, spot, T)
+            if iv is None:
+                sl.ivs.pop(strike, None)
+            else:
+                sl.ivs[strike] = iv
+        recomputed = len(todo)
+        sl.dirty = set()
+
+        if not sl.ivs:
+            return None
+        strikes = sorted(sl.ivs)
+        moneyness = [math.log(k / spot) for k in strikes]
+        ivs = [sl.ivs[k] for k in strikes]
+        sl.smile = SmileSpline(moneyness, ivs)
+        sl.surface = {
+            "underlying": underlying,
+            "expiry": expiry,
+            "spot": spot,
+            "T": T,
+            "model": "natural_cubic_spline(log_moneyness)",
+            "strikes": strikes,
+            "moneyness": moneyness,
+            "iv": ivs,
+            "recomputed_strikes": recomputed,
+            "updated_ts": int(time.time() * 1000),
+        }
+        return sl.surface
+
+    # ---- read ----
+    def get(self, underlying: str, expiry: Optional[str] = None) -> Optional[SurfaceSlice]:
+        """Slice for (underlying, expiry); nearest fitted expiry when expiry is None."""
+        if expiry is not None:
+            sl = self.slices.get((underlying, expiry))
+            return sl if sl is not None and sl.surface is not None else None
+        fitted = [sl for (u, _), sl in self.slices.items() if u == underlying and sl.surface is not None]
+        return min(fitted, key=lambda s: s.expiry) if fitted else None
+
+    def interpolate(self, sl: SurfaceSlice, strike: Optional[float] = None, moneyness: Optional[float] = None) -> float:
+        """IV at a strike or at log-moneyness ln(K/S), measured against the fit spot."""
+        if moneyness is None:
+            moneyness = math.log(strike / sl.surface["spot"])
+        return sl.smile(moneyness)
@@ -1,2 +1,22 @@
 import os
 REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+# Live feed HTTP (market data per instrument key)
+LIVE_FEED_BASE = os.getenv("LIVE_FEED_BASE", "http://127.0.0.1:8300/live")
+# Set when the live feed exposes a many-keys endpoint: GET {url}?keys=k1,k2,...
+LIVE_FEED_BULK_URL = os.getenv("LIVE_FEED_BULK_URL", "")
+LIVE_FEED_BULK_BATCH = int(os.getenv("LIVE_FEED_BULK_BATCH", "100"))
+LIVE_FEED_MAX_CONCURRENCY = int(os.getenv("LIVE_FEED_MAX_CONCURRENCY", "32"))
+LIVE_FEED_KEY_TIMEOUT = float(os.getenv("LIVE_FEED_KEY_TIMEOUT", "0.5"))   # seconds per request
+LIVE_FEED_DEADLINE = float(os.getenv("LIVE_FEED_DEADLINE", "1.0"))         # seconds per snapshot
+
+# Snapshot source for /snapshot and /option-chain: "rest" (live feed HTTP)
+# or "redis" (optionchain:{SYMBOL}:{EXPIRY} written by the live feed)
+DATA_SOURCE = os.getenv("OPTIONCHAIN_DATA_SOURCE", "rest")
+
+# Underlying spot: latest LTP per security id in the live feed's "live:ltp" hash
+SPOT_HASH_KEY = os.getenv("SPOT_HASH_KEY", "live:ltp")
+UNDERLYING_SECURITY_IDS = {
+    sym: sid
+    for sym, sid in (p.split(":", 1) for p in os.getenv("UNDERLYING_SECURITY_IDS", "NIFTY:13,BANKNIFTY:25").split(",") if ":" in p)
+}
@@ -1,5 +1,11 @@
-from typing import Dict, Any, List
-import requests
+import asyncio
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from app import config
 
 
 class RestMarketDataSource:
@@ -16,6 +22,8 @@ class RestMarketDataSource:
         Fail-safe: missing instruments return empty data.
         """
 
+        import requests  # sync path only; the service uses AsyncRestMarketDataSource
+
         data: Dict[str, Any] = {}
 
         for key in instrument_keys:
@@ -29,3 +37,244 @@ class RestMarketDataSource:
                 continue
 
         return {"data": data}
+
+
+class AsyncRestMarketDataSource:
+    """
+    Same snapshot contract as RestMarketDataSource, fetched concurrently:
+    - one pooled httpx.AsyncClient (keep-alive) for the whole process
+    - at most `max_concurrency` requests in flight
+    - bulk mode (one request per `bulk_batch` keys) when `bulk_url` is set
+    - each request is bounded by `key_timeout` (total, not per socket op) and
+      the whole snapshot by `deadline`; whatever has arrived by then is returned
+
+    The result carries a "report" with missing / timed-out / failed keys so
+    callers can tell a partial chain from a complete one.
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        bulk_url: str = None,
+        max_concurrency: int = None,
+        key_timeout: float = None,
+        deadline: float = None,
+        bulk_batch: int = None,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        self.base_url = base_url or config.LIVE_FEED_BASE
+        self.bulk_url = bulk_url if bulk_url is not None else config.LIVE_FEED_BULK_URL
+        self.max_concurrency = max_concurrency or config.LIVE_FEED_MAX_CONCURRENCY
+        self.key_timeout = key_timeout or config.LIVE_FEED_KEY_TIMEOUT
+        self.deadline = deadline or config.LIVE_FEED_DEADLINE
+        self.bulk_batch = bulk_batch or config.LIVE_FEED_BULK_BATCH
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.key_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch_one(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, key: str) -> Dict[str, Any]:
+        async with sem:
+            r = await asyncio.wait_for(client.get(f"{self.base_url}/{key}"), self.key_timeout)
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}")
+        return {key: r.json()}
+
+    async def _fetch_bulk(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, keys: List[str]) -> Dict[str, Any]:
+        async with sem:
+            r = await asyncio.wait_for(client.get(self.bulk_url, params={"keys": ",".join(keys)}), self.key_timeout)
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}")
+        body = r.json()
+        return body.get("data", body)
+
+    async def get_snapshot(self, instrument_keys: List[str], chain=None) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        client = self._get_client()
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        if self.bulk_url:
+            groups = [instrument_keys[i:i + self.bulk_batch] for i in range(0, len(instrument_keys), self.bulk_batch)]
+            tasks = {asyncio.ensure_future(self._fetch_bulk(client, sem, g)): g for g in groups}
+        else:
+            tasks = {asyncio.ensure_future(self._fetch_one(client, sem, k)): [k] for k in instrument_keys}
+
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+
+        data: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        errors: Dict[str, str] = {}
+        for task, keys in tasks.items():
+            if task in pending:
+                timed_out.extend(keys)
+                continue
+            exc = task.exception()
+            if exc is not None:
+                timeout = isinstance(exc, (asyncio.TimeoutError, httpx.TimeoutException))
+                reason = "timeout" if timeout else str(exc) or type(exc).__name__
+                for k in keys:
+                    if reason == "timeout":
+                        timed_out.append(k)
+                    else:
+                        errors[k] = reason
+                continue
+            for k, md in task.result().items():
+                data[k] = {"market_data": md}
+
+        missing = [k for k in instrument_keys if k not in data]
+        return {
+            "data": data,
+            "report": {
+                "requested": len(instrument_keys),
+                "received": len(data),
+                "missing": missing,
+                "timed_out": timed_out,
+                "errors": errors,
+                "partial": bool(missing),
+                "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 2),
+            },
+        }
+
+
+class RedisMarketDataSource:
+    """
+    Reads the chain snapshot the live feed already writes to Redis:
+      optionchain:{SYMBOL}:{EXPIRY}           (SETEX, short TTL)
+      optionchain:last_good:{SYMBOL}:{EXPIRY} (no TTL, fallback)
+    One GET per snapshot; strike-keyed rows are mapped back to instrument keys
+    through the chain's prebuilt id map (CachedChain.ids). No HTTP hop.
+    """
+
+    def __init__(self, redis_url: str = None, client=None):
+        self.redis_url = redis_url or config.REDIS_URL
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _read(self, underlying: str, expiry: str):
+        client = self._get_client()
+        raw = await client.get(f"optionchain:{underlying}:{expiry}")
+        if raw:
+            return raw, "live"
+        raw = await client.get(f"optionchain:last_good:{underlying}:{expiry}")
+        return (raw, "last_good") if raw else (None, None)
+
+    async def get_snapshot(self, instrument_keys: List[str], chain) -> Dict[str, Any]:
+        """
+        chain: the CachedChain the keys came from (supplies symbol, expiry and
+        id map); required. A corrupt Redis value is reported per key in
+        report["errors"] like an unreachable Redis, not raised.
+        """
+        t0 = time.perf_counter()
+        data: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        source, age = None, None
+
+        try:
+            raw, source = await self._read(chain.underlying, chain.expiry)
+        except Exception as e:  # Redis down: report, don't fail the endpoint
+            raw = None
+            errors = {k: str(e) or type(e).__name__ for k in instrument_keys}
+
+        if raw:
+            try:
+                snap = json.loads(raw)
+                age = round(time.time() - float(snap.get("timestamp", 0)), 3)
+                strikes = {float(k): v for k, v in snap.get("strikes", {}).items()}
+                for key in instrument_keys:
+                    strike, opt_type = chain.ids.get(key, (None, None))
+                    leg = (strikes.get(strike) or {}).get(opt_type)
+                    if leg:
+                        data[key] = {"market_data": {
+                            "last_traded_price": leg.get("ltp"),
+                            "oi": leg.get("oi"),
+                            "volume": leg.get("volume"),
+                        }}
+            except (ValueError, TypeError, AttributeError) as e:  # corrupt value: report, don't fail
+                data, age = {}, None
+                errors = {k: f"corrupt {source} snapshot: {e}" for k in instrument_keys}
+
+        missing = [k for k in instrument_keys if k not in data]
+        return {
+            "data": data,
+            "report": {
+                "requested": len(instrument_keys),
+                "received": len(data),
+                "missing": missing,
+                "timed_out": [],
+                "errors": errors,
+                "partial": bool(missing),
+                "source": source,
+                "age_s": age,
+                "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 2),
+            },
+        }
+
+
+class RedisSpotSource:
+    """Underlying LTP from the live feed's per-security-id hash (HGET live:ltp <sec_id>)."""
+
+    def __init__(self, redis_url: str = None, client=None, security_ids: Dict[str, str] = None):
+        self.redis_url = redis_url or config.REDIS_URL
+        self.security_ids = security_ids or config.UNDERLYING_SECURITY_IDS
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def get_spot(self, underlying: str) -> Optional[float]:
+        sec_id = self.security_ids.get(underlying)
+        if sec_id is None:
+            return None
+        try:
+            raw = await self._get_client().hget(config.SPOT_HASH_KEY, sec_id)
+        except Exception:
+            return None
+        try:
+            spot = float(raw) if raw is not None else None
+        except ValueError:
+            return None
+        return spot if spot and spot > 0 else None
+
+
+def make_data_source(kind: str = None):
+    kind = (kind or config.DATA_SOURCE).lower()
+    if kind == "redis":
+        return RedisMarketDataSource()
+    return AsyncRestMarketDataSource()
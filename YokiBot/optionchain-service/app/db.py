@@ -1,6 +1,11 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # -------------------------------------------------
 # DATABASE PATH
@@ -9,24 +14,21 @@ DB_PATH = Path("data/options.db")
 DB_PATH.parent.mkdir(exist_ok=True)
 
 # -------------------------------------------------
-# CONNECTION FACTORY
+# SCHEMA
 # -------------------------------------------------
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
+# Single source of truth for the instruments table; load_instruments builds
+# its staging table from the same DDL. Schema changes are appended to
+# MIGRATIONS; the applied version is tracked in PRAGMA user_version.
+# Chain lookups are answered from this index alone (no table access).
+INSTRUMENT_INDEXES = (
+    ("idx_inst_chain", "underlying, expiry, strike, opt_type, instrument_key"),
+)
+LEGACY_INDEXES = ("idx_inst_underlying", "idx_inst_expiry", "idx_inst_underlying_expiry")
 
-# -------------------------------------------------
-# INIT DB
-# -------------------------------------------------
-def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
 
-    # Instrument master
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS instruments (
+def instruments_ddl(table: str = "instruments") -> str:
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
         instrument_key TEXT PRIMARY KEY,
         underlying TEXT NOT NULL,
         segment TEXT,
@@ -35,72 +37,264 @@ def init_db():
         opt_type TEXT,
         expiry TEXT NOT NULL
     )
-    """)
+    """
 
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_inst_underlying ON instruments(underlying)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_inst_expiry ON instruments(expiry)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_inst_underlying_expiry ON instruments(underlying, expiry)"
-    )
 
-    # Market snapshots (optional, future use)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS option_snapshots (
-        ts TEXT,
-        instrument_key TEXT,
-        underlying TEXT,
-        expiry TEXT,
-        strike REAL,
-        opt_type TEXT,
-        ltp REAL,
-        oi INTEGER
+def create_instrument_indexes(conn: sqlite3.Connection, table: str = "instruments"):
+    for name, cols in INSTRUMENT_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({cols})")
+
+
+# -------------------------------------------------
+# CONNECTION FACTORY
+# -------------------------------------------------
+def get_conn():
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# -------------------------------------------------
+# READ POOL
+# -------------------------------------------------
+READ_POOL_SIZE = int(os.getenv("OPTIONCHAIN_DB_POOL_SIZE", "8"))
+READ_POOL_TIMEOUT = float(os.getenv("OPTIONCHAIN_DB_POOL_TIMEOUT", "5"))
+
+READ_PRAGMAS = (
+    f"PRAGMA mmap_size = {int(os.getenv('OPTIONCHAIN_DB_MMAP_BYTES', str(256 * 1024 * 1024)))}",
+    f"PRAGMA cache_size = -{int(os.getenv('OPTIONCHAIN_DB_CACHE_KB', '16384'))}",
+    "PRAGMA query_only = ON",
+)
+
+
+class ReadPool:
+    """
+    Long-lived read connections shared by FastAPI's threadpool handlers.
+    Connections are opened lazily up to `size`, handed to one thread at a
+    time (LIFO, so the warmest connection is reused) and never closed
+    between requests. query_only makes accidental writes fail loudly.
+    """
+
+    def __init__(self, path: Path, size: int = READ_POOL_SIZE, timeout: float = READ_POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self.created < self.size
+                if grow:
+                    self.created += 1
+            if grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            else:
+                conn = self._idle.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self.created = 0
+
+    def stats(self) -> dict:
+        return {"size": self.size, "open": self.created, "idle": self._idle.qsize()}
+
+
+class QueryStats:
+    """Per-query call count and latency (ms), cheap enough to keep always on."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}
+
+    def record(self, name: str, seconds: float):
+        ms = seconds * 1e3
+        with self._lock:
+            s = self._stats.get(name)
+            if s is None:
+                self._stats[name] = [1, ms, ms]
+            else:
+                s[0] += 1
+                s[1] += ms
+                if ms > s[2]:
+                    s[2] = ms
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {"calls": n, "avg_ms": round(total / n, 4), "max_ms": round(mx, 4), "total_ms": round(total, 3)}
+                for name, (n, total, mx) in self._stats.items()
+            }
+
+
+_read_pool: Optional[ReadPool] = None
+_pool_lock = threading.Lock()
+query_stats = QueryStats()
+
+
+def read_pool() -> ReadPool:
+    global _read_pool
+    if _read_pool is None:
+        with _pool_lock:
+            if _read_pool is None:
+                _read_pool = ReadPool(DB_PATH.resolve())
+    return _read_pool
+
+
+def reset_read_pool():
+    """Close pooled connections and start fresh query stats (DB path change, shutdown)."""
+    global _read_pool
+    with _pool_lock:
+        if _read_pool is not None:
+            _read_pool.close()
+        _read_pool = None
+    query_stats.reset()
+
+
+def timed_query(name: str, sql: str, params: tuple = ()) -> list:
+    t0 = time.perf_counter()
+    with read_pool().connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    query_stats.record(name, time.perf_counter() - t0)
+    return rows
+
+
+def db_stats() -> dict:
+    pool = read_pool()
+    return {"pool": pool.stats(), "queries": query_stats.snapshot()}
+
+
+# -------------------------------------------------
+# MIGRATIONS
+# -------------------------------------------------
+def _migrate_v1(conn: sqlite3.Connection):
+    """
+    Reconcile the two historical layouts (db.init_db had segment /
+    instrument_type, load_instruments did not) and replace the single-column
+    indexes with the covering chain index.
+    """
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(instruments)")}
+    if not cols:
+        conn.execute(instruments_ddl())
+    else:
+        for col in ("segment", "instrument_type"):
+            if col not in cols:
+                conn.execute(f"ALTER TABLE instruments ADD COLUMN {col} TEXT")
+        # everything loaded so far came from the NSE_FO / OPTIDX filter
+        conn.execute("UPDATE instruments SET segment = 'NSE_FO' WHERE segment IS NULL")
+        conn.execute("UPDATE instruments SET instrument_type = 'OPTIDX' WHERE instrument_type IS NULL")
+
+    for name in LEGACY_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    create_instrument_indexes(conn)
+
+
+def _migrate_v2(conn: sqlite3.Connection):
+    """
+    Snapshot history: option_snapshots (text keys, never written) is replaced
+    by integer instrument ids + daily WITHOUT ROWID partitions (app.history).
+    """
+    conn.execute("DROP TABLE IF EXISTS option_snapshots")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS instrument_ids (
+        id INTEGER PRIMARY KEY,
+        instrument_key TEXT NOT NULL UNIQUE
     )
     """)
 
-    conn.commit()
-    conn.close()
+
+MIGRATIONS = [_migrate_v1, _migrate_v2]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, each in its own transaction. Returns the schema version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[target - 1](conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return max(version, SCHEMA_VERSION)
 
 
 # -------------------------------------------------
-# QUERIES
+# INIT DB
 # -------------------------------------------------
-def get_instruments_from_db(underlying: str, expiry: str) -> List[Dict[str, Any]]:
+def init_db():
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT *
-        FROM instruments
-        WHERE underlying = ?
-          AND expiry = ?
-        """,
-        (underlying, expiry),
-    )
+    # WAL is persistent in the file; readers never block the loader's swap
+    cur.execute("PRAGMA journal_mode=WAL").fetchone()
 
-    rows = [dict(row) for row in cur.fetchall()]
+    # Instrument master + snapshot history ids
+    migrate(conn)
+
+    conn.commit()
     conn.close()
-    return rows
+    reset_read_pool()
 
 
-def get_expiries_for_underlying(underlying: str) -> List[str]:
-    conn = get_conn()
-    cur = conn.cursor()
+# -------------------------------------------------
+# QUERIES
+# -------------------------------------------------
+# Fixed SQL text so sqlite3's statement cache reuses the prepared statement;
+# only indexed columns are selected, ordered as the index stores them.
+CHAIN_SQL = """
+    SELECT instrument_key, strike, opt_type
+    FROM instruments
+    WHERE underlying = ?
+      AND expiry = ?
+    ORDER BY strike, opt_type
+"""
 
-    cur.execute(
-        """
-        SELECT DISTINCT expiry
-        FROM instruments
-        WHERE underlying = ?
-        ORDER BY expiry ASC
-        """,
-        (underlying,),
-    )
+EXPIRIES_SQL = """
+    SELECT DISTINCT expiry
+    FROM instruments
+    WHERE underlying = ?
+    ORDER BY expiry ASC
+"""
 
-    expiries = [row["expiry"] for row in cur.fetchall()]
-    conn.close()
-    return expiries
+
+def get_instruments_from_db(underlying: str, expiry: str) -> List[Dict[str, Any]]:
+    return [
+        {"instrument_key": key, "strike": strike, "opt_type": opt_type}
+        for key, strike, opt_type in timed_query("chain", CHAIN_SQL, (underlying, expiry))
+    ]
+
+
+def get_expiries_for_underlying(underlying: str) -> List[str]:
+    return [row[0] for row in timed_query("expiries", EXPIRIES_SQL, (underlying,))]
@@ -0,0 +1,280 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.db import DB_PATH, migrate, timed_query
+
+logger = logging.getLogger("snapshot-history")
+
+# Intraday chain history for OI / IV change signals.
+#   instrument_ids           instrument_key -> small integer id, stable across daily
+#                            refreshes (schema in app.db migrations)
+#   snap_YYYYMMDD            one WITHOUT ROWID partition per IST trading day,
+#                            PRIMARY KEY (instrument_id, ts): every lookup is a range scan
+# Retention drops whole partitions instead of deleting rows.
+
+IST = timezone(timedelta(hours=5, minutes=30))
+PARTITION_PREFIX = "snap_"
+
+RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "5"))
+FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "2"))
+MAX_BATCH_ROWS = int(os.getenv("HISTORY_MAX_BATCH_ROWS", "20000"))
+QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "1000"))
+
+# (instrument_key, ltp, oi, volume)
+HistoryRow = Tuple[str, Optional[float], Optional[float], Optional[float]]
+
+
+def partition_for(ts: int) -> str:
+    return PARTITION_PREFIX + datetime.fromtimestamp(ts, IST).strftime("%Y%m%d")
+
+
+def partitions_between(start_ts: int, end_ts: int) -> List[str]:
+    day = datetime.fromtimestamp(start_ts, IST).date()
+    last = datetime.fromtimestamp(end_ts, IST).date()
+    names = []
+    while day <= last:
+        names.append(PARTITION_PREFIX + day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return names
+
+
+def _create_partition(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {name} (
+        instrument_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        ltp REAL,
+        oi INTEGER,
+        volume INTEGER,
+        PRIMARY KEY (instrument_id, ts)
+    ) WITHOUT ROWID
+    """)
+
+
+def existing_partitions(conn) -> List[str]:
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+        (PARTITION_PREFIX + "%",),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def prune_partitions(conn: sqlite3.Connection, retention_days: int = RETENTION_DAYS,
+                     now: Optional[float] = None) -> List[str]:
+    """Drop partitions older than retention_days (IST calendar days)."""
+    today = datetime.fromtimestamp(now or time.time(), IST).date()
+    cutoff = PARTITION_PREFIX + (today - timedelta(days=retention_days)).strftime("%Y%m%d")
+    dropped = [name for name in existing_partitions(conn) if name < cutoff]
+    for name in dropped:
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+    return dropped
+
+
+class SnapshotHistoryWriter:
+    """
+    Background writer: request handlers submit() and return immediately; a
+    single thread drains the queue and appends in batched transactions
+    (everything queued within FLUSH_SECONDS, up to MAX_BATCH_ROWS rows).
+    When the queue is full the snapshot is dropped and counted, never blocking
+    the API.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, flush_seconds: float = FLUSH_SECONDS,
+                 max_batch_rows: int = MAX_BATCH_ROWS, retention_days: int = RETENTION_DAYS):
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self.max_batch_rows = max_batch_rows
+        self.retention_days = retention_days
+        self._queue: "queue.Queue[Optional[Tuple[int, List[HistoryRow]]]]" = queue.Queue(QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._ids: Dict[str, int] = {}
+        self._partitions: set = set()
+        self._pruned_for: Optional[str] = None
+        self.rows_written = 0
+        self.batches = 0
+        self.dropped = 0
+
+    # ---- producer side ----
+    def submit(self, ts: int, rows: Sequence[HistoryRow]) -> bool:
+        if not rows:
+            return True
+        try:
+            self._queue.put_nowait((int(ts), list(rows)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="snapshot-history", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "dropped_snapshots": self.dropped,
+            "partitions": sorted(self._partitions),
+        }
+
+    # ---- writer thread ----
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        migrate(conn)  # instrument_ids
+        self._ids = dict((key, i) for i, key in conn.execute("SELECT id, instrument_key FROM instrument_ids"))
+        self._partitions = set(existing_partitions(conn))
+        try:
+            while True:
+                item = self._queue.get()
+                stop = item is None
+                batch = [] if stop else [item]
+                n = 0 if stop else len(item[1])
+                deadline = time.monotonic() + self.flush_seconds
+                while not stop and n < self.max_batch_rows:
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                    n += len(item[1])
+                if batch:
+                    try:
+                        self.write_batch(conn, batch)
+                    except Exception as e:
+                        logger.warning("history batch of %d rows failed: %s", n, e)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _resolve_ids(self, conn: sqlite3.Connection, keys: Iterable[str]) -> None:
+        new = [k for k in set(keys) if k not in self._ids]
+        if new:
+            conn.executemany("INSERT OR IGNORE INTO instrument_ids (instrument_key) VALUES (?)", [(k,) for k in new])
+            q = ",".join("?" * len(new))
+            for i, key in conn.execute(f"SELECT id, instrument_key FROM instrument_ids WHERE instrument_key IN ({q})", new):
+                self._ids[key] = i
+
+    def write_batch(self, conn: sqlite3.Connection, batch: List[Tuple[int, List[HistoryRow]]]) -> int:
+        """One transaction for the whole batch; also the hook for daily retention."""
+        by_partition: Dict[str, list] = {}
+        conn.execute("BEGIN")
+        try:
+            self._resolve_ids(conn, (row[0] for _, rows in batch for row in rows))
+            for ts, rows in batch:
+                part = by_partition.setdefault(partition_for(ts), [])
+                part.extend((self._ids[k], ts, ltp, oi, vol) for k, ltp, oi, vol in rows)
+            written = 0
+            for name, values in by_partition.items():
+                if name not in self._partitions:
+                    _create_partition(conn, name)
+                    self._partitions.add(name)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {name} (instrument_id, ts, ltp, oi, volume) VALUES (?, ?, ?, ?, ?)",
+                    values,
+                )
+                written += len(values)
+            today = partition_for(int(time.time()))
+            if self._pruned_for != today:
+                for name in prune_partitions(conn, self.retention_days):
+                    self._partitions.discard(name)
+                self._pruned_for = today
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # ids / partitions created inside the failed transaction are gone too
+            self._ids = dict((key, i) for i, key in conn.execute("SELECT id, instrument_key FROM instrument_ids"))
+            self._partitions = set(existing_partitions(conn))
+            raise
+        self.rows_written += written
+        self.batches += 1
+        return written
+
+
+# -------------------------------------------------
+# RANGE QUERIES (read pool)
+# -------------------------------------------------
+def _partition_names() -> set:
+    return {r[0] for r in timed_query(
+        "history_partitions",
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+        (PARTITION_PREFIX + "%",),
+    )}
+
+
+def history_range(instrument_key: str, start_ts: int, end_ts: int) -> List[dict]:
+    """All samples of one instrument in [start_ts, end_ts], oldest first."""
+    present = _partition_names()
+    out: List[dict] = []
+    for name in partitions_between(start_ts, end_ts):
+        if name not in present:
+            continue
+        rows = timed_query(
+            "history_range",
+            f"""
+            SELECT s.ts, s.ltp, s.oi, s.volume
+            FROM {name} s JOIN instrument_ids i ON i.id = s.instrument_id
+            WHERE i.instrument_key = ? AND s.ts BETWEEN ? AND ?
+            ORDER BY s.ts
+            """,
+            (instrument_key, start_ts, end_ts),
+        )
+        out.extend({"ts": ts, "ltp": ltp, "oi": oi, "volume": vol} for ts, ltp, oi, vol in rows)
+    return out
+
+
+def oi_as_of(instrument_keys: Sequence[str], ts: int, lookback_days: int = 1) -> Dict[str, float]:
+    """
+    Latest OI at or before ts per instrument: one PK range scan
+    (instrument_id = ?, ts <= ? ORDER BY ts DESC LIMIT 1) per instrument, newest
+    partition first.
+    """
+    present = _partition_names()
+    names = [n for n in reversed(partitions_between(ts - lookback_days * 86400, ts)) if n in present]
+    if not names or not instrument_keys:
+        return {}
+    q = ",".join("?" * len(instrument_keys))
+    ids = dict(timed_query("history_ids", f"SELECT instrument_key, id FROM instrument_ids WHERE instrument_key IN ({q})",
+                           tuple(instrument_keys)))
+    out: Dict[str, float] = {}
+    for key, iid in ids.items():
+        for name in names:
+            row = timed_query(
+                "history_oi_as_of",
+                f"SELECT oi FROM {name} WHERE instrument_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (iid, ts),
+            )
+            if row:
+                out[key] = row[0][0]
+                break
+    return out
+
+
+def oi_change(instrument_keys: Sequence[str], minutes: float, now: Optional[int] = None) -> Dict[str, dict]:
+    """OI now vs `minutes` ago for each instrument that has both samples."""
+    now = int(now or time.time())
+    current = oi_as_of(instrument_keys, now)
+    before = oi_as_of(instrument_keys, now - int(minutes * 60))
+    return {
+        k: {"oi": current[k], "oi_before": before[k], "change": current[k] - before[k]}
+        for k in instrument_keys
+        if k in current and k in before and current[k] is not None and before[k] is not None
+    }
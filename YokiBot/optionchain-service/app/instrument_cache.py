@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The instrument master changes once a day. The loader bumps a generation
+# number in this file after every swap; the cache drops everything when it
+# sees a new generation. Checking is a stat() at most every CHECK_INTERVAL
+# seconds, so hot endpoints do no SQL and (almost always) no syscalls.
+GENERATION_PATH = Path("data/instruments.generation")
+CHECK_INTERVAL = float(os.getenv("INSTRUMENT_CACHE_CHECK_SECONDS", "5"))
+
+
+def read_generation(path: Path = GENERATION_PATH) -> int:
+    try:
+        return int(path.read_text().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(path: Path = GENERATION_PATH) -> int:
+    """Called by the loader after the new instruments table is live."""
+    generation = read_generation(path) + 1
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(str(generation))
+    os.replace(tmp, path)
+    return generation
+
+
+class CachedChain:
+    """
+    Instruments of one (underlying, expiry), ordered by strike, plus the id map
+    instrument_key -> (strike, opt_type) used to read strike-keyed snapshots.
+    """
+
+    __slots__ = ("underlying", "expiry", "instruments", "strikes", "keys", "ids", "_inst_strikes")
+
+    def __init__(self, underlying: str, expiry: str, instruments: List[dict]):
+        self.underlying = underlying
+        self.expiry = expiry
+        self.instruments = sorted(instruments, key=lambda inst: inst["strike"])
+        self.strikes = sorted({inst["strike"] for inst in self.instruments})
+        self.keys = [inst["instrument_key"] for inst in self.instruments]
+        self.ids = {inst["instrument_key"]: (float(inst["strike"]), inst["opt_type"]) for inst in self.instruments}
+        self._inst_strikes = [inst["strike"] for inst in self.instruments]
+
+    def window(self, spot: float, strikes: Optional[int] = None, points: Optional[float] = None) -> Tuple[int, int]:
+        """
+        [start, end) into instruments/keys for +/- `strikes` strikes around the
+        strike nearest spot, or for strikes within +/- `points` of spot.
+        Neither given -> the whole chain.
+        """
+        if not self.strikes or (strikes is None and points is None):
+            return 0, len(self.instruments)
+        if points is not None:
+            lo, hi = spot - points, spot + points
+        else:
+            i = bisect_left(self.strikes, spot)
+            if i == len(self.strikes) or (i > 0 and spot - self.strikes[i - 1] <= self.strikes[i] - spot):
+                i -= 1
+            lo = self.strikes[max(i - strikes, 0)]
+            hi = self.strikes[min(i + strikes, len(self.strikes) - 1)]
+        return bisect_left(self._inst_strikes, lo), bisect_right(self._inst_strikes, hi)
+
+
+class InstrumentCache:
+    def __init__(self, load_expiries: Callable[[str], List[str]],
+                 load_chain: Callable[[str, str], List[dict]],
+                 generation_path: Path = GENERATION_PATH,
+                 check_interval: float = CHECK_INTERVAL):
+        self._load_expiries = load_expiries
+        self._load_chain = load_chain
+        self.generation_path = generation_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._expiries: Dict[str, List[str]] = {}
+        self._chains: Dict[Tuple[str, str], CachedChain] = {}
+        self.generation = read_generation(generation_path)
+        self._checked_at = time.monotonic()
+        self._stat: Optional[Tuple[int, int]] = self._file_stat()
+        self.hits = 0
+        self.misses = 0
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.generation_path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def _maybe_invalidate(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        stat = self._file_stat()
+        if stat == self._stat:
+            return
+        generation = read_generation(self.generation_path)
+        with self._lock:
+            self._stat = stat
+            if generation != self.generation:
+                self.invalidate(generation)
+
+    def invalidate(self, generation: Optional[int] = None):
+        self._expiries = {}
+        self._chains = {}
+        self.generation = self.generation + 1 if generation is None else generation
+
+    def expiries(self, underlying: str) -> List[str]:
+        self._maybe_invalidate()
+        expiries = self._expiries.get(underlying)
+        if expiries is None:
+            self.misses += 1
+            expiries = self._expiries[underlying] = sorted(self._load_expiries(underlying))
+        else:
+            self.hits += 1
+        return expiries
+
+    def nearest_expiry(self, underlying: str, today: Optional[str] = None) -> Optional[str]:
+        """First expiry on or after today (ISO dates sort lexically)."""
+        expiries = self.expiries(underlying)
+        i = bisect_left(expiries, today or date.today().isoformat())
+        return expiries[i] if i < len(expiries) else None
+
+    def chain(self, underlying: str, expiry: str) -> CachedChain:
+        self._maybe_invalidate()
+        key = (underlying, expiry)
+        chain = self._chains.get(key)
+        if chain is None:
+            self.misses += 1
+            chain = self._chains[key] = CachedChain(underlying, expiry, self._load_chain(underlying, expiry))
+        else:
+            self.hits += 1
+        return chain
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "underlyings": len(self._expiries),
+            "chains": len(self._chains),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,103 +1,208 @@
 import sqlite3
 import csv
 import gzip
-import requests
+import io
+import os
+import sys
+import time
+from datetime import date
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from app.db import create_instrument_indexes, instruments_ddl, migrate
+from app.instrument_cache import bump_generation
 
 DB_PATH = Path("data/options.db")
+GZ_PATH = Path("data/instruments.csv.gz")
 INSTRUMENTS_URL = "https://assets.upstox.com/market-quote/instruments/exchange/complete.csv.gz"
 
+EXCHANGE = "NSE_FO"
+INSTRUMENT_TYPE = "OPTIDX"
+UNDERLYINGS = ("NIFTY", "BANKNIFTY")
 
-def get_conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    return sqlite3.connect(DB_PATH)
-
-
-def init_instruments_table():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS instruments (
-        instrument_key TEXT PRIMARY KEY,
-        underlying TEXT,
-        expiry TEXT,
-        strike REAL,
-        opt_type TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
-
-
-def download_and_parse_csv():
-    print("Downloading Upstox instrument master...")
-    resp = requests.get(INSTRUMENTS_URL, timeout=60)
-    resp.raise_for_status()
-
-    gz_path = Path("data/instruments.csv.gz")
-
-    with open(gz_path, "wb") as f:
-        f.write(resp.content)
-
-    print("Parsing CSV...")
+STAGING_TABLE = "instruments_staging"
 
-    rows = []
+BATCH_SIZE = 5000
+DOWNLOAD_CHUNK = 1 << 16
 
-    with gzip.open(gz_path, "rt", encoding="utf-8", errors="ignore") as f:
-        reader = csv.DictReader(f)
+# (instrument_key, underlying, segment, instrument_type, strike, opt_type, expiry)
+InstrumentRow = Tuple[str, str, str, str, float, str, str]
 
-        for row in reader:
-            if row.get("exchange") != "NSE_FO":
-                continue
 
-            if row.get("instrument_type") != "OPTIDX":
-                continue
-
-            if row.get("name") not in ("NIFTY", "BANKNIFTY"):
-                continue
-
-            rows.append(row)
-
-    return rows
+def get_conn():
+    DB_PATH.parent.mkdir(exist_ok=True)
+    return sqlite3.connect(DB_PATH)
 
 
+def init_instruments_table(conn: Optional[sqlite3.Connection] = None, table: str = "instruments"):
+    own = conn is None
+    conn = conn or get_conn()
+    conn.execute(instruments_ddl(table))
+    conn.commit()
+    if own:
+        conn.close()
 
-def load_instruments():
-    init_instruments_table()
-    rows = download_and_parse_csv()
 
-    conn = get_conn()
-    cur = conn.cursor()
+def download_instruments(path: Path = GZ_PATH) -> Path:
+    """
+    Stream the instrument master to disk in chunks (never held in memory).
+    The file is written next to the target and renamed, so a failed download
+    leaves the previous copy usable for offline loads.
+    """
+    import requests  # only needed when refreshing from Upstox
 
+    print("Downloading Upstox instrument master...")
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".part")
+    with requests.get(INSTRUMENTS_URL, timeout=60, stream=True) as resp:
+        resp.raise_for_status()
+        with open(tmp, "wb") as f:
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK):
+                f.write(chunk)
+    os.replace(tmp, path)
+    return path
+
+
+def iter_option_rows(stream: io.BufferedIOBase,
+                     underlyings: Optional[Iterable[str]] = UNDERLYINGS,
+                     instrument_types: Iterable[str] = (INSTRUMENT_TYPE,)) -> Iterator[InstrumentRow]:
+    """
+    Decompress and parse in one pass, filtering on raw columns before any
+    per-row object is built. Yields insert-ready tuples.
+    underlyings=None keeps every name (full NSE_FO universe).
+    """
+    text = io.TextIOWrapper(gzip.GzipFile(fileobj=stream), encoding="utf-8", errors="ignore", newline="")
+    reader = csv.reader(text)
+    header = next(reader)
+    col = {name: i for i, name in enumerate(header)}
+    i_key, i_name, i_expiry = col["instrument_key"], col["name"], col["expiry"]
+    i_strike, i_opt, i_type, i_exch = col["strike"], col["option_type"], col["instrument_type"], col["exchange"]
+    names = frozenset(underlyings) if underlyings is not None else None
+    types = frozenset(instrument_types)
+
+    for row in reader:
+        if row[i_exch] != EXCHANGE or row[i_type] not in types or (names is not None and row[i_name] not in names):
+            continue
+        yield row[i_key], row[i_name], row[i_exch], row[i_type], float(row[i_strike]), row[i_opt], row[i_expiry]
+
+
+def _batches(rows: Iterator[InstrumentRow], size: int) -> Iterator[list]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(conn: sqlite3.Connection, rows: Iterator[InstrumentRow], batch_size: int = BATCH_SIZE,
+                table: str = "instruments") -> int:
+    """
+    executemany in batches inside ONE transaction, with WAL and synchronous=OFF
+    for the duration of the load (restored to NORMAL afterwards).
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
     inserted = 0
-
-    for r in rows:
-        instrument_key = r["instrument_key"]
-        underlying = r["name"]
-        expiry = r["expiry"]
-        strike = float(r["strike"])
-        opt_type = r["option_type"]
-
-        cur.execute("""
-            INSERT OR IGNORE INTO instruments
-            (instrument_key, underlying, expiry, strike, opt_type)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            instrument_key,
-            underlying,
-            expiry,
-            strike,
-            opt_type
-        ))
-        inserted += 1
-
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("BEGIN")
+        for batch in _batches(rows, batch_size):
+            conn.executemany(
+                f"""
+                INSERT OR IGNORE INTO {table}
+                (instrument_key, underlying, segment, instrument_type, strike, opt_type, expiry)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+            inserted += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return inserted
+
+
+def _count(conn: sqlite3.Connection, table: str) -> int:
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if exists else 0
+
+
+def swap_in(conn: sqlite3.Connection, staging: str = STAGING_TABLE) -> None:
+    """
+    Replace `instruments` with the fully loaded staging table in one write
+    transaction. Readers (WAL) keep seeing the old table until COMMIT and the
+    new one afterwards - never a half-loaded table.
+    Index names are fixed (app.db.INSTRUMENT_INDEXES), so they are rebuilt
+    on the renamed table inside the same transaction (a few ms for the
+    option universe).
+    """
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DROP TABLE IF EXISTS instruments")
+        conn.execute(f"ALTER TABLE {staging} RENAME TO instruments")
+        create_instrument_indexes(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def load_instruments(offline: Optional[bool] = None, path: Path = GZ_PATH,
+                     today: Optional[str] = None) -> dict:
+    """
+    Daily refresh of NIFTY/BANKNIFTY index options.
+    The new master is loaded into a staging table, expired contracts
+    (expiry < today) are pruned, and the result is swapped in atomically.
+    offline=True (or INSTRUMENTS_OFFLINE=1) parses the checked-in gz file
+    instead of downloading a fresh copy.
+    Returns a report with row counts and timings.
+    """
+    if offline is None:
+        offline = os.getenv("INSTRUMENTS_OFFLINE", "0") == "1"
+    if not offline:
+        download_instruments(path)
+    today = today or date.today().isoformat()
+
+    t0 = time.perf_counter()
+    DB_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        migrate(conn)
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        init_instruments_table(conn, STAGING_TABLE)
+        with open(path, "rb") as f:
+            parsed = bulk_insert(conn, iter_option_rows(f), table=STAGING_TABLE)
+        pruned = conn.execute(f"DELETE FROM {STAGING_TABLE} WHERE expiry < ?", (today,)).rowcount
+        rows = _count(conn, STAGING_TABLE)
+        previous = _count(conn, "instruments")
+        t1 = time.perf_counter()
+        swap_in(conn)
+        t2 = time.perf_counter()
+    finally:
+        conn.close()
+    generation = bump_generation()
+
+    report = {
+        "rows": rows,
+        "parsed": parsed,
+        "pruned_expired": pruned,
+        "previous_rows": previous,
+        "generation": generation,
+        "load_seconds": round(t1 - t0, 3),
+        "swap_ms": round((t2 - t1) * 1e3, 3),
+        "total_seconds": round(t2 - t0, 3),
+    }
 
     print("--------------------------------------------------")
-    print(f"✅ INSERTED {inserted} REAL OPTION INSTRUMENTS")
+    print(f"✅ LOADED {rows} REAL OPTION INSTRUMENTS (pruned {pruned} expired, was {previous})")
+    print(f"   load {report['load_seconds']}s, swap {report['swap_ms']}ms")
     print("--------------------------------------------------")
+    return report
 
 
 if __name__ == "__main__":
-    load_instruments()
+    load_instruments(offline="--offline" in sys.argv[1:] or None)
@@ -1,20 +1,39 @@
-from fastapi import FastAPI
-from typing import Literal
-from datetime import date, datetime
+from fastapi import FastAPI, Header, Query, Response
+from typing import Dict, Hashable, Literal, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import time
+
+from yoki_shared.fast_response import ORJSONResponse, negotiate
 
 from app.db import (
     init_db,
     get_instruments_from_db,
     get_expiries_for_underlying,
+    db_stats,
+    reset_read_pool,
 )
-from app.data_source import RestMarketDataSource
+from app.data_source import make_data_source, RedisSpotSource
+from app.instrument_cache import CachedChain, InstrumentCache
+from app.history import SnapshotHistoryWriter, history_range, oi_change
 from app.option_chain_service import build_option_chain
+from app.snapshot_store import MAX_VIEWS, SnapshotState, SnapshotStore, etag_matches, market_fingerprint
 
-app = FastAPI(title="Option Chain Service")
+app = FastAPI(title="Option Chain Service", default_response_class=ORJSONResponse)
 
 # ---- INIT ----
 init_db()
-data_source = RestMarketDataSource()
+data_source = make_data_source()
+spot_source = RedisSpotSource()
+instrument_cache = InstrumentCache(get_expiries_for_underlying, get_instruments_from_db)
+history_writer = SnapshotHistoryWriter()
+snapshot_store = SnapshotStore()
+
+# view -> (expiry, instrument_key -> OI in that view's previous build), for oi_change.
+# One entry per caller view (each /snapshot store key, each /auto window) so
+# one caller's builds don't reset another's deltas; a new expiry starts over.
+# Bounded like the snapshot store: the least recently built of MAX_VIEWS goes.
+_last_oi: "OrderedDict[Hashable, Tuple[str, Dict[str, float]]]" = OrderedDict()
 
 
 # -------------------------
@@ -25,107 +44,235 @@ def health():
     return {"status": "OK"}
 
 
+@app.get("/stats/db")
+def stats_db():
+    return {**db_stats(), "instrument_cache": instrument_cache.stats(), "history": history_writer.stats(),
+            "snapshots": snapshot_store.stats(), "oi_views": len(_last_oi)}
+
+
+@app.on_event("startup")
+def start_history_writer():
+    history_writer.start()
+
+
+@app.on_event("shutdown")
+async def close_resources():
+    history_writer.stop()
+    await data_source.aclose()
+    await spot_source.aclose()
+    reset_read_pool()
+
+
 # -------------------------
 # EXPIRIES API
 # -------------------------
 @app.get("/expiries/{underlying}")
 def get_expiries(underlying: Literal["NIFTY", "BANKNIFTY"]):
-    return get_expiries_for_underlying(underlying)
+    return instrument_cache.expiries(underlying)
+
+
+# -------------------------
+# SPOT + ATM WINDOW
+# -------------------------
+async def _spot_and_window(underlying: str, cached: CachedChain, atm_window: Optional[int],
+                           atm_points: Optional[float]) -> Tuple[float, str, int, int]:
+    """
+    Live underlying LTP (median strike only as a fallback when the feed has
+    none) and the [start, end) slice of the chain around it.
+    """
+    spot = await spot_source.get_spot(underlying)
+    spot_source_name = "live_feed"
+    if spot is None:
+        spot = float(cached.strikes[len(cached.strikes) // 2])
+        spot_source_name = "median_strike"
+    start, end = cached.window(spot, strikes=atm_window, points=atm_points)
+    return spot, spot_source_name, start, end
+
+
+def _build_chain(view: Hashable, underlying: str, expiry: str, instruments: list, snapshot: dict,
+                 spot: float) -> dict:
+    """view: whose previous build oi_change is measured against."""
+    prev_expiry, prev = _last_oi.get(view, (None, {}))
+    if prev_expiry != expiry:
+        prev = {}
+        _last_oi[view] = (expiry, prev)
+    _last_oi.move_to_end(view)
+    while len(_last_oi) > MAX_VIEWS:
+        _last_oi.popitem(last=False)
+    chain = build_option_chain(
+        underlying=underlying,
+        expiry=expiry,
+        instruments=instruments,
+        snapshot=snapshot,
+        spot=spot,
+        prev_oi=prev or None,
+    )
+    data = snapshot.get("data", {})
+    live = [row for row in chain["instruments"] if row["instrument_key"] in data]
+    prev.update({row["instrument_key"]: row["oi"] for row in live})
+    history_writer.submit(int(time.time()), [
+        (row["instrument_key"], row["ltp"], row["oi"], data[row["instrument_key"]]["market_data"].get("volume"))
+        for row in live
+    ])
+    return chain
 
 
 # -------------------------
 # AUTO OPTION CHAIN
 # -------------------------
 @app.get("/option-chain/{underlying}/auto")
-def get_option_chain_auto(underlying: Literal["NIFTY", "BANKNIFTY"]):
+async def get_option_chain_auto(
+    underlying: Literal["NIFTY", "BANKNIFTY"],
+    atm_window: Optional[int] = Query(None, ge=0, description="strikes each side of ATM"),
+    atm_points: Optional[float] = Query(None, gt=0, description="points each side of spot"),
+    accept: Optional[str] = Header(None),
+):
 
-    expiries = get_expiries_for_underlying(underlying)
-    if not expiries:
+    if not instrument_cache.expiries(underlying):
         return {"error": "No expiries found in DB"}
 
-    today = date.today().isoformat()
-    valid_expiries = [e for e in expiries if e >= today]
-    if not valid_expiries:
+    expiry = instrument_cache.nearest_expiry(underlying)
+    if expiry is None:
         return {"error": "No valid upcoming expiries"}
 
-    expiry = valid_expiries[0]
-
-    instruments = get_instruments_from_db(underlying, expiry)
+    cached = instrument_cache.chain(underlying, expiry)
+    instruments = cached.instruments
     if not instruments:
         return {"error": "No instruments found"}
 
-    strikes = sorted({inst["strike"] for inst in instruments})
+    strikes = cached.strikes
     if not strikes:
         return {"error": "No strikes available"}
 
-    spot = float(strikes[len(strikes) // 2])
+    spot, spot_from, start, end = await _spot_and_window(underlying, cached, atm_window, atm_points)
 
-    snapshot = data_source.get_snapshot(
-        [inst["instrument_key"] for inst in instruments]
-    )
+    snapshot = await data_source.get_snapshot(cached.keys[start:end], chain=cached)
 
-    chain = build_option_chain(
-        underlying=underlying,
-        expiry=expiry,
-        instruments=instruments,
-        snapshot=snapshot,
-        spot=spot,
-    )
+    chain = _build_chain(("auto", underlying, atm_window, atm_points), underlying, expiry,
+                         instruments[start:end], snapshot, spot)
 
-    return {
+    return negotiate(accept, {
         "underlying": underlying,
         "spot": spot,
+        "spot_source": spot_from,
         "expiry": expiry,
         "data": chain,
-    }
+        "data_quality": snapshot["report"],
+    })
 
 
 # =====================================================
 # SNAPSHOT ENDPOINT (FOR SIGNAL-ENGINE)
 # =====================================================
+def _snapshot_response(state: SnapshotState, if_none_match: Optional[str], since: Optional[int],
+                       accept: Optional[str]) -> Response:
+    headers = {"ETag": state.etag, "X-Snapshot-Seq": str(state.seq)}
+    if etag_matches(if_none_match, state.etag):
+        return Response(status_code=304, headers={**headers, "Vary": "Accept"})
+    if since is not None:
+        delta = state.delta(since)
+        if delta is not None:
+            # a delta is not the full representation: its own (weak) validator,
+            # so no cache stores it under the snapshot's ETag
+            headers["ETag"] = f'W/"{state.seq}-d{since}"'
+            return negotiate(accept, delta, headers=headers)
+    return state.encoded.response(accept, headers=headers)
+
+
 @app.get("/snapshot/{underlying}")
-def snapshot(underlying: Literal["NIFTY", "BANKNIFTY"]):
+async def snapshot(
+    underlying: Literal["NIFTY", "BANKNIFTY"],
+    atm_window: Optional[int] = Query(None, ge=0, description="strikes each side of ATM"),
+    atm_points: Optional[float] = Query(None, gt=0, description="points each side of spot"),
+    since: Optional[int] = Query(None, ge=0, description="seq of the client's copy: return changed rows only"),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+):
     """
-    Stable snapshot contract for signal-engine
+    Stable snapshot contract for signal-engine.
+
+    Carries "seq" (and ETag "<seq>"); seq only moves when the underlying
+    market data changes. If-None-Match with the current ETag -> 304. With
+    since=<seq> the body has "delta": true, only the instruments changed
+    after that seq and "removed" keys, under ETag W/"<seq>-d<since>" (a
+    client that merged it holds "<seq>"); a since the service can no longer
+    diff against gets the full snapshot. Accept: application/msgpack gets
+    the same body as msgpack.
     """
 
-    expiries = get_expiries_for_underlying(underlying)
-    if not expiries:
+    if not instrument_cache.expiries(underlying):
         return {"error": "No expiries found"}
 
-    today = date.today().isoformat()
-    valid_expiries = [e for e in expiries if e >= today]
-    if not valid_expiries:
+    expiry = instrument_cache.nearest_expiry(underlying)
+    if expiry is None:
         return {"error": "No valid expiry"}
 
-    expiry = valid_expiries[0]
-
-    instruments = get_instruments_from_db(underlying, expiry)
+    cached = instrument_cache.chain(underlying, expiry)
+    instruments = cached.instruments
     if not instruments:
         return {"error": "No instruments"}
 
-    strikes = sorted({inst["strike"] for inst in instruments})
+    strikes = cached.strikes
     if not strikes:
         return {"error": "No strikes"}
 
-    spot = float(strikes[len(strikes) // 2])
+    spot, spot_from, start, end = await _spot_and_window(underlying, cached, atm_window, atm_points)
 
-    snapshot_data = data_source.get_snapshot(
-        [inst["instrument_key"] for inst in instruments]
-    )
+    keys = cached.keys[start:end]
+    snapshot_data = await data_source.get_snapshot(keys, chain=cached)
 
-    chain = build_option_chain(
-        underlying=underlying,
-        expiry=expiry,
-        instruments=instruments,
-        snapshot=snapshot_data,
-        spot=spot,
-    )
+    store_key = (underlying, atm_window, atm_points)
+    fingerprint = market_fingerprint(expiry, spot, keys, snapshot_data["data"])
+    state = snapshot_store.lookup(store_key, fingerprint)
+    if state is None:
+        # built (and the previous OI advanced) only when a new snapshot is published
+        chain = _build_chain(store_key, underlying, expiry, instruments[start:end], snapshot_data, spot)
+        state = snapshot_store.publish(store_key, fingerprint, {
+            "underlying": chain["underlying"],
+            "expiry": chain["expiry"],
+            "spot": chain["spot"],
+            "spot_source": spot_from,
+            "timestamp": datetime.utcnow().isoformat(),
+            "pcr": chain["pcr"],
+            "pcr_volume": chain["pcr_volume"],
+            "max_pain": chain["max_pain"],
+            "atm_strike": chain["atm_strike"],
+            "atm_straddle": chain["atm_straddle"],
+            "oi_change": chain["oi_change"],
+            "instruments": chain["instruments"],
+            "data_quality": snapshot_data["report"],
+        })
 
+    return _snapshot_response(state, if_none_match, since, accept)
+
+
+# =====================================================
+# SNAPSHOT HISTORY
+# =====================================================
+@app.get("/history/oi-change/{underlying}")
+def history_oi_change(
+    underlying: Literal["NIFTY", "BANKNIFTY"],
+    minutes: float = Query(5, gt=0, le=24 * 60),
+    expiry: Optional[str] = None,
+):
+    """OI now vs `minutes` ago for every instrument of the (nearest) expiry."""
+    expiry = expiry or instrument_cache.nearest_expiry(underlying)
+    if expiry is None:
+        return {"error": "No valid expiry"}
+    cached = instrument_cache.chain(underlying, expiry)
+    changes = oi_change(cached.keys, minutes)
     return {
-        "underlying": chain["underlying"],
-        "expiry": chain["expiry"],
-        "spot": chain["spot"],
-        "timestamp": datetime.utcnow().isoformat(),
-        "instruments": chain["instruments"],
+        "underlying": underlying,
+        "expiry": expiry,
+        "minutes": minutes,
+        "instruments": [
+            {"instrument_key": k, "strike": cached.ids[k][0], "opt_type": cached.ids[k][1], **changes[k]}
+            for k in cached.keys if k in changes
+        ],
     }
+
+
+@app.get("/history/{instrument_key}")
+def history(instrument_key: str, start: int = Query(...), end: Optional[int] = None):
+    """Samples of one instrument between epoch seconds start and end (default now)."""
+    return {"instrument_key": instrument_key, "samples": history_range(instrument_key, start, end or int(time.time()))}
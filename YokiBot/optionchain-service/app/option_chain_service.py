@@ -1,4 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
 
 
 def build_option_chain(
@@ -7,6 +9,7 @@ def build_option_chain(
     instruments: List[Dict[str, Any]],
     snapshot: Dict[str, Any],
     spot: float,
+    prev_oi: Optional[Dict[str, float]] = None,
 ) -> Dict[str, Any]:
     """
     Build normalized option chain snapshot.
@@ -16,46 +19,140 @@ def build_option_chain(
     - No DB writes
     - No WebSocket calls
     - Deterministic output for same input
-    """
 
-    rows: List[Dict[str, Any]] = []
-    total_call_oi = 0
-    total_put_oi = 0
+    Extracts the columns in one pass and delegates to build_option_chain_columnar.
+    """
 
     # Snapshot format contract:
     # snapshot = { "data": { instrument_key: { "market_data": {...} } } }
     data = snapshot.get("data", {})
 
+    keys, strikes, opt_types, ltps, ois, volumes = [], [], [], [], [], []
     for inst in instruments:
         instrument_key = inst["instrument_key"]
-
         md = data.get(instrument_key, {}).get("market_data", {})
 
-        strike = float(inst["strike"])
-        opt_type = inst["opt_type"]  # "CE" or "PE"
+        keys.append(instrument_key)
+        strikes.append(float(inst["strike"]))
+        opt_types.append(inst["opt_type"])  # "CE" or "PE"
+        ltps.append(md.get("last_traded_price"))
+        ois.append(md.get("oi", 0) or 0)
+        volumes.append(md.get("volume", 0) or 0)
+
+    return build_option_chain_columnar(
+        underlying=underlying,
+        expiry=expiry,
+        spot=spot,
+        instrument_keys=keys,
+        strike=strikes,
+        opt_type=opt_types,
+        ltp=ltps,
+        oi=ois,
+        volume=volumes,
+        prev_oi=prev_oi,
+    )
 
-        ltp = md.get("last_traded_price")
-        oi = md.get("oi", 0) or 0
 
-        if opt_type == "CE":
-            total_call_oi += oi
-        elif opt_type == "PE":
-            total_put_oi += oi
+def _max_pain(strikes: np.ndarray, ce_oi: np.ndarray, pe_oi: np.ndarray) -> Optional[float]:
+    """Settlement strike minimizing total intrinsic payout to option holders."""
+    if strikes.size == 0 or not (ce_oi.any() or pe_oi.any()):
+        return None
+    settle = strikes[:, None]
+    payout = (np.maximum(settle - strikes, 0.0) * ce_oi).sum(axis=1) + (np.maximum(strikes - settle, 0.0) * pe_oi).sum(axis=1)
+    return float(strikes[int(np.argmin(payout))])
 
-        rows.append({
-            "instrument_key": instrument_key,
-            "strike": strike,
-            "opt_type": opt_type,
-            "ltp": ltp,
-            "oi": oi,
-        })
 
+def build_option_chain_columnar(
+    underlying: str,
+    expiry: str,
+    spot: float,
+    instrument_keys: Sequence[str],
+    strike: Sequence[float],
+    opt_type: Sequence[str],
+    ltp: Sequence[Optional[float]],
+    oi: Sequence[float],
+    volume: Optional[Sequence[float]] = None,
+    prev_oi: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Columnar chain builder (pure). One vectorized pass over per-contract arrays
+    produces the row list plus:
+      strikes       per-strike CE/PE pairing (ltp, oi, oi_change)
+      pcr           put/call OI ratio (same rounding as before)
+      pcr_volume    put/call volume ratio
+      max_pain      settlement strike with minimum payout to holders
+      atm_strike / atm_straddle  strike nearest spot with both legs priced, CE + PE ltp
+    prev_oi: instrument_key -> OI from the previous snapshot; oi_change is
+    None where there is no previous value.
+    """
+    n = len(instrument_keys)
+    K = np.asarray(strike, dtype=np.float64).reshape(n)
+    types = np.asarray(opt_type, dtype=str).reshape(n)
+    is_call = types == "CE"
+    is_put = types == "PE"
+    px = np.array([np.nan if v is None else v for v in ltp], dtype=np.float64).reshape(n)
+    OI = np.asarray(oi, dtype=np.float64).reshape(n)
+    VOL = np.zeros(n) if volume is None else np.asarray(volume, dtype=np.float64).reshape(n)
+    if prev_oi is not None:
+        prev = np.array([prev_oi.get(k, np.nan) for k in instrument_keys], dtype=np.float64).reshape(n)
+        d_oi = OI - prev
+    else:
+        d_oi = np.full(n, np.nan)
+
+    # ---- per-strike pairing ----
+    uniq, pos = np.unique(K, return_inverse=True)
+    m = uniq.size
+    ce_ltp, pe_ltp = np.full(m, np.nan), np.full(m, np.nan)
+    ce_doi, pe_doi = np.full(m, np.nan), np.full(m, np.nan)
+    ce_ltp[pos[is_call]] = px[is_call]
+    pe_ltp[pos[is_put]] = px[is_put]
+    ce_doi[pos[is_call]] = d_oi[is_call]
+    pe_doi[pos[is_put]] = d_oi[is_put]
+    ce_oi = np.bincount(pos, weights=np.where(is_call, OI, 0.0), minlength=m)
+    pe_oi = np.bincount(pos, weights=np.where(is_put, OI, 0.0), minlength=m)
+
+    # ---- aggregates ----
+    total_call_oi, total_put_oi = float(ce_oi.sum()), float(pe_oi.sum())
+    call_vol, put_vol = float(VOL[is_call].sum()), float(VOL[is_put].sum())
     pcr = round(total_put_oi / total_call_oi, 2) if total_call_oi > 0 else 0.0
+    pcr_volume = round(put_vol / call_vol, 2) if call_vol > 0 else 0.0
+
+    priced = ~np.isnan(ce_ltp) & ~np.isnan(pe_ltp)
+    atm_strike = atm_straddle = None
+    if priced.any():
+        cand = np.flatnonzero(priced)
+        j = cand[int(np.argmin(np.abs(uniq[cand] - spot)))]
+        atm_strike, atm_straddle = float(uniq[j]), float(ce_ltp[j] + pe_ltp[j])
+
+    # ---- rows (source values kept as-is: ltp None when missing) ----
+    rows = [
+        {"instrument_key": k, "strike": s, "opt_type": t, "ltp": p, "oi": o}
+        for k, s, t, p, o in zip(instrument_keys, K.tolist(), opt_type, ltp, oi)
+    ]
+
+    def _opt(values: np.ndarray) -> List[Optional[float]]:
+        return [None if v != v else v for v in values.tolist()]  # NaN -> None
+
+    strikes_out = [
+        {"strike": s, "ce_ltp": cl, "pe_ltp": pl, "ce_oi": co, "pe_oi": po, "ce_oi_change": cd, "pe_oi_change": pd}
+        for s, cl, pl, co, po, cd, pd in zip(
+            uniq.tolist(), _opt(ce_ltp), _opt(pe_ltp), ce_oi.tolist(), pe_oi.tolist(), _opt(ce_doi), _opt(pe_doi)
+        )
+    ]
 
     return {
         "underlying": underlying,
         "expiry": expiry,
         "spot": spot,
         "pcr": pcr,
+        "pcr_volume": pcr_volume,
+        "max_pain": _max_pain(uniq, ce_oi, pe_oi),
+        "atm_strike": atm_strike,
+        "atm_straddle": atm_straddle,
+        "total_call_oi": total_call_oi,
+        "total_put_oi": total_put_oi,
+        "oi_change": {"CE": float(np.nansum(d_oi[is_call])), "PE": float(np.nansum(d_oi[is_put]))}
+        if prev_oi is not None else None,
+        "strikes": strikes_out,
         "instruments": rows,
     }
@@ -0,0 +1,131 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+from yoki_shared.fast_response import EncodedPayload
+
+# Conditional /snapshot responses.
+#   seq       monotonic per process, started at the boot time in ms so a
+#             restarted service never hands out a seq an old client has seen
+#   ETag      "<seq>"; If-None-Match on the current ETag -> 304, no body
+#   since=seq only the instruments whose row changed after seq, plus the keys
+#             that left the window; sent with the weak ETag W/"<seq>-d<since>"
+# A snapshot is rebuilt only when its market-data fingerprint changes; on a
+# quiet market every request is served from the cached serialized bytes.
+# Views are keyed by client query params, so at most MAX_VIEWS are kept (least
+# recently used evicted); an evicted view's clients get a full snapshot next.
+
+MAX_VIEWS = int(os.getenv("SNAPSHOT_MAX_VIEWS", "64"))
+
+
+def market_fingerprint(expiry: str, spot: float, keys: Sequence[str], data: Dict[str, Any]) -> tuple:
+    """Everything a snapshot is built from: window, spot and per-key ltp/oi/volume."""
+    rows = []
+    for key in keys:
+        entry = data.get(key)
+        if entry is None:
+            rows.append(None)
+            continue
+        md = entry.get("market_data", {})
+        rows.append((md.get("last_traded_price"), md.get("oi"), md.get("volume")))
+    return expiry, spot, tuple(keys), tuple(rows)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class SnapshotState:
+    """One published snapshot: payload, its encoded bodies and per-row change seqs."""
+
+    __slots__ = ("seq", "base_seq", "etag", "fingerprint", "payload", "encoded", "rows", "row_seq", "removed")
+
+    def __init__(self, seq: int, base_seq: int, fingerprint: tuple, payload: dict,
+                 rows: Dict[str, dict], row_seq: Dict[str, int], removed: Dict[str, int]):
+        self.seq = seq
+        self.base_seq = base_seq
+        self.etag = f'"{seq}"'
+        self.fingerprint = fingerprint
+        self.payload = payload
+        self.encoded = EncodedPayload(payload)
+        self.rows = rows
+        self.row_seq = row_seq
+        self.removed = removed
+
+    def delta(self, since: int) -> Optional[dict]:
+        """
+        Payload with only the rows changed after `since`; None when `since`
+        predates this lineage (expiry roll, restart) and the client needs the
+        full snapshot.
+        """
+        if since < self.base_seq or since > self.seq:
+            return None
+        return {
+            **self.payload,
+            "delta": True,
+            "since": since,
+            "instruments": [row for key, row in self.rows.items() if self.row_seq[key] > since],
+            "removed": [key for key, seq in self.removed.items() if seq > since],
+        }
+
+
+class SnapshotStore:
+    def __init__(self, seq_start: Optional[int] = None, max_views: int = MAX_VIEWS):
+        self._seq = itertools.count(int(time.time() * 1000) if seq_start is None else seq_start)
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[Hashable, SnapshotState]" = OrderedDict()
+        self.max_views = max_views
+        self.builds = 0
+        self.reused = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable, fingerprint: tuple) -> Optional[SnapshotState]:
+        """Current state when the market data it was built from is unchanged."""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return None
+            self._states.move_to_end(key)
+            if state.fingerprint == fingerprint:
+                self.reused += 1
+                return state
+            return None
+
+    def publish(self, key: Hashable, fingerprint: tuple, payload: dict) -> SnapshotState:
+        """payload["instruments"] rows must carry instrument_key."""
+        with self._lock:
+            seq = next(self._seq)
+            payload = {**payload, "seq": seq}
+            rows = {row["instrument_key"]: row for row in payload["instruments"]}
+            prev = self._states.get(key)
+            if prev is None or prev.payload.get("expiry") != payload.get("expiry"):
+                base_seq = seq
+                row_seq = dict.fromkeys(rows, seq)
+                removed: Dict[str, int] = {}
+            else:
+                base_seq = prev.base_seq
+                row_seq = {k: prev.row_seq[k] if prev.rows.get(k) == row else seq for k, row in rows.items()}
+                removed = {k: s for k, s in prev.removed.items() if k not in rows}
+                removed.update((k, seq) for k in prev.rows if k not in rows)
+            state = SnapshotState(seq, base_seq, fingerprint, payload, rows, row_seq, removed)
+            state.encoded.json()  # encode outside the request that asks for it first
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_views:
+                self._states.popitem(last=False)
+                self.evictions += 1
+            self.builds += 1
+            return state
+
+    def stats(self) -> dict:
+        return {"snapshots": len(self._states), "builds": self.builds, "reused": self.reused,
+                "evictions": self.evictions}
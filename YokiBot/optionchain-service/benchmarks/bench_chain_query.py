@@ -0,0 +1,77 @@
+# bench_chain_query.py - chain lookup latency: covering index + column projection vs SELECT *
+# Run from optionchain-service/: python benchmarks/bench_chain_query.py
+# Loads every NSE_FO option (OPTIDX + OPTSTK) from data/instruments.csv.gz into
+# two scratch DBs: the previous layout/indexes and the current schema.
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.db import CHAIN_SQL, create_instrument_indexes, instruments_ddl
+from app.load_instruments import GZ_PATH, iter_option_rows
+
+N = int(os.getenv("BENCH_N", "2000"))
+
+LEGACY_SQL = "SELECT * FROM instruments WHERE underlying = ? AND expiry = ?"
+
+
+def build(path: str, legacy: bool, rows: list) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute(instruments_ddl())
+    conn.executemany("INSERT OR IGNORE INTO instruments (instrument_key, underlying, segment, instrument_type, "
+                     "strike, opt_type, expiry) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    if legacy:
+        conn.execute("CREATE INDEX idx_inst_underlying ON instruments(underlying)")
+        conn.execute("CREATE INDEX idx_inst_expiry ON instruments(expiry)")
+        conn.execute("CREATE INDEX idx_inst_underlying_expiry ON instruments(underlying, expiry)")
+    else:
+        create_instrument_indexes(conn)
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def legacy_query(conn, u, e):
+    conn.row_factory = sqlite3.Row
+    return [dict(r) for r in conn.execute(LEGACY_SQL, (u, e)).fetchall()]
+
+
+def covering_query(conn, u, e):
+    return [{"instrument_key": k, "strike": s, "opt_type": o} for k, s, o in conn.execute(CHAIN_SQL, (u, e))]
+
+
+def run(label: str, conn, fn, keys, sql) -> None:
+    plan = "; ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, keys[0]))
+    samples = []
+    for u, e in keys:
+        t0 = time.perf_counter()
+        fn(conn, u, e)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    p50 = statistics.median(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"  {label:<9} p50 {p50:8.1f} us  p99 {p99:8.1f} us   plan: {plan}")
+
+
+if __name__ == "__main__":
+    with open(os.path.join(ROOT, GZ_PATH), "rb") as f:
+        rows = list(iter_option_rows(f, underlyings=None, instrument_types=("OPTIDX", "OPTSTK")))
+    chains = sorted({(r[1], r[6]) for r in rows})
+    rng = random.Random(7)
+    keys = [rng.choice(chains) for _ in range(N)]
+    print(f"{len(rows)} NSE_FO options, {len(chains)} (underlying, expiry) chains, {N} lookups")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = build(os.path.join(tmp, "legacy.db"), True, rows)
+        current = build(os.path.join(tmp, "current.db"), False, rows)
+        run("select *", legacy, legacy_query, keys, LEGACY_SQL)
+        run("covering", current, covering_query, keys, CHAIN_SQL)
+        legacy.close()
+        current.close()
@@ -0,0 +1,85 @@
+# bench_load_instruments.py - instrument master load: streaming executemany vs previous loader
+# Run from optionchain-service/: python benchmarks/bench_load_instruments.py
+# Offline: both loaders read the checked-in data/instruments.csv.gz into a scratch DB.
+# Each loader runs in its own process so peak RSS (ru_maxrss) is not shared.
+
+import csv
+import gzip
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GZ = Path(ROOT) / "data" / "instruments.csv.gz"
+
+
+def legacy_load(gz_path: Path) -> int:
+    """Previous loader: whole file in memory, DictReader, one execute per row."""
+    content = gz_path.read_bytes()  # stands in for resp.content
+    copy = Path("data/instruments.csv.gz")
+    copy.write_bytes(content)
+
+    rows = []
+    with gzip.open(copy, "rt", encoding="utf-8", errors="ignore") as f:
+        for row in csv.DictReader(f):
+            if row.get("exchange") != "NSE_FO":
+                continue
+            if row.get("instrument_type") != "OPTIDX":
+                continue
+            if row.get("name") not in ("NIFTY", "BANKNIFTY"):
+                continue
+            rows.append(row)
+
+    conn = sqlite3.connect("data/options.db")
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS instruments (
+        instrument_key TEXT PRIMARY KEY, underlying TEXT, expiry TEXT, strike REAL, opt_type TEXT
+    )
+    """)
+    for r in rows:
+        cur.execute(
+            "INSERT OR IGNORE INTO instruments (instrument_key, underlying, expiry, strike, opt_type) VALUES (?, ?, ?, ?, ?)",
+            (r["instrument_key"], r["name"], r["expiry"], float(r["strike"]), r["option_type"]),
+        )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def child(mode: str) -> None:
+    os.makedirs("data", exist_ok=True)
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        n = legacy_load(GZ)
+    else:
+        from app.load_instruments import load_instruments
+        n = load_instruments(offline=True, path=GZ, today="2000-01-01")["parsed"]
+    dt = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+    print(f"RESULT {n} {dt} {peak_mb}")
+
+
+def run(mode: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), mode], cwd=tmp,
+                             capture_output=True, text=True, check=True).stdout
+    _, n, dt, peak = next(line for line in out.splitlines() if line.startswith("RESULT")).split()
+    n, dt, peak = int(n), float(dt), float(peak)
+    print(f"  {mode:<10} {n:>7} rows  {dt * 1e3:9.1f} ms  {n / dt:10.0f} rows/s  peak RSS {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        child(sys.argv[1])
+    else:
+        print(f"source: {GZ} ({GZ.stat().st_size / 1e6:.1f} MB gz)")
+        for mode in ("legacy", "streaming"):
+            run(mode)
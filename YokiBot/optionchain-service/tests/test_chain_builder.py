@@ -26,3 +26,39 @@ def test_build_option_chain_basic():
     assert chain["spot"] == 100
     assert "pcr" in chain
     assert len(chain["instruments"]) == 2
+
+
+def test_chain_analytics():
+    from app.option_chain_service import build_option_chain_columnar
+
+    chain = build_option_chain_columnar(
+        underlying="NIFTY",
+        expiry="2025-01-30",
+        spot=104,
+        instrument_keys=["c90", "p90", "c100", "p100", "c110", "p110"],
+        strike=[90, 90, 100, 100, 110, 110],
+        opt_type=["CE", "PE", "CE", "PE", "CE", "PE"],
+        ltp=[15, 1, 6, 3, 2, None],
+        oi=[10, 300, 200, 200, 500, 20],
+        volume=[5, 30, 20, 20, 10, 0],
+        prev_oi={"c100": 150, "p100": 260},
+    )
+
+    assert chain["pcr"] == round(520 / 710, 2)
+    assert chain["pcr_volume"] == round(50 / 35, 2)
+    assert chain["max_pain"] == 100.0
+    assert (chain["atm_strike"], chain["atm_straddle"]) == (100.0, 9.0)
+    assert chain["oi_change"] == {"CE": 50.0, "PE": -60.0}
+
+    by_strike = {row["strike"]: row for row in chain["strikes"]}
+    assert by_strike[110.0]["pe_ltp"] is None
+    assert by_strike[100.0]["ce_oi_change"] == 50.0
+    assert by_strike[90.0]["ce_oi_change"] is None
+    assert chain["instruments"][5]["ltp"] is None
+
+
+def test_empty_chain():
+    chain = build_option_chain("NIFTY", "2025-01-30", [], {"data": {}}, spot=100)
+    assert chain["instruments"] == []
+    assert chain["pcr"] == 0.0
+    assert chain["max_pain"] is None
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.data_source import AsyncRestMarketDataSource, RedisMarketDataSource
+from app.instrument_cache import CachedChain
+
+
+async def live_feed(request: httpx.Request) -> httpx.Response:
+    key = request.url.path.rsplit("/", 1)[-1]
+    if key == "slow":
+        await asyncio.sleep(2)
+    if key == "gone":
+        return httpx.Response(404)
+    return httpx.Response(200, json={"last_traded_price": 10, "oi": 100})
+
+
+def test_snapshot_is_concurrent_and_reports_partial():
+    source = AsyncRestMarketDataSource(
+        base_url="http://feed/live", bulk_url="", key_timeout=0.2, deadline=1.0,
+        transport=httpx.MockTransport(live_feed),
+    )
+    keys = [f"k{i}" for i in range(50)] + ["slow", "gone"]
+
+    async def run():
+        t0 = time.perf_counter()
+        result = await source.get_snapshot(keys)
+        await source.aclose()
+        return result, time.perf_counter() - t0
+
+    result, elapsed = asyncio.run(run())
+
+    assert elapsed < 1.0
+    assert len(result["data"]) == 50
+    assert result["data"]["k0"]["market_data"]["oi"] == 100
+    report = result["report"]
+    assert report["partial"] is True
+    assert report["timed_out"] == ["slow"]
+    assert report["errors"] == {"gone": "HTTP 404"}
+    assert sorted(report["missing"]) == ["gone", "slow"]
+
+
+def test_bulk_mode_batches_keys():
+    seen = []
+
+    def bulk(request: httpx.Request) -> httpx.Response:
+        keys = request.url.params["keys"].split(",")
+        seen.append(len(keys))
+        return httpx.Response(200, json={"data": {k: {"last_traded_price": 1} for k in keys}})
+
+    source = AsyncRestMarketDataSource(bulk_url="http://feed/live/bulk", bulk_batch=40,
+                                       transport=httpx.MockTransport(bulk))
+    result = asyncio.run(source.get_snapshot([f"k{i}" for i in range(100)]))
+
+    assert sorted(seen) == [20, 40, 40]
+    assert result["report"]["received"] == 100
+    assert result["report"]["partial"] is False
+
+
+class FakeRedis:
+    def __init__(self, values):
+        self.values = values
+
+    async def get(self, key):
+        return self.values.get(key)
+
+
+def redis_chain():
+    return CachedChain("NIFTY", "2025-01-30", [
+        {"instrument_key": "ce", "strike": 22000.0, "opt_type": "CE"},
+        {"instrument_key": "pe", "strike": 22000.0, "opt_type": "PE"},
+        {"instrument_key": "far", "strike": 25000.0, "opt_type": "CE"},
+    ])
+
+
+def test_redis_source_maps_strikes_and_falls_back_to_last_good():
+    snap = {
+        "symbol": "NIFTY", "expiry": "2025-01-30", "timestamp": int(time.time()),
+        "strikes": {"22000": {"CE": {"ltp": 101.5, "oi": 10, "volume": 5}, "PE": {"ltp": 99.0, "oi": 20, "volume": 7}}},
+    }
+    source = RedisMarketDataSource(client=FakeRedis({"optionchain:last_good:NIFTY:2025-01-30": json.dumps(snap)}))
+    chain = redis_chain()
+
+    result = asyncio.run(source.get_snapshot(chain.keys, chain=chain))
+
+    assert result["data"]["ce"]["market_data"] == {"last_traded_price": 101.5, "oi": 10, "volume": 5}
+    assert result["data"]["pe"]["market_data"]["oi"] == 20
+    assert result["report"]["source"] == "last_good"
+    assert result["report"]["missing"] == ["far"]
+
+
+def test_redis_source_reports_corrupt_snapshot_instead_of_raising():
+    chain = redis_chain()
+    for raw in ["{not json", "[1, 2]", json.dumps({"strikes": {"22k": {}}}), json.dumps({"strikes": {"22000": ["CE"]}})]:
+        source = RedisMarketDataSource(client=FakeRedis({"optionchain:NIFTY:2025-01-30": raw}))
+
+        result = asyncio.run(source.get_snapshot(chain.keys, chain=chain))
+
+        assert result["data"] == {}
+        assert result["report"]["partial"] is True
+        assert sorted(result["report"]["errors"]) == sorted(chain.keys)
+        assert result["report"]["errors"]["ce"].startswith("corrupt live snapshot")
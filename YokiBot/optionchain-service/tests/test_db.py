@@ -1,5 +1,9 @@
-from app.db import init_db
+from app.db import (
+    init_db, get_instruments_from_db, get_expiries_for_underlying,
+    read_pool, db_stats, CHAIN_SQL, SCHEMA_VERSION,
+)
 import os
+import sqlite3
 
 def test_db_init_creates_file(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
@@ -10,3 +14,75 @@ def test_db_init_creates_file(tmp_path, monkeypatch):
     init_db()
 
     assert os.path.exists("data/options.db")
+
+
+def test_migrates_legacy_loader_table(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+
+    # layout created by the old load_instruments.init_instruments_table
+    conn = sqlite3.connect("data/options.db")
+    conn.execute("""
+    CREATE TABLE instruments (
+        instrument_key TEXT PRIMARY KEY, underlying TEXT, expiry TEXT, strike REAL, opt_type TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX idx_inst_underlying ON instruments(underlying)")
+    conn.execute("INSERT INTO instruments VALUES ('k1', 'NIFTY', '2025-01-30', 22000, 'CE')")
+    conn.commit()
+    conn.close()
+
+    init_db()
+
+    conn = sqlite3.connect("data/options.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    row = conn.execute("SELECT segment, instrument_type FROM instruments").fetchone()
+    assert row == ("NSE_FO", "OPTIDX")
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    assert indexes == {"idx_inst_chain"}
+    conn.close()
+
+    assert get_instruments_from_db("NIFTY", "2025-01-30") == [
+        {"instrument_key": "k1", "strike": 22000.0, "opt_type": "CE"}
+    ]
+
+
+def test_chain_query_is_index_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    conn = sqlite3.connect("data/options.db")
+    plan = " ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + CHAIN_SQL, ("NIFTY", "2025-01-30")))
+    conn.close()
+    assert "COVERING INDEX idx_inst_chain" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_read_pool_reuses_connections(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    for _ in range(5):
+        get_expiries_for_underlying("NIFTY")
+        get_instruments_from_db("NIFTY", "2025-01-30")
+
+    stats = db_stats()
+    assert stats["pool"]["open"] == 1
+    assert stats["queries"]["expiries"]["calls"] == 5
+    assert stats["queries"]["chain"]["calls"] == 5
+
+
+def test_read_connections_are_query_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    with read_pool().connection() as conn:
+        try:
+            conn.execute("DELETE FROM instruments")
+            raised = False
+        except sqlite3.OperationalError:
+            raised = True
+    assert raised
@@ -0,0 +1,86 @@
+from app.db import init_db
+from app.history import (
+    SnapshotHistoryWriter, history_range, oi_change, prune_partitions, existing_partitions, partition_for,
+)
+import os
+import sqlite3
+import time
+
+T0 = int(time.time()) - 600  # inside the retention window
+
+
+def open_writer_conn():
+    conn = sqlite3.connect("data/options.db", isolation_level=None)
+    return conn
+
+
+def test_batched_writes_and_oi_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    writer = SnapshotHistoryWriter(db_path="data/options.db")
+    conn = open_writer_conn()
+    writer.write_batch(conn, [
+        (T0, [("NSE_FO|1", 100.0, 1000, 5), ("NSE_FO|2", 80.0, 500, 1)]),
+        (T0 + 300, [("NSE_FO|1", 104.0, 1300, 9), ("NSE_FO|2", 78.0, 450, 2)]),
+    ])
+    conn.close()
+
+    changes = oi_change(["NSE_FO|1", "NSE_FO|2", "NSE_FO|3"], minutes=5, now=T0 + 300)
+    assert changes == {
+        "NSE_FO|1": {"oi": 1300, "oi_before": 1000, "change": 300},
+        "NSE_FO|2": {"oi": 450, "oi_before": 500, "change": -50},
+    }
+
+    samples = history_range("NSE_FO|1", T0, T0 + 60)
+    assert samples == [{"ts": T0, "ltp": 100.0, "oi": 1000, "volume": 5}]
+
+
+def test_oi_lookup_is_a_range_scan(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    writer = SnapshotHistoryWriter(db_path="data/options.db")
+    conn = open_writer_conn()
+    writer.write_batch(conn, [(T0, [("NSE_FO|1", 1.0, 1, 1)])])
+    part = partition_for(T0)
+    plan = " ".join(r[-1] for r in conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT oi FROM {part} WHERE instrument_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+        (1, T0),
+    ))
+    conn.close()
+    assert f"SEARCH {part} USING PRIMARY KEY (instrument_id=? AND ts<?)" in plan
+
+
+def test_retention_drops_old_partitions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    conn = open_writer_conn()
+    writer = SnapshotHistoryWriter(db_path="data/options.db", retention_days=30)
+    old = T0 - 10 * 86400
+    writer.write_batch(conn, [(old, [("NSE_FO|1", 1.0, 1, 1)]), (T0, [("NSE_FO|1", 1.0, 2, 1)])])
+    assert existing_partitions(conn) == [partition_for(old), partition_for(T0)]
+
+    dropped = prune_partitions(conn, retention_days=5, now=T0)
+    assert dropped == [partition_for(old)]
+    assert existing_partitions(conn) == [partition_for(T0)]
+    conn.close()
+
+
+def test_background_writer_flushes_on_stop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    init_db()
+
+    writer = SnapshotHistoryWriter(db_path="data/options.db", flush_seconds=0.05)
+    writer.start()
+    for i in range(10):
+        writer.submit(T0 + i, [("NSE_FO|1", 100.0 + i, 1000 + i, i)])
+    writer.stop()
+
+    assert writer.rows_written == 10
+    assert len(history_range("NSE_FO|1", T0, T0 + 9)) == 10
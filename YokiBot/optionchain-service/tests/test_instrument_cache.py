@@ -0,0 +1,60 @@
+from app.instrument_cache import CachedChain, InstrumentCache, bump_generation
+
+
+def make_cache(tmp_path, calls):
+    def load_expiries(underlying):
+        calls.append(("expiries", underlying))
+        return ["2025-02-27", "2025-01-30"]
+
+    def load_chain(underlying, expiry):
+        calls.append(("chain", underlying, expiry))
+        return [
+            {"instrument_key": "3", "strike": 22100.0, "opt_type": "CE"},
+            {"instrument_key": "1", "strike": 22000.0, "opt_type": "CE"},
+            {"instrument_key": "2", "strike": 22000.0, "opt_type": "PE"},
+        ]
+
+    return InstrumentCache(load_expiries, load_chain, tmp_path / "gen", check_interval=0)
+
+
+def test_cache_serves_repeat_calls_without_loading(tmp_path):
+    calls = []
+    cache = make_cache(tmp_path, calls)
+
+    for _ in range(3):
+        assert cache.nearest_expiry("NIFTY", today="2025-01-31") == "2025-02-27"
+        chain = cache.chain("NIFTY", "2025-02-27")
+
+    assert calls == [("expiries", "NIFTY"), ("chain", "NIFTY", "2025-02-27")]
+    assert chain.strikes == [22000.0, 22100.0]
+    assert [inst["strike"] for inst in chain.instruments] == [22000.0, 22000.0, 22100.0]
+    assert cache.nearest_expiry("NIFTY", today="2025-03-01") is None
+
+
+def test_generation_bump_invalidates(tmp_path):
+    calls = []
+    cache = make_cache(tmp_path, calls)
+    cache.chain("NIFTY", "2025-01-30")
+
+    assert bump_generation(tmp_path / "gen") == 1
+    cache.chain("NIFTY", "2025-01-30")
+
+    assert cache.generation == 1
+    assert calls.count(("chain", "NIFTY", "2025-01-30")) == 2
+
+
+def test_chain_window_slices_around_spot():
+    instruments = [
+        {"instrument_key": f"{k}{t}", "strike": float(k), "opt_type": t}
+        for k in range(21000, 23050, 50) for t in ("CE", "PE")
+    ]
+    chain = CachedChain("NIFTY", "2025-01-30", instruments)
+
+    start, end = chain.window(22012.0, strikes=2)
+    assert [i["strike"] for i in chain.instruments[start:end]][::2] == [21900.0, 21950.0, 22000.0, 22050.0, 22100.0]
+
+    start, end = chain.window(22012.0, points=100)
+    assert {i["strike"] for i in chain.instruments[start:end]} == {21950.0, 22000.0, 22050.0, 22100.0}
+
+    assert chain.window(22012.0) == (0, len(instruments))
+    assert chain.window(30000.0, strikes=1)[1] == len(instruments)
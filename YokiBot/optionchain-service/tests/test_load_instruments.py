@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import os
+import sqlite3
+
+from app.load_instruments import iter_option_rows, load_instruments
+
+HEADER = ["instrument_key", "exchange_token", "tradingsymbol", "name", "last_price", "expiry",
+          "strike", "tick_size", "lot_size", "instrument_type", "option_type", "exchange"]
+
+
+def write_master(path, rows):
+    buf = io.StringIO()
+    w = csv.writer(buf, quoting=csv.QUOTE_ALL)
+    w.writerow(HEADER)
+    w.writerows(rows)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(buf.getvalue())
+
+
+ROWS = [
+    ["NSE_FO|1", "1", "NIFTY25JAN22000CE", "NIFTY", "0", "2025-01-30", "22000.0", "0.05", "75", "OPTIDX", "CE", "NSE_FO"],
+    ["NSE_FO|2", "2", "NIFTY25JAN22000PE", "NIFTY", "0", "2025-01-30", "22000.0", "0.05", "75", "OPTIDX", "PE", "NSE_FO"],
+    ["NSE_FO|3", "3", "FINNIFTY25JAN22000CE", "FINNIFTY", "0", "2025-01-30", "22000.0", "0.05", "65", "OPTIDX", "CE", "NSE_FO"],
+    ["NSE_FO|4", "4", "NIFTY25JANFUT", "NIFTY", "0", "2025-01-30", "", "0.05", "75", "FUTIDX", "", "NSE_FO"],
+    ["BSE_EQ|5", "5", "X", "NIFTY", "0", "", "", "0.01", "1", "EQUITY", "", "BSE_EQ"],
+]
+
+
+def test_iter_option_rows_filters_raw_fields(tmp_path):
+    path = tmp_path / "m.csv.gz"
+    write_master(path, ROWS)
+
+    with open(path, "rb") as f:
+        rows = list(iter_option_rows(f))
+
+    assert rows == [
+        ("NSE_FO|1", "NIFTY", "NSE_FO", "OPTIDX", 22000.0, "CE", "2025-01-30"),
+        ("NSE_FO|2", "NIFTY", "NSE_FO", "OPTIDX", 22000.0, "PE", "2025-01-30"),
+    ]
+
+
+def test_load_instruments_offline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    write_master("data/instruments.csv.gz", ROWS)
+
+    report = load_instruments(offline=True, today="2025-01-01")
+    assert report["rows"] == 2
+
+    conn = sqlite3.connect("data/options.db")
+    assert conn.execute("SELECT COUNT(*) FROM instruments").fetchone()[0] == 2
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_refresh_prunes_expired_and_swaps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data", exist_ok=True)
+    write_master("data/instruments.csv.gz", ROWS)
+    load_instruments(offline=True, today="2025-01-01")
+
+    # reader holding a snapshot of the old table while the refresh runs
+    reader = sqlite3.connect("data/options.db", isolation_level=None)
+    reader.execute("BEGIN")
+    assert reader.execute("SELECT COUNT(*) FROM instruments").fetchone()[0] == 2
+
+    next_month = ["NSE_FO|9"] + ROWS[0][1:5] + ["2025-02-27"] + ROWS[0][6:]
+    write_master("data/instruments.csv.gz", ROWS + [next_month])
+    report = load_instruments(offline=True, today="2025-02-01")
+
+    assert reader.execute("SELECT COUNT(*) FROM instruments").fetchone()[0] == 2
+    reader.execute("COMMIT")
+
+    assert (report["rows"], report["parsed"], report["pruned_expired"], report["previous_rows"]) == (1, 3, 2, 2)
+    keys = [r[0] for r in reader.execute("SELECT instrument_key FROM instruments")]
+    assert keys == ["NSE_FO|9"]
+    names = {r[0] for r in reader.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_inst_chain" in names
+    reader.close()
@@ -0,0 +1,63 @@
+import json
+
+from app.snapshot_store import SnapshotStore, etag_matches, market_fingerprint
+
+KEYS = ["NSE_FO|1", "NSE_FO|2", "NSE_FO|3"]
+
+
+def payload(rows, expiry="2025-01-30"):
+    return {"underlying": "NIFTY", "expiry": expiry, "spot": 22000.0, "instruments": rows}
+
+
+def row(key, ltp, oi=100):
+    return {"instrument_key": key, "strike": 22000.0, "opt_type": "CE", "ltp": ltp, "oi": oi}
+
+
+def test_unchanged_market_data_reuses_cached_body():
+    store = SnapshotStore(seq_start=1)
+    data = {k: {"market_data": {"last_traded_price": 10, "oi": 100}} for k in KEYS}
+    fp = market_fingerprint("2025-01-30", 22000.0, KEYS, data)
+
+    assert store.lookup("NIFTY", fp) is None
+    state = store.publish("NIFTY", fp, payload([row(k, 10) for k in KEYS]))
+
+    same = market_fingerprint("2025-01-30", 22000.0, KEYS, {k: dict(v) for k, v in data.items()})
+    assert store.lookup("NIFTY", same) is state
+    assert json.loads(state.encoded.json())["seq"] == 1
+    assert etag_matches(state.etag, state.etag)
+    assert etag_matches('W/"7", ' + state.etag, state.etag)
+    assert not etag_matches('"0"', state.etag)
+
+    data["NSE_FO|2"]["market_data"]["oi"] = 101
+    assert store.lookup("NIFTY", market_fingerprint("2025-01-30", 22000.0, KEYS, data)) is None
+
+
+def test_delta_since_seq_has_changed_and_removed_rows_only():
+    store = SnapshotStore(seq_start=1)
+    first = store.publish("NIFTY", ("a",), payload([row(k, 10) for k in KEYS]))
+    store.publish("NIFTY", ("b",), payload([row("NSE_FO|1", 10), row("NSE_FO|2", 11), row("NSE_FO|3", 10)]))
+    third = store.publish("NIFTY", ("c",), payload([row("NSE_FO|1", 10), row("NSE_FO|2", 11), row("NSE_FO|4", 5)]))
+
+    delta = third.delta(first.seq)
+    assert delta["delta"] is True and delta["seq"] == 3
+    assert [r["instrument_key"] for r in delta["instruments"]] == ["NSE_FO|2", "NSE_FO|4"]
+    assert delta["removed"] == ["NSE_FO|3"]
+
+    assert third.delta(2)["instruments"] == [row("NSE_FO|4", 5)]
+    assert third.delta(3)["instruments"] == [] and third.delta(3)["removed"] == []
+    assert third.delta(0) is None   # older than this lineage -> full snapshot
+
+    rolled = store.publish("NIFTY", ("d",), payload([row("NSE_FO|9", 1)], expiry="2025-02-06"))
+    assert rolled.delta(third.seq) is None
+
+
+def test_views_beyond_max_are_evicted_least_recently_used_first():
+    store = SnapshotStore(seq_start=1, max_views=2)
+    a = store.publish(("NIFTY", None, 100.0), ("a",), payload([row("NSE_FO|1", 10)]))
+    store.publish(("NIFTY", None, 200.0), ("b",), payload([row("NSE_FO|1", 10)]))
+    assert store.lookup(("NIFTY", None, 100.0), ("a",)) is a   # touch: 200.0 is now the oldest
+    store.publish(("NIFTY", None, 300.5), ("c",), payload([row("NSE_FO|1", 10)]))
+
+    assert store.lookup(("NIFTY", None, 200.0), ("b",)) is None
+    assert store.lookup(("NIFTY", None, 100.0), ("a",)) is a
+    assert store.stats() == {"snapshots": 2, "builds": 3, "reused": 2, "evictions": 1}
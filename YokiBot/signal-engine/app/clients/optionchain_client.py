@@ -1,28 +1,76 @@
 # app/clients/optionchain_client.py
 import os
 import requests
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from app.engine.models import DecideRequest, Instrument
-from app.config import OPTIONCHAIN_SERVICE_URL
+from app.config import OPTIONCHAIN_SERVICE_URL, SNAPSHOT_ATM_POINTS
 
 TIMEOUT = 3  # seconds
 DEFAULT_UNDERLYING = os.getenv("DEFAULT_UNDERLYING", "NIFTY")
 
 
+class _CachedSnapshot:
+    """Last snapshot per underlying: its ETag / seq and rows by instrument_key."""
+
+    __slots__ = ("etag", "seq", "rows", "request")
+
+    def __init__(self, etag: Optional[str], seq: Optional[int],
+                 rows: Dict[Any, Dict[str, Any]], request: DecideRequest):
+        self.etag = etag
+        self.seq = seq
+        self.rows = rows
+        self.request = request
+
+
+_cache: Dict[str, _CachedSnapshot] = {}
+
+
+def _instrument(i: Dict[str, Any]) -> Instrument:
+    # Basic defensive extraction - will raise if required keys missing
+    strike = i.get("strike")
+    opt_type = i.get("opt_type")
+    ltp = i.get("ltp")
+    oi = i.get("oi", 0)
+
+    if strike is None or opt_type is None or ltp is None:
+        # If the snapshot contains incomplete rows, fail-fast
+        raise ValueError(f"Incomplete instrument data in snapshot: {i}")
+
+    return Instrument(
+        strike=float(strike),
+        opt_type=str(opt_type),
+        ltp=float(ltp),
+        oi=float(oi) if oi is not None else 0.0
+    )
+
+
 def fetch_optionchain(underlying: str | None = None) -> DecideRequest:
     """
     Fetches normalized snapshot from optionchain-service and converts it into
     a DecideRequest for the signal engine.
 
-    - Calls: {OPTIONCHAIN_SERVICE_URL}/snapshot/{underlying}
+    - Calls: {OPTIONCHAIN_SERVICE_URL}/snapshot/{underlying}?atm_points=SNAPSHOT_ATM_POINTS
+    - Conditional: sends If-None-Match / since=<seq> of the last snapshot. A 304
+      returns the cached DecideRequest without parsing anything; a delta
+      response is merged into the cached rows.
     - Raises HTTP/requests exceptions on network error or non-2xx.
     - Raises ValueError on malformed response.
     """
     u = (underlying or DEFAULT_UNDERLYING).upper()
     url = f"{OPTIONCHAIN_SERVICE_URL.rstrip('/')}/snapshot/{u}"
 
-    resp = requests.get(url, timeout=TIMEOUT)
+    params: Dict[str, Any] = {"atm_points": SNAPSHOT_ATM_POINTS} if SNAPSHOT_ATM_POINTS > 0 else {}
+    headers = {}
+    cached = _cache.get(u)
+    if cached is not None and cached.seq is not None:
+        params["since"] = cached.seq
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+
+    resp = requests.get(url, params=params or None, headers=headers, timeout=TIMEOUT)
+    if resp.status_code == 304 and cached is not None:
+        return cached.request
     resp.raise_for_status()
     data: Dict[str, Any] = resp.json()
 
@@ -36,31 +84,26 @@ def fetch_optionchain(underlying: str | None = None) -> DecideRequest:
     if "spot" not in data:
         raise ValueError("Invalid snapshot: missing spot")
 
-    # Build Instrument list expected by Evaluate function
-    instruments = []
+    delta = bool(data.get("delta")) and cached is not None
+    rows = dict(cached.rows) if delta else {}
+    for key in data.get("removed", []) if delta else ():
+        rows.pop(key, None)
     for i in data["instruments"]:
-        # Basic defensive extraction - will raise if required keys missing
-        strike = i.get("strike")
-        opt_type = i.get("opt_type")
-        ltp = i.get("ltp")
-        oi = i.get("oi", 0)
-
-        if strike is None or opt_type is None or ltp is None:
-            # If the snapshot contains incomplete rows, fail-fast
-            raise ValueError(f"Incomplete instrument data in snapshot: {i}")
-
-        instruments.append(
-            Instrument(
-                strike=float(strike),
-                opt_type=str(opt_type),
-                ltp=float(ltp),
-                oi=float(oi) if oi is not None else 0.0
-            )
-        )
-
-    return DecideRequest(
+        rows[i.get("instrument_key") or (i.get("strike"), i.get("opt_type"))] = i
+
+    # Build Instrument list expected by Evaluate function (service order: strike, CE before PE)
+    ordered = sorted(rows.values(), key=lambda i: (float(i.get("strike") or 0), str(i.get("opt_type"))))
+    instruments = [_instrument(i) for i in ordered]
+
+    request = DecideRequest(
         underlying=data.get("underlying", u),
         expiry=data.get("expiry", ""),   # optional; can be empty string
         spot=float(data["spot"]),
         instruments=instruments
     )
+    etag = resp.headers.get("ETag")
+    if delta and data.get("seq") is not None:
+        # the delta's own ETag validates only that delta; merged, we hold the full snapshot at seq
+        etag = f'"{data["seq"]}"'
+    _cache[u] = _CachedSnapshot(etag, data.get("seq"), rows, request)
+    return request
@@ -0,0 +1,60 @@
+# app/clients/tick_listener.py
+"""
+Feeds the indicator engine from the live feed's tick channel.
+
+The live feed publishes {"security_id", "ltp", "ts"[, "volume"]} on
+TICK_CHANNEL for every index tick; security ids map to underlyings through
+UNDERLYING_SECURITY_IDS. Runs on a daemon thread and resubscribes after
+Redis errors.
+"""
+
+import json
+import threading
+from typing import Optional
+
+from app.config import TICK_CHANNEL, UNDERLYING_SECURITY_IDS
+from app.core.indicators import IndicatorEngine, indicator_engine
+from app.redis_client import redis_client
+
+RETRY_SECONDS = 5
+
+
+class TickListener(threading.Thread):
+    def __init__(self, engine: IndicatorEngine = indicator_engine, client=redis_client, channel: str = TICK_CHANNEL):
+        super().__init__(name="tick-listener", daemon=True)
+        self.engine = engine
+        self.client = client
+        self.channel = channel
+        self.underlyings = {sid: sym for sym, sid in UNDERLYING_SECURITY_IDS.items()}
+        self._stop_event = threading.Event()
+
+    def handle(self, data) -> Optional[str]:
+        """Apply one tick message; returns the underlying it updated."""
+        try:
+            tick = json.loads(data)
+            underlying = self.underlyings.get(str(tick["security_id"]))
+            if underlying is None:
+                return None
+            self.engine.on_tick(underlying, float(tick["ltp"]), float(tick.get("volume") or 0.0), tick.get("ts"))
+            return underlying
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while not self._stop_event.is_set():
+                    # timeout so stop() is seen without a message arriving
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.handle(message["data"])
+            except Exception as e:
+                print(f"[TICK LISTENER] {e}; retrying in {RETRY_SECONDS}s")
+                self._stop_event.wait(RETRY_SECONDS)
+            finally:
+                pubsub.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -5,6 +5,8 @@ load_dotenv()
 
 # Service config
 OPTIONCHAIN_SERVICE_URL = os.getenv("OPTIONCHAIN_SERVICE_URL", "http://127.0.0.1:8000")
+# Snapshot window in points each side of spot; covers the widest short + hedge distance. 0 = full chain
+SNAPSHOT_ATM_POINTS = float(os.getenv("SNAPSHOT_ATM_POINTS", "1000"))
 ALERT_WEBHOOK = os.getenv("ALERT_WEBHOOK", "http://127.0.0.1:9000/alerts")
 
 # Capital & Risk
@@ -12,6 +14,14 @@ WORKING_CAPITAL = int(os.getenv("WORKING_CAPITAL", "50000"))
 BACKUP_CAPITAL = int(os.getenv("BACKUP_CAPITAL", "15000"))
 MAX_RISK_PER_TRADE = int(os.getenv("MAX_RISK_PER_TRADE", "1750"))  # per trade risk cap
 MONTHLY_LOSS_LIMIT = int(os.getenv("MONTHLY_LOSS_LIMIT", "5000"))
+# Redis key holding realised P&L month to date (₹, negative = loss) for the
+# monthly loss guard. Nothing in this repo writes it (nor pnl:today for the
+# daily filter): the execution / ledger side must SET it on every fill and
+# reset it at month start.
+MONTHLY_PNL_KEY = os.getenv("MONTHLY_PNL_KEY", "pnl:month")
+# 1: an unset MONTHLY_PNL_KEY rejects trades (MONTHLY_PNL_MISSING).
+# 0: explicitly run without the monthly loss limit while no ledger writes it.
+MONTHLY_PNL_REQUIRED = os.getenv("MONTHLY_PNL_REQUIRED", "1") == "1"
 
 # Strategy thresholds
 ADX_TREND = int(os.getenv("ADX_TREND", "30"))
@@ -30,5 +40,30 @@ PREMIUM_THRESHOLD = int(os.getenv("PREMIUM_THRESHOLD", "50"))
 # Charges for simulation (brokerage, STT, exchange costs etc.)
 SIMULATED_CHARGES = int(os.getenv("SIMULATED_CHARGES", "250"))
 
-# ATR Filter for early rejection
-ATR_K = float(os.getenv("ATR_K", "1.0"))
+# Strategy router: threads evaluating eligible strategies side by side.
+# 1 evaluates them in turn: the built-in strategies take ~20us each and hold
+# the GIL, less than a thread pool hand-off costs (benchmarks/bench_decide.py)
+STRATEGY_WORKERS = int(os.getenv("STRATEGY_WORKERS", "1"))
+
+# Live indicators (app/core/indicators.py) from the live feed's tick channel
+TICK_CHANNEL = os.getenv("TICK_CHANNEL", "live:ticks")
+TICK_LISTENER = os.getenv("TICK_LISTENER", "1") == "1"
+UNDERLYING_SECURITY_IDS = {
+    sym: sid
+    for sym, sid in (p.split(":", 1) for p in os.getenv("UNDERLYING_SECURITY_IDS", "NIFTY:13,BANKNIFTY:25").split(",") if ":" in p)
+}
+STRIKE_STEPS = {
+    sym: int(step)
+    for sym, step in (p.split(":", 1) for p in os.getenv("STRIKE_STEPS", "NIFTY:50,BANKNIFTY:100").split(",") if ":" in p)
+}
+INDICATOR_PERIOD = int(os.getenv("INDICATOR_PERIOD", "14"))    # Wilder period for RSI / ATR / ADX
+INDICATOR_BARS = os.getenv("INDICATOR_BARS", "5m")             # bars feeding MarketState: 1m or 5m
+INDICATOR_HISTORY = int(os.getenv("INDICATOR_HISTORY", "375"))  # closed bars kept per timeframe
+
+# Scenario risk (spot x IV x decay grid in app/engine/scenario_engine.py)
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))
+# time to expiry basis (yoki_shared.expiry_calendar): calendar or trading; same
+# variable as greeks-service and live_feed so all three price the same T
+GREEKS_TIME_MODE = os.getenv("GREEKS_TIME_MODE", "calendar")
+ES_ALPHA = float(os.getenv("ES_ALPHA", "0.05"))  # expected-shortfall tail probability
+MAX_EXPECTED_SHORTFALL = int(os.getenv("MAX_EXPECTED_SHORTFALL", "1200"))
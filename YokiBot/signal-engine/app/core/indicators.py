@@ -0,0 +1,253 @@
+"""
+Streaming indicators over the live tick stream, O(1) per tick.
+
+Per underlying:
+  VWAP        running sum(price * volume) / sum(volume) for the IST session;
+              None while the session has seen no volume (index ticks carry none)
+  1m / 5m     BarBuilders close a bar on the first tick of the next bucket;
+              closed bars go to a fixed-size ring buffer (deque maxlen)
+  RSI / ATR / ADX   Wilder smoothing, updated once per closed bar (no history
+              rescans); seeded with the plain mean of the first `period` values
+
+After every tick the underlying's MarketState snapshot is rebuilt and swapped
+in whole, so readers (/decide) get it with one dict lookup and no lock.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from datetime import datetime
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import INDICATOR_BARS, INDICATOR_HISTORY, INDICATOR_PERIOD, STRIKE_STEPS
+from app.core.market_state import IST, MarketState, time_block
+
+TIMEFRAMES = {"1m": 60, "5m": 300}
+
+
+class Bar:
+    __slots__ = ("start", "open", "high", "low", "close", "volume")
+
+    def __init__(self, start: float, price: float, volume: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+
+    def as_dict(self) -> dict:
+        return {s: getattr(self, s) for s in self.__slots__}
+
+
+class BarBuilder:
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.bar: Optional[Bar] = None
+
+    def update(self, ts: float, price: float, volume: float = 0.0) -> Optional[Bar]:
+        """Add a tick; returns the bar it closed, if any."""
+        start = ts - ts % self.seconds
+        bar = self.bar
+        if bar is None or start > bar.start:
+            self.bar = Bar(start, price, volume)
+            return bar
+        # same bucket (or a late tick): fold into the forming bar
+        bar.high = max(bar.high, price)
+        bar.low = min(bar.low, price)
+        bar.close = price
+        bar.volume += volume
+        return None
+
+
+class Wilder:
+    """Wilder's moving average: mean of the first `period` values, then avg += (x - avg) / period."""
+
+    __slots__ = ("period", "value", "_n", "_sum")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.value: Optional[float] = None
+        self._n = 0
+        self._sum = 0.0
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is not None:
+            self.value += (x - self.value) / self.period
+        else:
+            self._n += 1
+            self._sum += x
+            if self._n == self.period:
+                self.value = self._sum / self.period
+        return self.value
+
+
+class RSI:
+    def __init__(self, period: int):
+        self.gain, self.loss = Wilder(period), Wilder(period)
+        self.prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, bar: Bar) -> Optional[float]:
+        if self.prev_close is not None:
+            change = bar.close - self.prev_close
+            gain, loss = self.gain.update(max(change, 0.0)), self.loss.update(max(-change, 0.0))
+            if gain is not None:
+                if loss:
+                    self.value = 100.0 - 100.0 / (1.0 + gain / loss)
+                else:
+                    self.value = 100.0 if gain else 50.0
+        self.prev_close = bar.close
+        return self.value
+
+
+class ATR:
+    def __init__(self, period: int):
+        self.tr = Wilder(period)
+        self.prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, bar: Bar) -> Optional[float]:
+        tr = bar.high - bar.low
+        if self.prev_close is not None:
+            tr = max(tr, abs(bar.high - self.prev_close), abs(bar.low - self.prev_close))
+        self.value = self.tr.update(tr)
+        self.prev_close = bar.close
+        return self.value
+
+
+class ADX:
+    """
+    Wilder ADX: +DM / -DM / TR smoothed over `period` bars give +DI / -DI and
+    DX; ADX is DX smoothed again, so it is known after about 2 * period bars.
+    """
+
+    def __init__(self, period: int):
+        self.tr, self.plus_dm, self.minus_dm = Wilder(period), Wilder(period), Wilder(period)
+        self.dx = Wilder(period)
+        self.prev: Optional[Bar] = None
+        self.plus_di: Optional[float] = None
+        self.minus_di: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, bar: Bar) -> Optional[float]:
+        prev, self.prev = self.prev, bar
+        if prev is None:
+            return None
+        up, down = bar.high - prev.high, prev.low - bar.low
+        tr = self.tr.update(max(bar.high - bar.low, abs(bar.high - prev.close), abs(bar.low - prev.close)))
+        pdm = self.plus_dm.update(up if up > down and up > 0 else 0.0)
+        mdm = self.minus_dm.update(down if down > up and down > 0 else 0.0)
+        if tr is None:
+            return None
+        self.plus_di = 100.0 * pdm / tr if tr else 0.0
+        self.minus_di = 100.0 * mdm / tr if tr else 0.0
+        di_sum = self.plus_di + self.minus_di
+        self.value = self.dx.update(100.0 * abs(self.plus_di - self.minus_di) / di_sum if di_sum else 0.0)
+        return self.value
+
+
+class Timeframe:
+    """One bar size: builder, ring buffer of closed bars and the bar indicators."""
+
+    def __init__(self, seconds: int, period: int = INDICATOR_PERIOD, history: int = INDICATOR_HISTORY):
+        self.builder = BarBuilder(seconds)
+        self.bars: Deque[Bar] = deque(maxlen=history)
+        self.rsi, self.atr, self.adx = RSI(period), ATR(period), ADX(period)
+
+    def update(self, ts: float, price: float, volume: float) -> None:
+        closed = self.builder.update(ts, price, volume)
+        if closed is not None:
+            self.bars.append(closed)
+            self.rsi.update(closed)
+            self.atr.update(closed)
+            self.adx.update(closed)
+
+    def snapshot(self) -> dict:
+        return {
+            "rsi": self.rsi.value,
+            "atr": self.atr.value,
+            "adx": self.adx.value,
+            "plus_di": self.adx.plus_di,
+            "minus_di": self.adx.minus_di,
+            "bars": len(self.bars),
+            "last_bar": self.bars[-1].as_dict() if self.bars else None,
+        }
+
+
+class UnderlyingIndicators:
+    def __init__(self, underlying: str):
+        self.underlying = underlying
+        self.step = STRIKE_STEPS.get(underlying, 50)
+        self.timeframes = {name: Timeframe(seconds) for name, seconds in TIMEFRAMES.items()}
+        self.session: Optional[str] = None
+        self.time_block = ""
+        self._minute_end = 0.0  # session / time block only change on minute boundaries
+        self._pv = 0.0
+        self._volume = 0.0
+        self.vwap: Optional[float] = None
+        # (tick ts, MarketState): replaced whole, so a reader never sees a torn pair
+        self.latest: Optional[Tuple[float, MarketState]] = None
+
+    def on_tick(self, price: float, volume: float, ts: float) -> None:
+        if ts >= self._minute_end:
+            self._minute_end = ts - ts % 60 + 60
+            now = datetime.fromtimestamp(ts, IST)
+            self.time_block = time_block(now)
+            session = now.date().isoformat()
+            if session != self.session:
+                self.session, self._pv, self._volume = session, 0.0, 0.0
+        self._pv += price * volume
+        self._volume += volume
+        self.vwap = self._pv / self._volume if self._volume else None
+        for tf in self.timeframes.values():
+            tf.update(ts, price, volume)
+
+        tf = self.timeframes[INDICATOR_BARS]
+        self.latest = ts, MarketState(
+            spot=price,
+            atm=int(round(price / self.step) * self.step),
+            vwap=self.vwap,
+            rsi=tf.rsi.value,
+            trend_strength=tf.adx.value,
+            time_block=self.time_block,
+            is_expiry=False,  # expiry is per chain; market_state_from_chain sets it
+            data_age_seconds=0.0,
+            atr=tf.atr.value,
+        )
+
+
+class IndicatorEngine:
+    def __init__(self):
+        self._underlyings: Dict[str, UnderlyingIndicators] = {}
+        self._lock = threading.Lock()
+
+    def on_tick(self, underlying: str, price: float, volume: float = 0.0, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            ind = self._underlyings.get(underlying)
+            if ind is None:
+                ind = self._underlyings[underlying] = UnderlyingIndicators(underlying)
+            ind.on_tick(price, volume, ts)
+
+    def market_state(self, underlying: str, now: Optional[float] = None) -> Optional[MarketState]:
+        """Latest snapshot with its data age; None before the first tick."""
+        ind = self._underlyings.get(underlying)
+        latest = ind.latest if ind is not None else None
+        if latest is None:
+            return None
+        ts, state = latest
+        return replace(state, data_age_seconds=max(0.0, (now or time.time()) - ts))
+
+    def snapshot(self, underlying: str) -> Optional[dict]:
+        with self._lock:
+            ind = self._underlyings.get(underlying)
+            if ind is None:
+                return None
+            return {
+                "underlying": underlying,
+                "last_ts": ind.latest[0],
+                "vwap": ind.vwap,
+                "timeframes": {name: tf.snapshot() for name, tf in ind.timeframes.items()},
+            }
+
+
+indicator_engine = IndicatorEngine()
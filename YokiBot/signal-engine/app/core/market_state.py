@@ -1,6 +1,19 @@
 from dataclasses import dataclass
+from datetime import datetime, time as dtime, timedelta, timezone
 from typing import Optional
 
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# (block end, name): the first block whose end is after now (IST)
+TIME_BLOCKS = (
+    (dtime(9, 15), "PRE_OPEN"),
+    (dtime(9, 30), "OPENING"),
+    (dtime(12, 0), "MORNING"),
+    (dtime(13, 30), "MIDDAY"),
+    (dtime(14, 30), "AFTERNOON"),
+    (dtime(15, 30), "CLOSING"),
+)
+
 
 @dataclass(frozen=True)
 class MarketState:
@@ -12,3 +25,37 @@ class MarketState:
     time_block: str
     is_expiry: bool
     data_age_seconds: float
+    atr: Optional[float] = None
+
+
+def time_block(now: datetime) -> str:
+    t = now.astimezone(IST).time()
+    for end, name in TIME_BLOCKS:
+        if t < end:
+            return name
+    return "POST_CLOSE"
+
+
+def market_state_from_chain(chain, now: Optional[datetime] = None, live: Optional[MarketState] = None) -> MarketState:
+    """
+    MarketState for one /decide chain: spot, ATM strike and expiry day from the
+    chain. Indicator fields (vwap / rsi / trend_strength / atr) and data age
+    come from `live`, the indicator engine's latest snapshot for the
+    underlying; without one they are None, which eligibility rules treat as
+    "unknown".
+    """
+    now = now or datetime.now(IST)
+    atm = round(chain.spot)
+    if len(chain):
+        atm = int(chain.strike[abs(chain.strike - chain.spot).argmin()])
+    return MarketState(
+        spot=chain.spot,
+        atm=atm,
+        vwap=live.vwap if live else None,
+        rsi=live.rsi if live else None,
+        trend_strength=live.trend_strength if live else None,
+        time_block=time_block(now),
+        is_expiry=chain.expiry == now.astimezone(IST).date().isoformat(),
+        data_age_seconds=live.data_age_seconds if live else 0.0,
+        atr=live.atr if live else None,
+    )
@@ -0,0 +1,131 @@
+"""
+Columnar option chain shared by every strategy in one /decide call.
+
+Built once per request: parallel numpy columns (strike, ltp, oi) sorted by
+strike, plus PE / CE index arrays into them (also strike-ordered). Strategies
+read the columns directly and only turn the legs they pick back into dicts.
+
+Candidate search goes through one SideIndex per option type, built on first
+use and shared by every strategy evaluated against the chain.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.engine.models import DecideRequest
+
+
+class SideIndex:
+    """
+    One option type of a chain, by strike:
+      between(lo, hi)  [i, j) positions with lo <= strike <= hi (bisect)
+      at(strike)       chain row at exactly that strike (dict; first row wins)
+      max_oi(i, j)     chain row with the highest OI in [i, j), O(1) from a
+                       sparse table; ties go to the lower strike
+    """
+
+    __slots__ = ("rows", "strikes", "_by_strike", "_oi", "_table")
+
+    def __init__(self, rows: np.ndarray, strike: np.ndarray, oi: np.ndarray):
+        self.rows = rows
+        self.strikes: List[float] = strike[rows].tolist()
+        # built back to front so the first row at a repeated strike wins
+        self._by_strike: Dict[float, int] = dict(zip(reversed(self.strikes), reversed(rows.tolist())))
+        self._oi = oi[rows]
+        self._table: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def between(self, lo: float, hi: float) -> Tuple[int, int]:
+        return bisect_left(self.strikes, lo), bisect_right(self.strikes, hi)
+
+    def at(self, strike: float) -> Optional[int]:
+        return self._by_strike.get(strike)
+
+    def _sparse_table(self) -> List[np.ndarray]:
+        # level k holds, for every start p, the position of the max OI in [p, p + 2**k)
+        oi = self._oi
+        table = [np.arange(oi.size)]
+        width = 1
+        while 2 * width <= oi.size:
+            prev = table[-1]
+            a, b = prev[:-width], prev[width:]
+            table.append(np.where(oi[b] > oi[a], b, a))
+            width *= 2
+        return table
+
+    def max_oi(self, i: int, j: int) -> Optional[int]:
+        if i >= j:
+            return None
+        if self._table is None:
+            self._table = self._sparse_table()
+        k = (j - i).bit_length() - 1
+        a, b = self._table[k][i], self._table[k][j - (1 << k)]
+        return int(self.rows[b if self._oi[b] > self._oi[a] else a])
+
+
+class OptionChain:
+    __slots__ = ("underlying", "expiry", "spot", "strike", "ltp", "oi", "is_call", "pe", "ce", "_sides")
+
+    def __init__(self, underlying: str, expiry: str, spot: float, strike: Sequence[float],
+                 opt_type: Sequence[str], ltp: Sequence[float], oi: Sequence[Optional[float]]):
+        self.underlying = underlying
+        self.expiry = expiry
+        self.spot = float(spot)
+        strike = np.asarray(strike, dtype=np.float64)
+        order = np.argsort(strike, kind="stable")  # equal strikes keep request order
+        self.strike = strike[order]
+        self.ltp = np.asarray(ltp, dtype=np.float64)[order]
+        # missing OI ranks as 0, like the old .get("oi", 0)
+        self.oi = np.array([0.0 if v is None else v for v in oi], dtype=np.float64)[order]
+        types = np.asarray(opt_type, dtype=object)[order]
+        self.is_call = types == "CE"
+        self.pe = np.flatnonzero(types == "PE")
+        self.ce = np.flatnonzero(self.is_call)
+        self._sides: Dict[str, SideIndex] = {}
+
+    @classmethod
+    def from_rows(cls, underlying: str, expiry: str, spot: float, rows: Iterable[Dict[str, Any]]) -> "OptionChain":
+        """rows: validated instrument dicts (strike, opt_type, ltp, optional oi)."""
+        strike, opt_type, ltp, oi = [], [], [], []
+        for row in rows:
+            strike.append(row["strike"])
+            opt_type.append(row["opt_type"])
+            ltp.append(row["ltp"])
+            oi.append(row.get("oi"))
+        return cls(underlying, expiry, spot, strike, opt_type, ltp, oi)
+
+    @classmethod
+    def from_request(cls, req: DecideRequest) -> "OptionChain":
+        insts = req.instruments
+        return cls(
+            req.underlying, req.expiry, req.spot,
+            [i.strike for i in insts], [i.opt_type for i in insts], [i.ltp for i in insts], [i.oi for i in insts],
+        )
+
+    def __len__(self) -> int:
+        return int(self.strike.size)
+
+    def leg(self, i: int) -> Dict[str, Any]:
+        """One row back as the instrument dict strategies report."""
+        return {
+            "strike": self.strike[i].item(),
+            "opt_type": "CE" if self.is_call[i] else "PE",
+            "ltp": self.ltp[i].item(),
+            "oi": self.oi[i].item(),
+        }
+
+    def side(self, opt_type: str) -> SideIndex:
+        """Shared strike index of the "PE" or "CE" rows."""
+        index = self._sides.get(opt_type)
+        if index is None:
+            rows = self.ce if opt_type == "CE" else self.pe
+            index = self._sides[opt_type] = SideIndex(rows, self.strike, self.oi)
+        return index
+
+
+def as_chain(req: Union[OptionChain, DecideRequest]) -> OptionChain:
+    return req if isinstance(req, OptionChain) else OptionChain.from_request(req)
@@ -1,7 +1,14 @@
 from uuid import uuid4
 from datetime import datetime
+from typing import Union
+
+from app.config import ADX_TREND, RSI_LOW
+from app.core.market_state import MarketState
+from app.engine.chain import OptionChain, as_chain
 from app.engine.models import DecideRequest, DecisionResult
+from app.engine.registry import register
 from app.engine.risk_guard import passes_risk_guard
+from app.engine.scenario_engine import Leg, evaluate_scenarios
 
 # ============================
 # INDEX-SPECIFIC RULES
@@ -40,17 +47,30 @@ def is_monthly_expiry(expiry: str) -> bool:
         return False
 
 
+def credit_spread_eligible(state: MarketState) -> bool:
+    """
+    PE credit spread is a bullish-to-neutral trade: sit out a strong
+    (ADX >= ADX_TREND) move with RSI below RSI_LOW. Unknown indicators
+    don't block it.
+    """
+    if state.trend_strength is None or state.rsi is None:
+        return True
+    return not (state.trend_strength >= ADX_TREND and state.rsi < RSI_LOW)
+
+
 # ============================
 # CORE STRATEGY
 # ============================
 
-def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
+@register("CREDIT_SPREAD", eligible=credit_spread_eligible)
+def evaluate_credit_spread(req: Union[OptionChain, DecideRequest]) -> DecisionResult:
     dec_id = str(uuid4())
+    chain = as_chain(req)
 
     # ---------------------------
     # BASIC SANITY CHECK
     # ---------------------------
-    if not req.instruments or req.spot <= 0:
+    if not len(chain) or chain.spot <= 0:
         return DecisionResult(
             action="NO_TRADE",
             strategy="CREDIT_SPREAD",
@@ -58,7 +78,7 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    rules = INDEX_RULES.get(req.underlying.upper())
+    rules = INDEX_RULES.get(chain.underlying.upper())
     if not rules:
         return DecisionResult(
             action="NO_TRADE",
@@ -74,14 +94,13 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
     MIN_NET_PREMIUM = rules["min_net_premium"]
 
     # Monthly expiry = stricter
-    if is_monthly_expiry(req.expiry):
+    if is_monthly_expiry(chain.expiry):
         MIN_DISTANCE += 100
         ZERODHA_CHARGES += 30
 
-    insts = [i.model_dump() for i in req.instruments]
-    pes = [i for i in insts if i["opt_type"] == "PE"]
+    pes = chain.side("PE")
 
-    if not pes:
+    if not len(pes):
         return DecisionResult(
             action="NO_TRADE",
             strategy="CREDIT_SPREAD",
@@ -89,23 +108,21 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    available_strikes = sorted(i["strike"] for i in pes)
+    available_strikes = list(pes.strikes)
 
     # ---------------------------
     # DISTANCE FILTER
     # ---------------------------
-    candidates = [
-        i for i in pes
-        if MIN_DISTANCE <= (req.spot - i["strike"]) <= MAX_DISTANCE
-    ]
+    # MIN_DISTANCE <= spot - strike <= MAX_DISTANCE
+    lo, hi = pes.between(chain.spot - MAX_DISTANCE, chain.spot - MIN_DISTANCE)
 
-    if not candidates:
+    if lo == hi:
         return DecisionResult(
             action="NO_TRADE",
             strategy="CREDIT_SPREAD",
             reason="NO_STRIKE_IN_RANGE",
             trade_payload={
-                "spot": req.spot,
+                "spot": chain.spot,
                 "available_pe_strikes": available_strikes,
                 "required_distance": [MIN_DISTANCE, MAX_DISTANCE],
             },
@@ -115,15 +132,15 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
     # ---------------------------
     # SHORT LEG (MAX OI)
     # ---------------------------
-    short_leg = max(candidates, key=lambda x: x.get("oi", 0))
+    short_leg = chain.leg(pes.max_oi(lo, hi))
 
     # ---------------------------
     # HEDGE LEG
     # ---------------------------
     hedge_strike = short_leg["strike"] - HEDGE_GAP
-    hedge_candidates = [i for i in pes if i["strike"] == hedge_strike]
+    h = pes.at(hedge_strike)
 
-    if not hedge_candidates:
+    if h is None:
         return DecisionResult(
             action="NO_TRADE",
             strategy="CREDIT_SPREAD",
@@ -136,7 +153,7 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    hedge_leg = hedge_candidates[0]
+    hedge_leg = chain.leg(h)
 
     # ---------------------------
     # PREMIUM CHECK
@@ -183,13 +200,25 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
     spread_width = short_leg["strike"] - hedge_leg["strike"]
     max_risk = (spread_width * lot_size) - (gross_premium * lot_size)
 
-    ok, risk_reason = passes_risk_guard(max_risk)
+    scenario = evaluate_scenarios(
+        chain.underlying, chain.spot, chain.expiry,
+        [
+            Leg(short_leg["strike"], "PE", -lot_size, short_prem),
+            Leg(hedge_leg["strike"], "PE", lot_size, hedge_prem),
+        ],
+    )
+
+    ok, risk_reason = passes_risk_guard(max_risk, scenario)
     if not ok:
         return DecisionResult(
             action="NO_TRADE",
             strategy="CREDIT_SPREAD",
             reason=risk_reason,
-            trade_payload={"max_risk": max_risk},
+            trade_payload={
+                "max_risk": max_risk,
+                "scenario_worst_loss": scenario.worst_loss if scenario else None,
+                "scenario_expected_shortfall": scenario.expected_shortfall if scenario else None,
+            },
             decision_id=dec_id,
         )
 
@@ -201,8 +230,8 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
         strategy="CREDIT_SPREAD",
         reason=None,
         trade_payload={
-            "underlying": req.underlying,
-            "expiry": req.expiry,
+            "underlying": chain.underlying,
+            "expiry": chain.expiry,
             "type": "PE_CREDIT_SPREAD",
             "short_strike": short_leg["strike"],
             "hedge_strike": hedge_leg["strike"],
@@ -211,6 +240,8 @@ def evaluate_credit_spread(req: DecideRequest) -> DecisionResult:
             "gross_premium": gross_premium,
             "net_premium": net_premium,
             "max_risk": max_risk,
+            "scenario_worst_loss": scenario.worst_loss if scenario else None,
+            "scenario_expected_shortfall": scenario.expected_shortfall if scenario else None,
             "lot_size": lot_size,
         },
         decision_id=dec_id,
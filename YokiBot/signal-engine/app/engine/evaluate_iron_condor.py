@@ -2,8 +2,15 @@
 
 from uuid import uuid4
 from datetime import datetime
+from typing import Union
+
+from app.config import ADX_TREND, RSI_HIGH, RSI_LOW
+from app.core.market_state import MarketState
+from app.engine.chain import OptionChain, as_chain
 from app.engine.models import DecideRequest, DecisionResult
+from app.engine.registry import register
 from app.engine.risk_guard import passes_risk_guard
+from app.engine.scenario_engine import Leg, evaluate_scenarios
 
 LOT_SIZE = 50
 PE_DISTANCE = (200, 350)
@@ -14,14 +21,27 @@ ZERODHA_CHARGES = 200
 MAX_RISK_ALLOWED = 4000
 
 
-def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
+def iron_condor_eligible(state: MarketState) -> bool:
+    """
+    Range-bound markets only: no strong trend (ADX below ADX_TREND) and RSI
+    inside the RSI_LOW..RSI_HIGH consolidation band. Unknown indicators don't
+    block it.
+    """
+    if state.trend_strength is not None and state.trend_strength >= ADX_TREND:
+        return False
+    if state.rsi is not None and not (RSI_LOW <= state.rsi <= RSI_HIGH):
+        return False
+    return True
+
+
+@register("IRON_CONDOR", eligible=iron_condor_eligible)
+def evaluate_iron_condor(req: Union[OptionChain, DecideRequest]) -> DecisionResult:
     dec_id = str(uuid4())
+    chain = as_chain(req)
 
-    insts = [i.model_dump() for i in req.instruments]
-    pes = [i for i in insts if i["opt_type"] == "PE"]
-    ces = [i for i in insts if i["opt_type"] == "CE"]
+    pes, ces = chain.side("PE"), chain.side("CE")
 
-    if not pes or not ces:
+    if not len(pes) or not len(ces):
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
@@ -30,11 +50,8 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
         )
 
     # -------- PE side --------
-    pe_candidates = [
-        i for i in pes
-        if PE_DISTANCE[0] <= (req.spot - i["strike"]) <= PE_DISTANCE[1]
-    ]
-    if not pe_candidates:
+    pe_lo, pe_hi = pes.between(chain.spot - PE_DISTANCE[1], chain.spot - PE_DISTANCE[0])
+    if pe_lo == pe_hi:
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
@@ -42,13 +59,10 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    short_pe = max(pe_candidates, key=lambda x: x.get("oi", 0))
-    hedge_pe = next(
-        (i for i in pes if i["strike"] == short_pe["strike"] - HEDGE_GAP),
-        None,
-    )
+    short_pe = chain.leg(pes.max_oi(pe_lo, pe_hi))
+    hedge_pe = pes.at(short_pe["strike"] - HEDGE_GAP)
 
-    if not hedge_pe:
+    if hedge_pe is None:
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
@@ -57,11 +71,8 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
         )
 
     # -------- CE side --------
-    ce_candidates = [
-        i for i in ces
-        if CE_DISTANCE[0] <= (i["strike"] - req.spot) <= CE_DISTANCE[1]
-    ]
-    if not ce_candidates:
+    ce_lo, ce_hi = ces.between(chain.spot + CE_DISTANCE[0], chain.spot + CE_DISTANCE[1])
+    if ce_lo == ce_hi:
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
@@ -69,13 +80,10 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    short_ce = max(ce_candidates, key=lambda x: x.get("oi", 0))
-    hedge_ce = next(
-        (i for i in ces if i["strike"] == short_ce["strike"] + HEDGE_GAP),
-        None,
-    )
+    short_ce = chain.leg(ces.max_oi(ce_lo, ce_hi))
+    hedge_ce = ces.at(short_ce["strike"] + HEDGE_GAP)
 
-    if not hedge_ce:
+    if hedge_ce is None:
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
@@ -83,6 +91,8 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
+    hedge_pe, hedge_ce = chain.leg(hedge_pe), chain.leg(hedge_ce)
+
     gross_premium = (
         short_pe["ltp"] + short_ce["ltp"]
         - hedge_pe["ltp"] - hedge_ce["ltp"]
@@ -109,12 +119,27 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
             decision_id=dec_id,
         )
 
-    ok, reason = passes_risk_guard(max_risk)
+    scenario = evaluate_scenarios(
+        chain.underlying, chain.spot, chain.expiry,
+        [
+            Leg(short_pe["strike"], "PE", -LOT_SIZE, short_pe["ltp"]),
+            Leg(hedge_pe["strike"], "PE", LOT_SIZE, hedge_pe["ltp"]),
+            Leg(short_ce["strike"], "CE", -LOT_SIZE, short_ce["ltp"]),
+            Leg(hedge_ce["strike"], "CE", LOT_SIZE, hedge_ce["ltp"]),
+        ],
+    )
+
+    ok, reason = passes_risk_guard(max_risk, scenario)
     if not ok:
         return DecisionResult(
             action="NO_TRADE",
             strategy="IRON_CONDOR",
             reason=reason,
+            trade_payload={
+                "max_risk": max_risk,
+                "scenario_worst_loss": scenario.worst_loss if scenario else None,
+                "scenario_expected_shortfall": scenario.expected_shortfall if scenario else None,
+            },
             decision_id=dec_id,
         )
 
@@ -129,5 +154,7 @@ def evaluate_iron_condor(req: DecideRequest) -> DecisionResult:
             "hedge_ce": hedge_ce["strike"],
             "net_premium": net_premium,
             "max_risk": max_risk,
+            "scenario_worst_loss": scenario.worst_loss if scenario else None,
+            "scenario_expected_shortfall": scenario.expected_shortfall if scenario else None,
         },
     )
@@ -1,5 +1,6 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
 
 
 class Instrument(BaseModel):
@@ -16,9 +17,56 @@ class DecideRequest(BaseModel):
     instruments: List[Instrument]
 
 
+# /decide ingestion: the same contract as DecideRequest, validated by
+# pydantic-core straight from the JSON bytes into plain dicts (no model
+# instance per instrument), then packed into an OptionChain.
+class InstrumentRow(TypedDict):
+    strike: float
+    opt_type: str
+    ltp: float
+    oi: NotRequired[Optional[float]]
+
+
+class DecideRows(TypedDict):
+    underlying: str
+    expiry: str
+    spot: float
+    instruments: List[InstrumentRow]
+
+
+decide_rows_adapter = TypeAdapter(DecideRows)
+
+
+def _inline_defs(schema: dict) -> dict:
+    """JSON schema with its local #/$defs refs substituted in place."""
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return resolve(defs[ref[len("#/$defs/"):]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+# OpenAPI requestBody for /decide, from the same TypedDict the handler
+# validates with (an operation can't reach the schema's own $defs)
+decide_request_body = {
+    "required": True,
+    "content": {"application/json": {"schema": _inline_defs(decide_rows_adapter.json_schema())}},
+}
+
+
 class DecisionResult(BaseModel):
     action: str
     strategy: str
     reason: Optional[str] = None
     trade_payload: Optional[dict] = None
     decision_id: str
+    # one entry per registered strategy: action / reason / score / elapsed_ms
+    evaluations: Optional[List[Dict[str, Any]]] = None
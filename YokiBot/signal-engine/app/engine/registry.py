@@ -0,0 +1,36 @@
+"""
+Strategy registry.
+
+Each strategy module registers its evaluator together with an eligibility
+rule over MarketState. The router evaluates every eligible strategy against
+the shared OptionChain and ranks the trades.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from app.core.market_state import MarketState
+from app.engine.chain import OptionChain
+from app.engine.models import DecisionResult
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    name: str
+    evaluate: Callable[[OptionChain], DecisionResult]
+    eligible: Callable[[MarketState], bool]
+
+
+_REGISTRY: Dict[str, StrategySpec] = {}
+
+
+def register(name: str, eligible: Callable[[MarketState], bool] = lambda state: True):
+    """Decorator: @register("IRON_CONDOR", eligible=...) on an evaluate function."""
+    def decorator(evaluate: Callable[[OptionChain], DecisionResult]):
+        _REGISTRY[name] = StrategySpec(name, evaluate, eligible)
+        return evaluate
+    return decorator
+
+
+def registered() -> List[StrategySpec]:
+    return list(_REGISTRY.values())
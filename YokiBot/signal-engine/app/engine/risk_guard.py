@@ -1,17 +1,63 @@
-from app.config import MAX_RISK_PER_TRADE, MONTHLY_LOSS_LIMIT
+import logging
+from typing import Optional
 
-# Placeholder until real PnL DB exists
-DUMMY_MONTHLY_LOSS = 0
+from app.config import (
+    MAX_EXPECTED_SHORTFALL,
+    MAX_RISK_PER_TRADE,
+    MONTHLY_LOSS_LIMIT,
+    MONTHLY_PNL_KEY,
+    MONTHLY_PNL_REQUIRED,
+)
+from app.engine.scenario_engine import ScenarioResult
+from app.redis_client import redis_client
 
-def passes_risk_guard(max_risk: float) -> (bool, str):
+logger = logging.getLogger("risk_guard")
+_warned_missing = False
+
+
+def monthly_loss() -> Optional[float]:
+    """
+    Realised loss so far this month (positive number), from MONTHLY_PNL_KEY in
+    Redis; None when the key is unset (no producer in this repo, see
+    app/config.py). Raises on Redis errors so the guard fails closed.
+    """
+    global _warned_missing
+    raw = redis_client.get(MONTHLY_PNL_KEY)
+    if raw is None:
+        if not _warned_missing:
+            _warned_missing = True
+            logger.warning("%s is not set: monthly loss limit %s", MONTHLY_PNL_KEY,
+                           "rejects every trade" if MONTHLY_PNL_REQUIRED else "is off (MONTHLY_PNL_REQUIRED=0)")
+        return None
+    return max(-float(raw), 0.0)
+
+
+def passes_risk_guard(max_risk: float, scenario: Optional[ScenarioResult] = None) -> (bool, str):
     """
     Hard risk constraints.
+    With a scenario result, the per-trade cap applies to the larger of the static
+    max_risk and the grid worst case, and the grid expected shortfall has its own cap.
     """
 
+    if scenario is not None:
+        max_risk = max(max_risk, scenario.worst_loss)
+        if scenario.expected_shortfall > MAX_EXPECTED_SHORTFALL:
+            return False, "EXPECTED_SHORTFALL_EXCEEDED"
+
     if max_risk > MAX_RISK_PER_TRADE:
         return False, "RISK_LIMIT_EXCEEDED"
 
-    if DUMMY_MONTHLY_LOSS >= MONTHLY_LOSS_LIMIT:
+    try:
+        loss = monthly_loss()
+    except Exception:
+        return False, "MONTHLY_PNL_UNAVAILABLE"
+
+    if loss is None:
+        if MONTHLY_PNL_REQUIRED:
+            return False, "MONTHLY_PNL_MISSING"
+        loss = 0.0
+
+    if loss >= MONTHLY_LOSS_LIMIT:
         return False, "MONTHLY_LOSS_LIMIT_REACHED"
 
     return True, "OK"
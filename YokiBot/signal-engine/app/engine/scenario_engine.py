@@ -0,0 +1,128 @@
+"""
+Spot x IV x time scenario repricing for proposed multi-leg trades.
+
+The grid axes are built once per underlying and cached; each evaluation is a
+single broadcast Black-Scholes pass over (spot move, IV shock, decay step, leg),
+priced by yoki_shared.greeks_array (no dividend yield).
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from yoki_shared.expiry_calendar import calendar as expiry_calendar
+from yoki_shared.greeks_array import bs_price_array
+
+from app.config import ES_ALPHA, GREEKS_TIME_MODE, RISK_FREE_RATE
+
+# Per-underlying grid definition: (max relative spot move, spot steps,
+# absolute IV shocks, decay steps in days of GREEKS_TIME_MODE).
+GRID_SPECS = {
+    "NIFTY": (0.06, 25, (-0.05, -0.02, 0.0, 0.03, 0.08, 0.15), (0, 1, 2, 5)),
+    "BANKNIFTY": (0.08, 25, (-0.06, -0.03, 0.0, 0.04, 0.10, 0.20), (0, 1, 2, 5)),
+}
+DEFAULT_SPEC = GRID_SPECS["NIFTY"]
+
+
+@dataclass(frozen=True)
+class Leg:
+    strike: float
+    opt_type: str   # "CE" / "PE"
+    qty: float      # signed units: + bought, - sold (lot size applied)
+    premium: float  # entry price per unit
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    worst_loss: float          # largest loss on the grid (positive number)
+    expected_shortfall: float  # probability-weighted mean loss in the worst ES_ALPHA tail
+    worst_spot_move: float
+    worst_iv_shock: float
+    worst_days: float
+
+
+# -------------------------
+# Implied vol
+# -------------------------
+def implied_vol(price, S, K, t, r, is_call, iters: int = 40) -> np.ndarray:
+    """Vectorized bisection on [0.01, 3.0]; prices outside the bracket clamp to its ends."""
+    lo = np.full(np.shape(K), 0.01)
+    hi = np.full(np.shape(K), 3.0)
+    for _ in range(iters):
+        mid = 0.5 * (lo + hi)
+        above = bs_price_array(S, K, t, mid, r, 0.0, is_call) > price
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    return 0.5 * (lo + hi)
+
+
+# -------------------------
+# Grid
+# -------------------------
+@lru_cache(maxsize=16)
+def grid_axes(underlying: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Broadcast-ready axes for one underlying:
+      spot moves (n_s, 1, 1, 1), IV shocks (1, n_v, 1, 1), decay days (1, 1, n_d, 1)
+    """
+    max_move, steps, iv_shocks, days = GRID_SPECS.get(underlying.upper(), DEFAULT_SPEC)
+    spot = np.linspace(-max_move, max_move, steps).reshape(-1, 1, 1, 1)
+    vol = np.asarray(iv_shocks, dtype=np.float64).reshape(1, -1, 1, 1)
+    decay = np.asarray(days, dtype=np.float64).reshape(1, 1, -1, 1)
+    return spot, vol, decay
+
+
+def years_to_expiry(expiry: str, now: Optional[float] = None) -> Optional[float]:
+    """Years to expiry on the shared calendar's GREEKS_TIME_MODE basis; None if unparseable."""
+    try:
+        return expiry_calendar.years(expiry, now, GREEKS_TIME_MODE)
+    except (AttributeError, ValueError):
+        return None
+
+
+def evaluate_scenarios(underlying: str, spot: float, expiry: str, legs: List[Leg],
+                       r: float = RISK_FREE_RATE, alpha: float = ES_ALPHA) -> Optional[ScenarioResult]:
+    """
+    Reprice legs across the cached grid. Returns None when the expiry cannot be
+    parsed or has passed (callers then fall back to the static max-risk check).
+    """
+    T = years_to_expiry(expiry)
+    if not legs or T is None or T <= 0:
+        return None
+
+    K = np.array([leg.strike for leg in legs], dtype=np.float64)
+    is_call = np.array([leg.opt_type == "CE" for leg in legs])
+    qty = np.array([leg.qty for leg in legs], dtype=np.float64)
+    premium = np.array([leg.premium for leg in legs], dtype=np.float64)
+
+    iv = implied_vol(premium, spot, K, T, r, is_call)
+
+    ds, dv, dd = grid_axes(underlying)
+    S = spot * (1.0 + ds)
+    sigma = np.maximum(iv + dv, 0.01)
+    days_per_year = expiry_calendar.days_per_year(GREEKS_TIME_MODE)
+    t = np.maximum(T - dd / days_per_year, 0.0)
+    pnl = ((bs_price_array(S, K, t, sigma, r, 0.0, is_call) - premium) * qty).sum(axis=-1)  # (n_s, n_v, n_d)
+
+    # Spot nodes weighted by a normal over the move, scaled by ATM-ish IV over the horizon;
+    # IV shocks and decay steps are weighted equally.
+    atm_iv = float(iv[np.argmin(np.abs(K - spot))])
+    scale = max(atm_iv * math.sqrt(max(T, 1.0 / days_per_year)), 1e-4)
+    w_spot = np.exp(-0.5 * (ds.ravel() / scale) ** 2)
+    w = np.broadcast_to(w_spot.reshape(-1, 1, 1), pnl.shape).ravel()
+    flat = pnl.ravel()
+    order = np.argsort(flat)
+    cum = np.cumsum(w[order]) / w.sum()
+    tail = order[: max(1, int(np.searchsorted(cum, alpha)) + 1)]
+    es = -float(np.average(flat[tail], weights=w[tail]))
+
+    i_s, i_v, i_d = np.unravel_index(order[0], pnl.shape)
+    return ScenarioResult(
+        worst_loss=max(-float(flat[order[0]]), 0.0),
+        expected_shortfall=max(es, 0.0),
+        worst_spot_move=float(ds.ravel()[i_s]),
+        worst_iv_shock=float(dv.ravel()[i_v]),
+        worst_days=float(dd.ravel()[i_d]),
+    )
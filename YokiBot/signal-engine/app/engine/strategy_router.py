@@ -1,16 +1,116 @@
-from app.engine.evaluate_credit_spread import evaluate_credit_spread
-from app.engine.evaluate_iron_condor import evaluate_iron_condor
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+from uuid import uuid4
+
+from app.config import STRATEGY_WORKERS
+from app.core.market_state import MarketState, market_state_from_chain
+from app.engine.chain import OptionChain, as_chain
 from app.engine.models import DecideRequest, DecisionResult
+from app.engine.registry import StrategySpec, registered
+
+# strategy modules register themselves on import
+import app.engine.evaluate_credit_spread  # noqa: F401
+import app.engine.evaluate_iron_condor  # noqa: F401
+
+_executor = (
+    ThreadPoolExecutor(max_workers=STRATEGY_WORKERS, thread_name_prefix="strategy")
+    if STRATEGY_WORKERS > 1 else None
+)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(name: str, action: str, elapsed_ms: float) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(name, {"evaluations": 0, "trades": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["evaluations"] += 1
+        s["trades"] += action == "TRADE"
+        s["errors"] += action == "ERROR"
+        s["total_ms"] += elapsed_ms
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        s["last_ms"] = elapsed_ms
+
+
+def strategy_stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        return {
+            name: {**s, "avg_ms": s["total_ms"] / s["evaluations"]}
+            for name, s in _stats.items()
+        }
 
 
-def route_strategy(req: DecideRequest) -> DecisionResult:
+def score(decision: DecisionResult) -> float:
     """
-    Temporary rule-based router.
-    Will be replaced later by MarketState-based eligibility.
+    Net premium per unit of risk. Risk is what the risk guard capped: the
+    larger of the static max loss and the scenario-grid worst case.
     """
+    p = decision.trade_payload or {}
+    risk = max(p.get("max_risk") or 0.0, p.get("scenario_worst_loss") or 0.0)
+    return p.get("net_premium", 0.0) / risk if risk > 0 else float("inf")
+
+
+def _evaluate(spec: StrategySpec, chain: OptionChain) -> Tuple[DecisionResult, float]:
+    t0 = time.perf_counter()
+    try:
+        decision = spec.evaluate(chain)
+    except Exception as e:
+        decision = DecisionResult(action="ERROR", strategy=spec.name, reason=str(e), decision_id="ERR")
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    _record(spec.name, decision.action, elapsed_ms)
+    return decision, elapsed_ms
+
+
+def route_strategy(req: Union[OptionChain, DecideRequest], state: Optional[MarketState] = None) -> DecisionResult:
+    """
+    Evaluate every registered strategy whose eligibility rule accepts the
+    MarketState (derived from the chain when not given), on the strategy
+    thread pool when STRATEGY_WORKERS > 1, and return the TRADE with the best net premium
+    per unit of risk. The per-strategy outcome and timing is in `evaluations`.
+    """
+    chain = as_chain(req)
+    state = state or market_state_from_chain(chain)
+
+    specs = registered()
+    eligible = [spec for spec in specs if spec.eligible(state)]
+    entries: Dict[str, dict] = {spec.name: {"strategy": spec.name, "eligible": False} for spec in specs}
+    if not eligible:
+        return DecisionResult(
+            action="NO_TRADE",
+            strategy="ROUTER",
+            reason="NO_ELIGIBLE_STRATEGY",
+            decision_id=str(uuid4()),
+            evaluations=list(entries.values()),
+        )
+
+    # build the shared strike index once, before strategies read it from several threads
+    chain.side("PE")
+    chain.side("CE")
+    if _executor is None or len(eligible) == 1:
+        outcomes = [_evaluate(spec, chain) for spec in eligible]
+    else:
+        outcomes = list(_executor.map(lambda spec: _evaluate(spec, chain), eligible))
 
-    # Temporary range-bound heuristic
-    if abs(req.spot % 100) < 40:
-        return evaluate_iron_condor(req)
+    trades = []
+    for spec, (decision, elapsed_ms) in zip(eligible, outcomes):
+        entry = entries[spec.name]
+        entry.update(eligible=True, action=decision.action, reason=decision.reason, elapsed_ms=round(elapsed_ms, 3))
+        if decision.action == "TRADE":
+            entry["score"] = score(decision)
+            trades.append((entry["score"], decision))
+    evaluations = list(entries.values())
 
-    return evaluate_credit_spread(req)
+    if trades:
+        best = max(trades, key=lambda t: t[0])[1]
+        return best.model_copy(update={"evaluations": evaluations})
+    if len(outcomes) == 1:
+        return outcomes[0][0].model_copy(update={"evaluations": evaluations})
+    return DecisionResult(
+        action="NO_TRADE",
+        strategy="ROUTER",
+        reason="NO_STRATEGY_QUALIFIED",
+        decision_id=str(uuid4()),
+        evaluations=evaluations,
+    )
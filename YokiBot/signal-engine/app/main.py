@@ -1,10 +1,33 @@
-from fastapi import FastAPI, HTTPException
-from app.engine.models import DecideRequest, DecisionResult
-from app.engine.strategy_router import route_strategy
+import json
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.clients.tick_listener import TickListener
+from app.config import TICK_LISTENER
+from app.core.indicators import indicator_engine
+from app.core.market_state import market_state_from_chain
+from app.engine.chain import OptionChain
+from app.engine.models import DecisionResult, decide_request_body, decide_rows_adapter
+from app.engine.strategy_router import route_strategy, strategy_stats
 from app.engine.decision_logger import save_decision, get_latest_decision
 from app.filters import run_filters
 
 app = FastAPI(title="Signal Engine")
+tick_listener = TickListener()
+
+
+@app.on_event("startup")
+def startup():
+    if TICK_LISTENER:
+        tick_listener.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    tick_listener.stop()
 
 # =====================
 # HEALTH
@@ -16,16 +39,52 @@ def health():
 # =====================
 # CORE DECISION
 # =====================
-@app.post("/decide", response_model=DecisionResult)
-def decide(req: DecideRequest):
+@app.post("/decide", response_model=DecisionResult, openapi_extra={"requestBody": decide_request_body})
+async def decide(request: Request):
+    """
+    Body: the DecideRequest contract. Validated by pydantic-core straight from
+    the JSON bytes into dicts and packed once into the columnar OptionChain
+    every strategy reads; no Instrument model per row.
+    """
+    body = await request.body()
+    try:
+        rows = decide_rows_adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(_body_errors(body, e))
+    chain = OptionChain.from_rows(rows["underlying"], rows["expiry"], rows["spot"], rows["instruments"])
+    # filters read Redis and strategies are CPU work: keep both off the event loop
+    return await run_in_threadpool(_decide, chain)
+
+
+# TypedDicts reject a non-object as dict_type; the models they mirror say this
+_MODEL_TYPE_ERROR = {"type": "model_attributes_type",
+                     "msg": "Input should be a valid dictionary or object to extract fields from"}
+
+
+def _body_errors(body: bytes, e: ValidationError) -> list:
+    """The 422 detail FastAPI gives the same body for a DecideRequest parameter (error path only)."""
+    try:
+        data = json.loads(body) if body else None
+    except json.JSONDecodeError as je:
+        return [{"type": "json_invalid", "loc": ("body", je.pos), "msg": "JSON decode error",
+                 "input": {}, "ctx": {"error": je.msg}}]
+    if data is None:
+        return [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}]
+    return [
+        {**err, **(_MODEL_TYPE_ERROR if err["type"] == "dict_type" else {}), "loc": ("body", *err["loc"])}
+        for err in e.errors(include_url=False, include_context=False)
+    ]
+
+
+def _decide(chain: OptionChain) -> DecisionResult:
     try:
         # 1️⃣ RUN FILTERS FIRST
-        ok, reason = run_filters(req)
-        if not ok:
+        blocked = run_filters()
+        if blocked is not None:
             decision = DecisionResult(
                 action="NO_TRADE",
                 strategy="SYSTEM",
-                reason=reason,
+                reason=blocked.reason,
                 decision_id="NA",
                 legs={}
             )
@@ -33,8 +92,9 @@ def decide(req: DecideRequest):
             save_decision(decision.model_dump())
             return decision
 
-        # 2️⃣ ROUTE STRATEGY
-        decision = route_strategy(req)
+        # 2️⃣ ROUTE STRATEGY (live indicators: latest in-memory snapshot, no recompute)
+        state = market_state_from_chain(chain, live=indicator_engine.market_state(chain.underlying))
+        decision = route_strategy(chain, state)
 
         # 3️⃣ STORE DECISION
         save_decision(decision.model_dump())
@@ -57,4 +117,16 @@ def decide(req: DecideRequest):
 # =====================
 @app.get("/latest_decision")
 def latest_decision():
-    return get_latest_decision()
\ No newline at end of file
+    return get_latest_decision()
+
+@app.get("/stats/strategies")
+def strategies_stats():
+    return strategy_stats()
+
+
+@app.get("/market_state/{underlying}")
+def market_state(underlying: str):
+    snapshot = indicator_engine.snapshot(underlying.upper())
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="NO_TICKS_YET")
+    return snapshot
@@ -0,0 +1,77 @@
+# bench_decide.py - /decide ingestion and strategy latency at 50 / 200 / 1000 instruments
+#   models   DecideRequest.model_validate_json + model_dump per instrument in each
+#            strategy (the previous path)
+#   columnar pydantic-core TypedDict validation + OptionChain (current path)
+#   index    building both SideIndexes with their max-OI tables (once per chain)
+#   spread / condor  one strategy against the shared, already built index
+#   router   route_strategy: both strategies eligible (no indicators), ranked;
+#            STRATEGY_WORKERS=4 to time them on the thread pool instead
+# Run from signal-engine/: python benchmarks/bench_decide.py
+# Redis is not needed: the monthly P&L read in the risk guard is replaced by 0.
+
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.engine import risk_guard
+from app.engine.chain import OptionChain
+from app.engine.evaluate_credit_spread import evaluate_credit_spread
+from app.engine.evaluate_iron_condor import evaluate_iron_condor
+from app.engine.models import DecideRequest, decide_rows_adapter
+from app.engine.strategy_router import route_strategy
+
+N = int(os.getenv("BENCH_N", "500"))
+SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "50,200,1000").split(",")]
+
+risk_guard.monthly_loss = lambda: 0.0
+
+
+def body(n: int, spot: float) -> bytes:
+    strikes = [spot - 50 * (n // 4) + 50 * k for k in range(n // 2)]
+    rows = [
+        {"strike": k, "opt_type": t, "ltp": max(5.0, 300 - abs(k - spot) / 4), "oi": 1000 + (int(k) * 7919) % 5000}
+        for k in strikes for t in ("CE", "PE")
+    ]
+    return json.dumps({"underlying": "NIFTY", "expiry": "2099-01-29", "spot": spot, "instruments": rows}).encode()
+
+
+def timed(fn) -> float:
+    samples = []
+    for _ in range(N):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def models_path(raw: bytes):
+    req = DecideRequest.model_validate_json(raw)
+    for _ in range(2):  # each strategy dumped every instrument again
+        [i.model_dump() for i in req.instruments]
+    return req
+
+
+def build_index(chain: OptionChain) -> None:
+    chain._sides.clear()
+    for opt_type in ("PE", "CE"):
+        chain.side(opt_type).max_oi(0, 1)
+
+
+def columnar_path(raw: bytes) -> OptionChain:
+    rows = decide_rows_adapter.validate_json(raw)
+    return OptionChain.from_rows(rows["underlying"], rows["expiry"], rows["spot"], rows["instruments"])
+
+
+if __name__ == "__main__":
+    print(f"{'instruments':>11} {'models':>10} {'columnar':>10} {'index':>10} {'spread':>10} {'condor':>10} {'router':>10}   (p50 us)")
+    for n in SIZES:
+        raw = body(n, 22000.0)
+        chain = columnar_path(raw)
+        print(f"{n:>11} {timed(lambda: models_path(raw)):10.1f} {timed(lambda: columnar_path(raw)):10.1f}"
+              f" {timed(lambda: build_index(chain)):10.1f}"
+              f" {timed(lambda: evaluate_credit_spread(chain)):10.1f} {timed(lambda: evaluate_iron_condor(chain)):10.1f}"
+              f" {timed(lambda: route_strategy(chain)):10.1f}")
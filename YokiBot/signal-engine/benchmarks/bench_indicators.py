@@ -0,0 +1,58 @@
+# bench_indicators.py - live indicator cost per tick and per /decide read
+#   tick       IndicatorEngine.on_tick: VWAP, 1m / 5m bars, Wilder RSI / ATR / ADX
+#              when a bar closes, MarketState snapshot rebuild
+#   read       IndicatorEngine.market_state (what /decide does per request)
+#   recompute  RSI / ATR / ADX rebuilt from the bar ring buffer instead, i.e.
+#              the cost per request of computing them from history
+# Run from signal-engine/: python benchmarks/bench_indicators.py
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.indicators import ADX, ATR, RSI, IndicatorEngine
+
+N = int(os.getenv("BENCH_N", "20000"))
+TICKS = int(os.getenv("BENCH_TICKS", "22500"))  # one session at ~1 tick/s
+T0 = 1_760_000_000.0
+
+
+def timed(fn, n: int = N) -> float:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def recompute(bars) -> None:
+    rsi, atr, adx = RSI(14), ATR(14), ADX(14)
+    for bar in bars:
+        rsi.update(bar)
+        atr.update(bar)
+        adx.update(bar)
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    engine = IndicatorEngine()
+    price = 22000.0
+    for k in range(TICKS):
+        price += rng.gauss(0, 2)
+        engine.on_tick("NIFTY", price, rng.randint(0, 50), T0 + k)
+
+    ts = [T0 + TICKS]
+
+    def tick() -> None:
+        ts[0] += 0.25
+        engine.on_tick("NIFTY", price + rng.gauss(0, 2), 10.0, ts[0])
+
+    bars = engine._underlyings["NIFTY"].timeframes["1m"].bars
+    print(f"{'tick':>10} {'read':>10} {'recompute':>10}   (p50 us, {len(bars)} 1m bars)")
+    print(f"{timed(tick):10.2f} {timed(lambda: engine.market_state('NIFTY')):10.2f}"
+          f" {timed(lambda: recompute(bars), 500):10.1f}")
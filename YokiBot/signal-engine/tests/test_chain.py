@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+
+from app.engine.chain import OptionChain
+
+
+def random_chain(rng, n):
+    """Strike-ordered PE / CE rows with repeated strikes, tied OI and missing OI."""
+    strikes = [21000.0 + 50 * rng.randrange(n) for _ in range(n)]
+    types = [rng.choice(("PE", "CE")) for _ in range(n)]
+    oi = [None if rng.random() < 0.2 else float(rng.choice((0, 100, 100, 250, 400))) for _ in range(n)]
+    return OptionChain("NIFTY", "2099-01-01", 22000.0, strikes, types, [10.0] * n, oi)
+
+
+def brute_max_oi(chain, opt_type, i, j):
+    rows = chain.side(opt_type).rows[i:j]
+    if not len(rows):
+        return None
+    return int(rows[np.argmax(chain.oi[rows])])  # first max: lowest strike wins a tie
+
+
+def test_max_oi_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(300):
+        chain = random_chain(rng, rng.randrange(1, 40))
+        for opt_type in ("PE", "CE"):
+            side = chain.side(opt_type)
+            n = len(side)
+            for i in range(n + 1):
+                for j in range(i, n + 1):
+                    assert side.max_oi(i, j) == brute_max_oi(chain, opt_type, i, j), (opt_type, i, j)
+
+
+def test_max_oi_ties_missing_oi_and_degenerate_ranges():
+    chain = OptionChain("NIFTY", "2099-01-01", 22000.0,
+                        [21900.0, 21800.0, 22000.0, 21700.0],
+                        ["PE", "PE", "PE", "PE"],
+                        [10.0, 11.0, 12.0, 13.0],
+                        [500.0, 500.0, None, None])
+    pes = chain.side("PE")
+    assert pes.strikes == [21700.0, 21800.0, 21900.0, 22000.0]
+
+    # tie between 21800 and 21900: the lower strike
+    assert chain.leg(pes.max_oi(0, 4))["strike"] == 21800.0
+    # only missing OI in range: ranks as 0, first row wins
+    assert chain.leg(pes.max_oi(3, 4)) == {"strike": 22000.0, "opt_type": "PE", "ltp": 12.0, "oi": 0.0}
+    assert chain.leg(pes.max_oi(0, 1))["strike"] == 21700.0   # single element
+    assert pes.max_oi(2, 2) is None and pes.max_oi(3, 1) is None  # empty
+    assert chain.side("CE").max_oi(0, 0) is None
+
+
+def test_between_is_the_distance_rule_as_strike_bounds():
+    rng = random.Random(5)
+    for _ in range(200):
+        chain = random_chain(rng, rng.randrange(0, 40))
+        spot = 21000.0 + 25 * rng.randrange(80)   # lands on strikes and between them
+        a, b = sorted(rng.choice((0, 50, 150, 200, 250, 350)) for _ in range(2))
+        pes, ces = chain.side("PE"), chain.side("CE")
+
+        # PE: a <= spot - strike <= b  ->  spot - b <= strike <= spot - a
+        i, j = pes.between(spot - b, spot - a)
+        assert pes.strikes[i:j] == [k for k in pes.strikes if a <= spot - k <= b]
+        # CE: a <= strike - spot <= b  ->  spot + a <= strike <= spot + b
+        i, j = ces.between(spot + a, spot + b)
+        assert ces.strikes[i:j] == [k for k in ces.strikes if a <= k - spot <= b]
+
+
+def test_at_returns_the_first_row_at_a_strike():
+    chain = OptionChain("NIFTY", "2099-01-01", 22000.0, [22000.0, 21800.0, 22000.0],
+                        ["PE", "PE", "PE"], [10.0, 11.0, 12.0], [1.0, 2.0, 3.0])
+    pes = chain.side("PE")
+    assert chain.leg(pes.at(22000.0))["ltp"] == 10.0
+    assert pes.at(21850.0) is None
@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.engine.evaluate_credit_spread as credit_spread
+import app.main as main
+from app.engine.chain import OptionChain
+from app.engine.models import DecideRequest
+from app.filters import FilterResult
+
+client = TestClient(main.app)
+
+# the contract /decide had as a DecideRequest body parameter, for the 422 shape
+reference = FastAPI()
+
+
+@reference.post("/decide")
+def reference_decide(req: DecideRequest):
+    return {}
+
+
+reference_client = TestClient(reference)
+
+
+@pytest.mark.parametrize("body", [
+    b"{}",
+    b'{"underlying": "NIFTY", "expiry": "2099-01-06", "spot": "x", "instruments": []}',
+    b'{"underlying": "NIFTY", "expiry": "2099-01-06", "spot": 22000, "instruments": '
+    b'[{"strike": 22000, "opt_type": "PE"}, {"strike": "a", "opt_type": "CE", "ltp": 1, "oi": "b"}]}',
+    b'{"underlying": "NIFTY", "expiry": "2099-01-06", "spot": 22000, "instruments": [1]}',
+    b"[]",
+    b"null",
+    b"",
+    b"{bad",
+])
+def test_malformed_body_gets_fastapis_422_detail(body):
+    headers = {"content-type": "application/json"}
+    got = client.post("/decide", content=body, headers=headers)
+    want = reference_client.post("/decide", content=body, headers=headers)
+    assert got.status_code == want.status_code == 422
+    assert got.json()["detail"] == want.json()["detail"]
+
+
+def pe_chain(oi):
+    # spot - strike within NIFTY's (150, 250): 21750 / 21800 / 21850; hedge 200 below the short
+    strikes = [21550.0, 21600.0, 21650.0, 21750.0, 21800.0, 21850.0]
+    ltp = [20.0, 22.0, 25.0, 200.0, 210.0, 220.0]
+    return OptionChain("NIFTY", "2099-01-06", 22000.0, strikes, ["PE"] * 6, ltp, oi)
+
+
+@pytest.fixture
+def no_risk_guard(monkeypatch):
+    monkeypatch.setattr(credit_spread, "passes_risk_guard", lambda max_risk, scenario=None: (True, "OK"))
+
+
+def test_oi_tie_goes_to_the_lower_strike(no_risk_guard):
+    decision = credit_spread.evaluate_credit_spread(pe_chain([0, 0, 0, 500, 100, 500]))
+    assert decision.action == "TRADE"
+    assert decision.trade_payload["short_strike"] == 21750.0
+    assert decision.trade_payload["hedge_strike"] == 21550.0
+
+
+def test_missing_oi_ranks_as_zero(no_risk_guard):
+    decision = credit_spread.evaluate_credit_spread(pe_chain([None, None, None, None, 100, None]))
+    assert decision.trade_payload["short_strike"] == 21800.0
+
+    decision = credit_spread.evaluate_credit_spread(pe_chain([None] * 6))
+    assert decision.action == "TRADE" and decision.trade_payload["short_strike"] == 21750.0
+
+
+def test_blocking_filter_short_circuits_decide(monkeypatch):
+    monkeypatch.setattr(main, "run_filters", lambda: FilterResult.fail("OUTSIDE_TRADING_HOURS"))
+    body = {"underlying": "NIFTY", "expiry": "2099-01-06", "spot": 22000, "instruments": []}
+    got = client.post("/decide", json=body).json()
+    assert (got["action"], got["strategy"], got["reason"]) == ("NO_TRADE", "SYSTEM", "OUTSIDE_TRADING_HOURS")
+
+
+def test_passing_filters_route_the_chain(monkeypatch):
+    monkeypatch.setattr(main, "run_filters", lambda: None)
+    monkeypatch.setattr(main, "route_strategy", lambda chain, state: credit_spread.DecisionResult(
+        action="NO_TRADE", strategy="TEST", reason=f"{chain.underlying}:{len(chain)}", decision_id="t"))
+    body = {"underlying": "NIFTY", "expiry": "2099-01-06", "spot": 22000,
+            "instruments": [{"strike": 22000, "opt_type": "PE", "ltp": 10}]}
+    got = client.post("/decide", json=body).json()
+    assert (got["strategy"], got["reason"]) == ("TEST", "NIFTY:1")
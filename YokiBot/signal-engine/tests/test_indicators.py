@@ -0,0 +1,140 @@
+import json
+import math
+import random
+from datetime import datetime
+
+import pytest
+
+from app.clients.tick_listener import TickListener
+from app.core.indicators import ADX, ATR, RSI, Bar, BarBuilder, IndicatorEngine, UnderlyingIndicators
+from app.core.market_state import IST
+
+PERIOD = 14
+
+
+def random_bars(n, seed=3):
+    rng = random.Random(seed)
+    bars, close = [], 22000.0
+    for k in range(n):
+        bar = Bar(60.0 * k, close, 0.0)
+        for _ in range(rng.randint(1, 6)):
+            close += rng.gauss(0, 8)
+            bar.high, bar.low = max(bar.high, close), min(bar.low, close)
+        bar.close = close
+        bars.append(bar)
+    return bars
+
+
+def wilder_batch(xs, p):
+    """Seeded with the mean of the first p values, then avg += (x - avg) / p; None before that."""
+    out, avg = [], None
+    for k, x in enumerate(xs):
+        if k + 1 == p:
+            avg = sum(xs[:p]) / p
+        elif avg is not None:
+            avg += (x - avg) / p
+        out.append(avg)
+    return out
+
+
+def batch_indicators(bars, p):
+    closes = [b.close for b in bars]
+    changes = [closes[k] - closes[k - 1] for k in range(1, len(bars))]
+    gains = wilder_batch([max(c, 0.0) for c in changes], p)
+    losses = wilder_batch([max(-c, 0.0) for c in changes], p)
+    rsi = 100.0 - 100.0 / (1.0 + gains[-1] / losses[-1])
+
+    tr = [bars[0].high - bars[0].low] + [
+        max(b.high - b.low, abs(b.high - prev.close), abs(b.low - prev.close)) for prev, b in zip(bars, bars[1:])
+    ]
+    atr = wilder_batch(tr, p)[-1]
+
+    pairs = list(zip(bars, bars[1:]))
+    plus = [max(b.high - a.high, 0.0) if b.high - a.high > a.low - b.low else 0.0 for a, b in pairs]
+    minus = [max(a.low - b.low, 0.0) if a.low - b.low > b.high - a.high else 0.0 for a, b in pairs]
+    tr_s, plus_s, minus_s = wilder_batch(tr[1:], p), wilder_batch(plus, p), wilder_batch(minus, p)
+    dx = []
+    for t, pd, md in zip(tr_s, plus_s, minus_s):
+        if t is None:
+            continue
+        pdi, mdi = 100.0 * pd / t, 100.0 * md / t
+        dx.append(100.0 * abs(pdi - mdi) / (pdi + mdi) if pdi + mdi else 0.0)
+    adx = wilder_batch(dx, p)[-1]
+    return rsi, atr, adx
+
+
+def test_streaming_wilder_matches_batch():
+    bars = random_bars(200)
+    rsi, atr, adx = RSI(PERIOD), ATR(PERIOD), ADX(PERIOD)
+    for bar in bars:
+        rsi.update(bar)
+        atr.update(bar)
+        adx.update(bar)
+    want_rsi, want_atr, want_adx = batch_indicators(bars, PERIOD)
+    assert math.isclose(rsi.value, want_rsi, rel_tol=1e-12)
+    assert math.isclose(atr.value, want_atr, rel_tol=1e-12)
+    assert math.isclose(adx.value, want_adx, rel_tol=1e-12)
+
+
+def test_adx_needs_two_periods_of_bars():
+    adx = ADX(PERIOD)
+    values = [adx.update(bar) for bar in random_bars(2 * PERIOD)]
+    assert values[2 * PERIOD - 2] is None and values[2 * PERIOD - 1] is not None
+
+
+def test_bar_rolls_over_on_the_first_tick_of_the_next_bucket():
+    builder = BarBuilder(60)
+    assert builder.update(120.0, 10.0, 1.0) is None
+    assert builder.update(150.0, 12.0, 2.0) is None
+    assert builder.update(179.0, 9.0, 3.0) is None
+    assert builder.update(100.0, 11.0, 0.0) is None     # late tick folds into the forming bar
+
+    closed = builder.update(180.0, 13.0, 4.0)
+    assert closed.as_dict() == {"start": 120.0, "open": 10.0, "high": 12.0, "low": 9.0, "close": 11.0, "volume": 6.0}
+    assert builder.bar.start == 180.0 and builder.bar.open == 13.0
+
+    closed = builder.update(400.0, 14.0)                # gap: one bar closes, no empty bars
+    assert closed.start == 180.0 and builder.bar.start == 360.0
+
+
+def test_vwap_resets_at_the_ist_date_change():
+    ind = UnderlyingIndicators("NIFTY")
+    before_midnight = datetime(2026, 3, 2, 23, 59, 30, tzinfo=IST).timestamp()
+    ind.on_tick(100.0, 1.0, before_midnight - 60)
+    ind.on_tick(110.0, 3.0, before_midnight)
+    assert ind.vwap == pytest.approx(107.5)
+
+    # 18:30 UTC is the next IST day: the session's sums start over
+    ind.on_tick(200.0, 0.0, before_midnight + 30)
+    assert ind.vwap is None
+    ind.on_tick(210.0, 2.0, before_midnight + 40)
+    assert ind.vwap == 210.0
+    assert ind.session == "2026-03-03"
+
+
+@pytest.mark.parametrize("message", [
+    b"not json",
+    b"null",
+    b"[]",
+    b"{}",
+    b'{"ltp": 22000}',
+    b'{"security_id": "13"}',
+    b'{"security_id": "13", "ltp": "abc"}',
+    b'{"security_id": "13", "ltp": null}',
+    b'{"security_id": "13", "ltp": 22000, "volume": "x"}',
+    b'{"security_id": "99", "ltp": 22000}',
+])
+def test_tick_listener_ignores_malformed_and_unknown_messages(message):
+    engine = IndicatorEngine()
+    listener = TickListener(engine=engine, client=None)
+    assert listener.handle(message) is None
+    assert engine.market_state("NIFTY") is None
+
+
+def test_tick_listener_applies_a_tick():
+    engine = IndicatorEngine()
+    listener = TickListener(engine=engine, client=None)
+    ts = datetime(2026, 3, 2, 10, 0, tzinfo=IST).timestamp()
+    assert listener.handle(json.dumps({"security_id": 13, "ltp": 22012.5, "ts": ts})) == "NIFTY"
+    state = engine.market_state("NIFTY", now=ts + 2)
+    assert (state.spot, state.atm, state.data_age_seconds, state.time_block) == (22012.5, 22000, 2.0, "MORNING")
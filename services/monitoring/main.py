@@ -5,9 +5,12 @@ import json
 import logging
 import time
 import sqlite3
-from fastapi import FastAPI, Request, BackgroundTasks, HTTPException
+from typing import Optional
+from fastapi import FastAPI, Request, BackgroundTasks, Header, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 
+from yoki_shared.fast_response import ORJSONResponse, EncodedPayload, dumps_json, wants_msgpack
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("monitoring")
 
@@ -16,9 +19,11 @@ KAFKA_BOOTSTRAP = os.getenv("KAFKA_BOOTSTRAP", "")
 SIGNAL_TOPIC = os.getenv("SIGNAL_TOPIC", "signals")
 TICKS_TOPIC = os.getenv("TICKS_TOPIC", "market.ticks")
 
-app = FastAPI(title="YokiBot Monitoring")
+app = FastAPI(title="YokiBot Monitoring", default_response_class=ORJSONResponse)
 
 subscribers = set()
+# (n, msgpack?) -> encoded /events/latest body; cleared by save_event
+_latest_cache = {}
 
 def init_db():
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
@@ -43,6 +48,7 @@ def save_event(event_type: str, symbol: str, payload):
     cur.execute("INSERT INTO events (type, symbol, timestamp, payload) VALUES (?, ?, ?, ?)", 
                 (event_type, symbol, ts, json.dumps(payload)))
     db.commit()
+    _latest_cache.clear()
     return cur.lastrowid
 
 @app.on_event('startup')
@@ -127,12 +133,30 @@ async def dashboard():
     html = open(os.path.join(os.path.dirname(__file__), 'static', 'index.html')).read()
     return HTMLResponse(html)
 
+def _latest_json(rows) -> bytes:
+    """
+    JSON body for /events/latest without parsing the stored payloads: the
+    payload column already holds JSON text, so it is spliced in as-is.
+    """
+    parts = []
+    for r in reversed(rows):
+        head = dumps_json({'id': r[0], 'type': r[1], 'symbol': r[2], 'ts': r[3]})
+        parts.append(head[:-1] + b',"payload":' + r[4].encode('utf-8') + b'}')
+    return b'[' + b','.join(parts) + b']'
+
+
 @app.get('/events/latest')
-async def latest(n: int = 50):
-    cur = db.cursor()
-    cur.execute('SELECT id,type,symbol,timestamp,payload FROM events ORDER BY id DESC LIMIT ?', (n,))
-    rows = cur.fetchall()
-    out = []
-    for r in rows:
-        out.append({'id': r[0], 'type': r[1], 'symbol': r[2], 'ts': r[3], 'payload': json.loads(r[4])})
-    return JSONResponse(list(reversed(out)))
+async def latest(n: int = 50, accept: Optional[str] = Header(None)):
+    msgpack = wants_msgpack(accept)
+    encoded = _latest_cache.get((n, msgpack))
+    if encoded is None:
+        cur = db.cursor()
+        cur.execute('SELECT id,type,symbol,timestamp,payload FROM events ORDER BY id DESC LIMIT ?', (n,))
+        rows = cur.fetchall()
+        if msgpack:
+            encoded = EncodedPayload([{'id': r[0], 'type': r[1], 'symbol': r[2], 'ts': r[3], 'payload': json.loads(r[4])}
+                                      for r in reversed(rows)])
+        else:
+            encoded = EncodedPayload(None, json_bytes=_latest_json(rows))
+        _latest_cache[(n, msgpack)] = encoded
+    return encoded.response(accept)
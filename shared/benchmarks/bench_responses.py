@@ -0,0 +1,96 @@
+# bench_responses.py - fast_response encoders on each service's hot payload:
+# FastAPI default (jsonable_encoder + json) vs orjson vs msgpack vs cached bytes.
+#   chain      optionchain-service /snapshot and /option-chain rows
+#   greeks     greeks-service /batch results
+#   contracts  live_feed_microservice /option_chain scrip-master records (NaN cells)
+#   events     services/monitoring /events/latest
+# Run from shared/: python benchmarks/bench_responses.py
+# BENCH_SIZES sets the number of rows per payload.
+
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from yoki_shared.fast_response import EncodedPayload, dumps_json, dumps_msgpack, msgpack
+
+N = int(os.getenv("BENCH_N", "300"))
+SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "200,1000").split(",")]
+
+
+def chain(n: int) -> dict:
+    rows = [
+        {"instrument_key": f"NSE_FO|{i}", "strike": 20000.0 + 50 * (i // 2), "opt_type": "CE" if i % 2 == 0 else "PE",
+         "ltp": 100.0 + i * 0.05, "oi": 1000 + i, "volume": 10 * i}
+        for i in range(n)
+    ]
+    return {"underlying": "NIFTY", "expiry": "2099-01-30", "spot": 22000.0, "seq": 1, "instruments": rows}
+
+
+def greeks(n: int) -> dict:
+    results = [
+        {"symbol": "NIFTY", "strike": 20000.0 + 50 * (i // 2), "option_type": "CE" if i % 2 == 0 else "PE",
+         "expiry": "2099-01-30", "price": 123.45, "delta": 0.52, "gamma": 0.0004, "vega": 12.3, "theta": -8.1,
+         "rho": 4.2, "iv": 0.15, "cached": False}
+        for i in range(n)
+    ]
+    return {"count": n, "results": results}
+
+
+def contracts(n: int) -> dict:
+    def contract(i: int) -> dict:
+        return {
+            "EXCH_ID": "NSE", "SEGMENT": "D", "SECURITY_ID": 40000 + i, "INSTRUMENT": "OPTIDX",
+            "UNDERLYING_SYMBOL": "NIFTY", "SYMBOL_NAME": f"NIFTY-Jan2099-{20000 + 50 * (i // 2)}",
+            "LOT_SIZE": 75.0, "SM_EXPIRY_DATE": "2099-01-30", "STRIKE_PRICE": 20000.0 + 50 * (i // 2),
+            "OPTION_TYPE": "CE" if i % 2 == 0 else "PE", "TICK_SIZE": 5.0, "ASM_GSM_CATEGORY": math.nan,
+        }
+    return {"symbol": "NIFTY", "count": n, "contracts": [contract(i) for i in range(n)], "quotes": {}}
+
+
+def events(n: int) -> list:
+    return [
+        {"id": i, "type": "signal", "symbol": "NIFTY", "ts": "2099-01-30T10:00:00", "payload": {
+            "strategy": "IRON_CONDOR", "spot": 22000.0 + i, "net_premium": 41.5,
+            "legs": [{"strike": 21500 + 50 * k, "opt_type": "PE" if k < 2 else "CE", "ltp": 12.5 + k} for k in range(4)],
+        }}
+        for i in range(n)
+    ]
+
+
+def timed(fn) -> float:
+    samples = []
+    for _ in range(N):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def default(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        for name, make in [("chain", chain), ("greeks", greeks), ("contracts", contracts), ("events", events)]:
+            payload = make(size)
+            cached = EncodedPayload(payload)
+            cached.json()
+            rows = [("orjson", lambda: dumps_json(payload)), ("cached", cached.json)]
+            try:
+                default(payload)
+                rows.insert(0, ("default", lambda: default(payload)))
+            except ValueError:  # NaN cells are not valid JSON for the default encoder
+                print(f"{name} x {size}: default fails on NaN")
+            if msgpack is not None:
+                rows.append(("msgpack", lambda: dumps_msgpack(payload)))
+            print(f"{name} x {size}")
+            for label, fn in rows:
+                print(f"  {label:<8} p50 {timed(fn):9.1f} us  {len(fn()):>9} bytes")
@@ -0,0 +1,28 @@
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from yoki_shared.expiry_calendar import IST, ExpiryCalendar, expiry_epoch
+
+
+def test_trading_mode_skips_holidays_and_warns_on_uncovered_years(caplog):
+    cal = ExpiryCalendar(holidays=np.array(["2026-01-26"], dtype="datetime64[D]"))
+    monday_open = datetime(2026, 1, 26, 9, 15, tzinfo=IST).timestamp()
+    # Mon 26th is a holiday: only Tuesday's session counts towards a Tuesday 15:30 expiry
+    with caplog.at_level(logging.WARNING, logger="expiry_calendar"):
+        t = cal.years("2026-01-27", monday_open, "trading")
+    assert np.isclose(t * cal.trading_year_seconds, 6.25 * 3600)
+    assert not caplog.records
+
+    with caplog.at_level(logging.WARNING, logger="expiry_calendar"):
+        cal.years("2027-01-28", monday_open, "trading")
+        cal.years("2027-02-25", monday_open, "trading")
+    assert [r.getMessage().split()[4] for r in caplog.records] == ["2027"]  # once per year
+
+
+def test_theta_day_basis_matches_mode():
+    cal = ExpiryCalendar(holidays=np.array([], dtype="datetime64[D]"), trading_days_per_year=250)
+    assert cal.days_per_year("calendar") == 365.0
+    assert cal.days_per_year("trading") == 250.0
+    assert expiry_epoch("2026-01-27") == datetime(2026, 1, 27, 15, 30, tzinfo=IST).timestamp()
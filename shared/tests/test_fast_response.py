@@ -0,0 +1,30 @@
+import json
+
+import msgpack
+import numpy as np
+
+from yoki_shared.fast_response import EncodedPayload, negotiate, wants_msgpack
+
+
+def test_accept_negotiation():
+    assert wants_msgpack("application/msgpack")
+    assert wants_msgpack("application/x-msgpack, */*")
+    assert wants_msgpack("application/json;q=0.5, application/msgpack")
+    assert not wants_msgpack(None)
+    assert not wants_msgpack("application/json, application/msgpack")
+    assert not wants_msgpack("application/msgpack;q=0, */*")
+
+
+def test_json_and_msgpack_bodies_match():
+    content = {"strike": np.float64(22000.0), "oi": np.int64(5), "ltp": float("nan"), "rows": np.arange(3)}
+    expected = {"strike": 22000.0, "oi": 5, "ltp": None, "rows": [0, 1, 2]}
+
+    as_json = negotiate("application/json", content)
+    assert as_json.media_type == "application/json" and json.loads(as_json.body) == expected
+
+    encoded = EncodedPayload({"rows": [1, 2]})
+    as_msgpack = encoded.response("application/msgpack", headers={"ETag": '"1"'})
+    assert as_msgpack.media_type == "application/msgpack"
+    assert msgpack.unpackb(as_msgpack.body) == {"rows": [1, 2]}
+    assert as_msgpack.headers["vary"] == "Accept" and as_msgpack.headers["etag"] == '"1"'
+    assert encoded.msgpack() is encoded.msgpack()
@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+
+from yoki_shared.greeks_array import (
+    IV_ABOVE_BOUND,
+    IV_BELOW_INTRINSIC,
+    IV_EXPIRED,
+    IV_FAILURES,
+    IV_NO_PRICE,
+    IV_NOT_CONVERGED,
+    IV_SOLVED,
+    bs_greeks_array,
+    bs_price_array,
+    implied_vol_array,
+    implied_vol_status,
+)
+
+
+def test_price_matches_closed_form_and_parity():
+    S, K, t, sigma, r = 22000.0, np.array([21500.0, 22000.0, 22500.0]), 0.05, 0.14, 0.065
+    call = bs_price_array(S, K, t, sigma, r, 0.0, True)
+    put = bs_price_array(S, K, t, sigma, r, 0.0, False)
+    np.testing.assert_allclose(call - put, S - K * math.exp(-r * t))
+
+    d1 = (math.log(S / 22000.0) + (r + 0.5 * sigma ** 2) * t) / (sigma * math.sqrt(t))
+    n = lambda x: 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+    atm = S * n(d1) - 22000.0 * math.exp(-r * t) * n(d1 - sigma * math.sqrt(t))
+    assert math.isclose(call[1], atm, rel_tol=1e-12)
+    np.testing.assert_allclose(bs_greeks_array(S, K, t, sigma, r, 0.0, True)["price"], call)
+
+
+def test_implied_vol_round_trips():
+    K = np.array([21000.0, 22000.0, 23000.0])
+    is_call = np.array([False, True, True])
+    price = bs_price_array(22000.0, K, 0.08, 0.17, 0.065, 0.0, is_call)
+    np.testing.assert_allclose(implied_vol_array(price, 22000.0, K, 0.08, 0.065, 0.0, is_call), 0.17, atol=1e-6)
+
+
+def test_implied_vol_is_nan_where_not_converged():
+    K = np.array([22000.0, 26000.0])
+    price = bs_price_array(22000.0, K, 0.08, 0.17, 0.065, 0.0, True)
+    iv = implied_vol_array(price, 22000.0, K, 0.08, 0.065, 0.0, True, max_iter=1)
+    assert np.isnan(iv).all()
+    assert not np.isnan(implied_vol_array(price, 22000.0, K, 0.08, 0.065, 0.0, True)).any()
+
+
+def test_implied_vol_status_says_why_a_row_is_nan():
+    K = np.array([22000.0, 22000.0, 22000.0, 23000.0, 22000.0])
+    t = np.array([0.08, 0.08, 0.08, 0.08, 0.0])
+    is_call = np.array([True, True, True, False, True])
+    good = bs_price_array(22000.0, 22000.0, 0.08, 0.17, 0.065, 0.0, True)
+    itm_put = 23000.0 * math.exp(-0.065 * 0.08) - 22000.0  # its value at zero vol
+    price = np.array([good, 1e9, np.nan, itm_put - 1.0, 100.0])
+    iv, status = implied_vol_status(price, 22000.0, K, t, 0.065, 0.0, is_call)
+    assert status.tolist() == [IV_SOLVED, IV_ABOVE_BOUND, IV_NO_PRICE, IV_BELOW_INTRINSIC, IV_EXPIRED]
+    assert np.isnan(iv[1:5]).all() and iv[0] == pytest.approx(0.17)
+    assert set(IV_FAILURES) == {IV_ABOVE_BOUND, IV_NO_PRICE, IV_BELOW_INTRINSIC, IV_EXPIRED, IV_NOT_CONVERGED}
+
+    _, status = implied_vol_status(price[:1], 22000.0, 22000.0, 0.08, 0.065, 0.0, True, max_iter=1)
+    assert status.tolist() == [IV_NOT_CONVERGED]
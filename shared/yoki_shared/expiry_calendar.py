@@ -0,0 +1,142 @@
+# expiry_calendar.py - time-to-expiry for NSE options
+# Each expiry string is parsed once (memoised). Year fractions come in two modes:
+#   calendar: wall-clock seconds / (365 x 24h)
+#   trading:  NSE session seconds (09:15-15:30 IST, weekdays minus holidays)
+#             / (TRADING_DAYS_PER_YEAR x session length)
+# Date-only expiries settle at 15:30 IST, not midnight UTC.
+# Batch callers take one `now` and get a numpy array back.
+# Trading mode logs a warning (once per year) when the span it counts reaches a
+# year with no entries in the holiday file: those holidays count as sessions.
+
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN_SECONDS = 9 * 3600 + 15 * 60    # 09:15 IST
+SESSION_CLOSE_SECONDS = 15 * 3600 + 30 * 60  # 15:30 IST
+SESSION_SECONDS = SESSION_CLOSE_SECONDS - SESSION_OPEN_SECONDS
+SECONDS_PER_YEAR = 365.0 * 24.0 * 3600.0
+IST_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+
+TRADING_DAYS_PER_YEAR = int(os.getenv("TRADING_DAYS_PER_YEAR", "252"))
+HOLIDAYS_FILE = Path(os.getenv("NSE_HOLIDAYS_FILE", Path(__file__).with_name("nse_holidays.txt")))
+
+MODES = ("calendar", "trading")
+
+logger = logging.getLogger("expiry_calendar")
+
+
+@lru_cache(maxsize=4096)
+def expiry_epoch(expiry: str) -> float:
+    """
+    Expiry string -> UTC epoch seconds. Accepts YYYY-MM-DD (settles 15:30 IST)
+    or ISO datetime (naive values are read as IST). Raises ValueError.
+    """
+    s = expiry.strip()
+    try:
+        if len(s) == 10:
+            d = date.fromisoformat(s)
+            dt = datetime(d.year, d.month, d.day, 15, 30, tzinfo=IST)
+        else:
+            dt = datetime.fromisoformat(s)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=IST)
+    except Exception:
+        raise ValueError("expiry must be YYYY-MM-DD or ISO datetime")
+    return dt.timestamp()
+
+
+def load_holidays(path: Path) -> np.ndarray:
+    """One YYYY-MM-DD per line, '#' comments. Missing file -> no holidays."""
+    days = []
+    if path.exists():
+        for line in path.read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                days.append(line)
+    return np.array(sorted(set(days)), dtype="datetime64[D]")
+
+
+class ExpiryCalendar:
+    def __init__(self, holidays: Optional[np.ndarray] = None, trading_days_per_year: int = TRADING_DAYS_PER_YEAR):
+        self.holidays = load_holidays(HOLIDAYS_FILE) if holidays is None else holidays
+        self.trading_days_per_year = trading_days_per_year
+        self.trading_year_seconds = float(trading_days_per_year * SESSION_SECONDS)
+        self.holiday_years = {int(y) for y in self.holidays.astype("datetime64[Y]").astype(int) + 1970}
+        self._warned_years = set()
+
+    def days_per_year(self, mode: str = "calendar") -> float:
+        """Days in one year of `mode`: per-day theta is annual theta / this."""
+        if mode == "calendar":
+            return 365.0
+        if mode == "trading":
+            return float(self.trading_days_per_year)
+        raise ValueError(f"mode must be one of {MODES}")
+
+    def _check_holiday_years(self, now: float, last_epoch: float) -> None:
+        first = datetime.fromtimestamp(now, IST).year
+        last = datetime.fromtimestamp(max(now, last_epoch), IST).year
+        for year in range(first, last + 1):
+            if year not in self.holiday_years and year not in self._warned_years:
+                self._warned_years.add(year)
+                logger.warning("no NSE holidays for %d in %s: trading-mode T counts them as sessions",
+                               year, HOLIDAYS_FILE)
+
+    # ---- scalar ----
+    def years(self, expiry: str, now: Optional[float] = None, mode: str = "calendar") -> float:
+        return float(self.years_many([expiry], now, mode)[0])
+
+    # ---- vectorized ----
+    def years_many(self, expiries: Sequence[str], now: Optional[float] = None, mode: str = "calendar") -> np.ndarray:
+        """Year fractions for many expiries against a single `now` (epoch seconds)."""
+        if now is None:
+            now = time.time()
+        epochs = np.fromiter((expiry_epoch(e) for e in expiries), dtype=np.float64, count=len(expiries))
+        if mode == "calendar":
+            return np.maximum(epochs - now, 0.0) / SECONDS_PER_YEAR
+        if mode == "trading":
+            if epochs.size:
+                self._check_holiday_years(now, float(epochs.max()))
+            return self._trading_seconds(epochs, now) / self.trading_year_seconds
+        raise ValueError(f"mode must be one of {MODES}")
+
+    def _is_trading_day(self, day: np.ndarray) -> np.ndarray:
+        return np.is_busday(day, holidays=self.holidays)
+
+    def _trading_seconds(self, epochs: np.ndarray, now: float) -> np.ndarray:
+        """Session seconds between now and each expiry."""
+        # Shift to IST so datetime64[D] truncation lands on the IST calendar day
+        now_ist = np.datetime64(int(now + IST_OFFSET_SECONDS), "s")
+        exp_ist = (epochs + IST_OFFSET_SECONDS).astype("int64").astype("datetime64[s]")
+        today = now_ist.astype("datetime64[D]")
+        exp_day = exp_ist.astype("datetime64[D]")
+
+        now_tod = float((now_ist - today).astype(np.int64))
+        exp_tod = (exp_ist - exp_day).astype(np.int64).astype(np.float64)
+
+        # rest of today's session (same-day expiries stop at their own time)
+        end_today = np.where(exp_day == today, exp_tod, SESSION_CLOSE_SECONDS)
+        today_secs = np.clip(end_today, SESSION_OPEN_SECONDS, SESSION_CLOSE_SECONDS) - np.clip(
+            now_tod, SESSION_OPEN_SECONDS, SESSION_CLOSE_SECONDS
+        )
+        today_secs = np.maximum(today_secs, 0.0) * self._is_trading_day(today)
+
+        # whole sessions strictly between today and the expiry day, plus the expiry-day part
+        later = exp_day > today
+        full_days = np.busday_count(today + 1, np.maximum(exp_day, today + 1), holidays=self.holidays)
+        exp_day_secs = (np.clip(exp_tod, SESSION_OPEN_SECONDS, SESSION_CLOSE_SECONDS) - SESSION_OPEN_SECONDS) * self._is_trading_day(exp_day)
+        later_secs = (full_days * SESSION_SECONDS + exp_day_secs) * later
+
+        out = today_secs + later_secs
+        out[epochs <= now] = 0.0
+        return out
+
+
+calendar = ExpiryCalendar()
@@ -0,0 +1,130 @@
+# fast_response.py - response encoding for the high-volume JSON endpoints
+# Shared by optionchain-service, greeks-service, live_feed_microservice and
+# services/monitoring (from yoki_shared.fast_response import ...).
+#   ORJSONResponse  orjson encoder (numpy scalars/arrays, NaN -> null); stdlib
+#                   json when orjson is not installed
+#   negotiate()     application/msgpack when the Accept header prefers it and
+#                   msgpack is installed, JSON otherwise
+#   EncodedPayload  hot payloads: encoded at most once per format, then served
+#                   from the cached bytes
+# Endpoints return the Response itself: FastAPI then skips jsonable_encoder,
+# which costs more than the encoding on wide chains.
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK_TYPE, "application/x-msgpack")
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "tolist"):  # numpy scalar / array
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    True when msgpack is installed and Accept ranks it above JSON (a tie or
+    no preference keeps JSON; an explicit msgpack beats a */* wildcard).
+    """
+    if msgpack is None or not accept or "msgpack" not in accept:
+        return False
+    ranks: Dict[str, float] = {}
+    for part in accept.split(","):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranks[media.strip().lower()] = q
+    mp = max(ranks.get(t, 0.0) for t in _MSGPACK_TYPES)
+    return mp > ranks.get(JSON_TYPE, 0.0)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = JSON_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def _headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {**(headers or {}), "Vary": "Accept"}
+
+
+def negotiate(accept: Optional[str], content: Any, status_code: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> Response:
+    if wants_msgpack(accept):
+        return MsgpackResponse(content, status_code=status_code, headers=_headers(headers))
+    return ORJSONResponse(content, status_code=status_code, headers=_headers(headers))
+
+
+class EncodedPayload:
+    """
+    A payload encoded lazily, once per format. json_bytes: the JSON encoding
+    when the caller already has it (e.g. spliced from stored JSON text).
+    """
+
+    __slots__ = ("content", "_json", "_msgpack")
+
+    def __init__(self, content: Any, json_bytes: Optional[bytes] = None):
+        self.content = content
+        self._json = json_bytes
+        self._msgpack: Optional[bytes] = None
+
+    def json(self) -> bytes:
+        if self._json is None:
+            self._json = dumps_json(self.content)
+        return self._json
+
+    def msgpack(self) -> bytes:
+        if self._msgpack is None:
+            self._msgpack = dumps_msgpack(self.content)
+        return self._msgpack
+
+    def response(self, accept: Optional[str], status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        if wants_msgpack(accept):
+            return Response(self.msgpack(), status_code=status_code, headers=_headers(headers), media_type=MSGPACK_TYPE)
+        return Response(self.json(), status_code=status_code, headers=_headers(headers), media_type=JSON_TYPE)
@@ -0,0 +1,167 @@
+# greeks_array.py - vectorized Black-Scholes engine
+# Same formulas and conventions as greeks-service main.bs_price_and_greeks /
+# implied_vol_bisect, evaluated over numpy arrays so a whole chain is one pass
+# instead of N calls. The one array pricer for greeks-service (chains,
+# portfolio) and signal-engine (scenario grid); needs the [greeks] extra (scipy).
+#   t: years, sigma: annual decimal, theta: annualized, vega: per 1.0 vol
+#   is_call: bool array (True = CE, False = PE)
+
+from typing import Tuple
+
+import numpy as np
+from scipy.special import ndtr
+
+INV_SQRT2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def _npdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) * INV_SQRT2PI
+
+
+def bs_price_array(S, K, t, sigma, r, q, is_call) -> np.ndarray:
+    """Theoretical price only (used by the IV solver)."""
+    S, K, t, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, t, sigma)))
+    live = (t > 0) & (sigma > 0)
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+    disc_r = np.exp(-r * t)
+    disc_q = np.exp(-q * t)
+    call = S * disc_q * ndtr(d1) - K * disc_r * ndtr(d2)
+    put = K * disc_r * ndtr(-d2) - S * disc_q * ndtr(-d1)
+    return np.where(live, np.where(is_call, call, put), intrinsic)
+
+
+def bs_greeks_array(S, K, t, sigma, r, q, is_call) -> dict:
+    """
+    Price + greeks for every element. Rows with t <= 0 or sigma <= 0 get the
+    payoff / step delta / zero greeks and NaN d1, d2 (scalar path returns None).
+    """
+    S, K, t, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, t, sigma)))
+    is_call = np.asarray(is_call, dtype=bool)
+    live = (t > 0) & (sigma > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        disc_r = np.exp(-r * t)
+        disc_q = np.exp(-q * t)
+        Nd1, Nd2 = ndtr(d1), ndtr(d2)
+        Nmd1, Nmd2 = ndtr(-d1), ndtr(-d2)
+        npd1 = _npdf(d1)
+
+        price = np.where(is_call, S * disc_q * Nd1 - K * disc_r * Nd2, K * disc_r * Nmd2 - S * disc_q * Nmd1)
+        delta = np.where(is_call, disc_q * Nd1, -disc_q * Nmd1)
+        rho = np.where(is_call, K * t * disc_r * Nd2, -K * t * disc_r * Nmd2)
+        gamma = (disc_q * npd1) / (S * sigma * sqrt_t)
+        vega = S * disc_q * npd1 * sqrt_t
+        theta = (
+            (-S * disc_q * npd1 * sigma) / (2 * sqrt_t)
+            - r * K * disc_r * np.where(is_call, Nd2, -Nmd2)
+            + q * S * disc_q * np.where(is_call, Nd1, -Nmd1)
+        )
+
+    payoff = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    step_delta = np.where(is_call, (S > K).astype(np.float64), -(S < K).astype(np.float64))
+    zero = np.zeros_like(S)
+    nan = np.full_like(S, np.nan)
+    return {
+        "price": np.where(live, price, payoff),
+        "delta": np.where(live, delta, step_delta),
+        "gamma": np.where(live, gamma, zero),
+        "vega": np.where(live, vega, zero),
+        "theta": np.where(live, theta, zero),
+        "rho": np.where(live, rho, zero),
+        "d1": np.where(live, d1, nan),
+        "d2": np.where(live, d2, nan),
+    }
+
+
+def _price_vega(S, K, t, sigma, r, q, is_call):
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    disc_r = np.exp(-r * t)
+    disc_q = np.exp(-q * t)
+    call = S * disc_q * ndtr(d1) - K * disc_r * ndtr(d2)
+    put = call - S * disc_q + K * disc_r  # put-call parity
+    return np.where(is_call, call, put), S * disc_q * _npdf(d1) * sqrt_t
+
+
+# implied_vol_status codes (0 = solved) and the reason reported for a NaN row
+IV_SOLVED, IV_EXPIRED, IV_NO_PRICE, IV_BELOW_INTRINSIC, IV_ABOVE_BOUND, IV_NOT_CONVERGED = range(6)
+IV_FAILURES = {
+    IV_EXPIRED: "expired: no time value to solve for",
+    IV_NO_PRICE: "no market price",
+    IV_BELOW_INTRINSIC: "market price below intrinsic value",
+    IV_ABOVE_BOUND: "market price too large for reasonable vol bounds",
+    IV_NOT_CONVERGED: "solver did not converge",
+}
+
+
+def implied_vol_array(market_price, S, K, t, r, q, is_call, tol: float = 1e-6, max_iter: int = 60) -> np.ndarray:
+    """
+    Safeguarded Newton: Newton steps on vega, falling back to bisection of the
+    [lo, hi] bracket whenever a step leaves it. Bracket starts at [1e-6, 5] and
+    is widened by doubling up to 10 times. Converges in a handful of passes
+    instead of ~40 pure bisection passes.
+    Returns NaN where implied_vol_status reports a failure.
+    """
+    return implied_vol_status(market_price, S, K, t, r, q, is_call, tol, max_iter)[0]
+
+
+def implied_vol_status(market_price, S, K, t, r, q, is_call, tol: float = 1e-6,
+                       max_iter: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    implied_vol_array plus an int status per row: IV_SOLVED, or why the row is
+    NaN (IV_FAILURES[status] is the message): t <= 0, no finite price, price
+    below the ~zero-vol value, above the widened bracket, or still outside tol
+    after max_iter passes.
+    """
+    market_price, S, K, t = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (market_price, S, K, t)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+    status = np.full(S.shape, IV_SOLVED, dtype=np.int8)
+    status[~np.isfinite(market_price)] = IV_NO_PRICE
+    status[t <= 0] = IV_EXPIRED
+    # solve only the rows that can have an answer; NaN-free inputs keep numpy quiet
+    tt = np.where(t > 0, t, 1.0)
+    price = np.where(np.isfinite(market_price), market_price, 0.0)
+    lo = np.full_like(S, 1e-6)
+    hi = np.full_like(S, 5.0)
+
+    below = bs_price_array(S, K, tt, lo, r, q, is_call) - price > tol
+    status[below & (status == IV_SOLVED)] = IV_BELOW_INTRINSIC
+
+    price_hi = bs_price_array(S, K, tt, hi, r, q, is_call)
+    for _ in range(10):
+        short = price_hi < price
+        if not short.any():
+            break
+        hi = np.where(short, hi * 2, hi)
+        price_hi = bs_price_array(S, K, tt, hi, r, q, is_call)
+    status[(price_hi < price) & (status == IV_SOLVED)] = IV_ABOVE_BOUND
+
+    sigma = np.full_like(S, 0.2)
+    done = status != IV_SOLVED
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            model, vega = _price_vega(S, K, tt, sigma, r, q, is_call)
+            diff = model - price
+            done = done | (np.abs(diff) < tol)
+            if done.all():
+                break
+            above = diff > 0
+            hi = np.where(above, sigma, hi)
+            lo = np.where(above, lo, sigma)
+            step = sigma - diff / vega
+            inside = (step > lo) & (step < hi) & np.isfinite(step)
+            sigma = np.where(done, sigma, np.where(inside, step, 0.5 * (lo + hi)))
+        else:
+            # the last pass moved sigma without checking it
+            model, _ = _price_vega(S, K, tt, sigma, r, q, is_call)
+            done = done | (np.abs(model - price) < tol)
+    status[~done] = IV_NOT_CONVERGED
+    return np.where(status == IV_SOLVED, sigma, np.nan), status